@@ -0,0 +1,128 @@
+#!/usr/bin/env python3.9
+"""
+Benchmark of the Gurobi threads on a stored epoch model: solves the model with each number of threads (and in
+concurrent MIP mode with all of them) and reports the time to reach each optimality gap.
+Usage: python benchmarks/benchmark_gurobi_threads.py [model_file.mps] [time_limit]
+Without a model file, the offline epoch model of the script instance is stored in temp/ and used.
+"""
+import os
+import sys
+from pathlib import Path
+
+GAPS = [0.5, 0.2, 0.1, 0.05, 0.01]
+
+
+def setup_paths():
+    # Define paths relative to the script location
+    path_to_repo = Path(__file__).resolve().parent.parent
+    path_to_src = path_to_repo / "src"
+    path_to_build = path_to_repo / "cpp_module/cmake-build-{}".format(build)
+
+    # Append paths to the system path for module discovery
+    sys.path.extend([path_to_repo.as_posix(), path_to_src.as_posix(), path_to_build.as_posix()])
+
+
+def store_epoch_model(instance, solver_params, path_to_model: Path) -> None:
+    """Constructs the model of the offline epoch with its warm start and writes both (.mps and .mst)."""
+    from MIP.model import construct_model
+    from MIP.warm_start import set_warm_start_model
+    from problem.epoch_instance import get_epoch_instance
+    from simplify.simplify import simplify_system
+    from solutions.core import get_offline_solution
+    from solutions.epoch_warm_start import get_epoch_warm_start
+    from solutions.status_quo import get_cpp_instance, get_epoch_status_quo
+    import cpp_module as cpp
+
+    cpp_instance = get_cpp_instance(instance, solver_params.epoch_time_limit)
+    get_offline_solution(instance, cpp_instance)
+    epoch_instance = get_epoch_instance(instance, 0, solver_params)
+    epoch_status_quo, _ = get_epoch_status_quo(epoch_instance, solver_params)
+    simplified_instance, simplified_status_quo = simplify_system(epoch_instance, epoch_status_quo, solver_params)
+    cpp_simplified_instance = get_cpp_instance(simplified_instance, solver_params.epoch_time_limit)
+    cpp_local_search = cpp.LocalSearch(cpp_simplified_instance, solver_params.verbose_model)
+    warm_start = get_epoch_warm_start(simplified_instance, simplified_status_quo, solver_params, cpp_local_search,
+                                      cpp_simplified_instance)
+
+    model = construct_model(simplified_instance, simplified_status_quo, warm_start, solver_params)
+    set_warm_start_model(model, [warm_start], simplified_instance)
+    model.update()
+    model.write(path_to_model.as_posix())
+    model.write(path_to_model.with_suffix(".mst").as_posix())
+    model.dispose()
+
+
+def get_time_to_gaps(path_to_model: Path, solver_params, time_limit: float) -> list:
+    """Solves the stored model and returns the first time at which each gap of GAPS is reached."""
+    import gurobipy as grb
+    from MIP.support import set_gurobi_solver_parameters
+
+    model = grb.read(path_to_model.as_posix())
+    if path_to_model.with_suffix(".mst").exists():
+        model.read(path_to_model.with_suffix(".mst").as_posix())
+    model.setParam("OutputFlag", 0)
+    model.setParam("TimeLimit", time_limit)
+    model.setParam("MIPGap", 0)
+    set_gurobi_solver_parameters(model, solver_params)
+    time_to_gaps = [None for _ in GAPS]
+
+    def record_gaps(callback_model, where):
+        if where not in [grb.GRB.Callback.MIP, grb.GRB.Callback.MIPSOL]:
+            return
+        best_objective, best_bound = (
+            (callback_model.cbGet(grb.GRB.Callback.MIP_OBJBST), callback_model.cbGet(grb.GRB.Callback.MIP_OBJBND))
+            if where == grb.GRB.Callback.MIP else
+            (callback_model.cbGet(grb.GRB.Callback.MIPSOL_OBJBST), callback_model.cbGet(grb.GRB.Callback.MIPSOL_OBJBND))
+        )
+        if best_objective >= grb.GRB.INFINITY:
+            return
+        gap = abs(best_objective - best_bound) / max(abs(best_objective), 1e-10)
+        for index, target_gap in enumerate(GAPS):
+            if time_to_gaps[index] is None and gap <= target_gap:
+                time_to_gaps[index] = callback_model.cbGet(grb.GRB.Callback.RUNTIME)
+
+    model.optimize(record_gaps)
+    final_gap = model.MIPGap if model.SolCount else float("inf")
+    for index, target_gap in enumerate(GAPS):
+        if time_to_gaps[index] is None and final_gap <= target_gap:
+            time_to_gaps[index] = model.Runtime
+    row = [*time_to_gaps, final_gap, model.Runtime, int(model.NodeCount)]
+    model.dispose()
+    return row
+
+
+if __name__ == "__main__":
+    # Configuration for C++ build (options: release, debug, relwithdebinfo)
+    build = "relwithdebinfo"
+
+    # Setup paths for module imports
+    setup_paths()
+
+    import dataclasses
+    from tabulate import tabulate
+    import utils.run_procedure  # Imports the modules in the same order as main.py
+    from input_data import generate_input_data_from_script
+    from problem.instance import get_instance
+
+    instance_params, solver_params = generate_input_data_from_script()
+    solver_params = dataclasses.replace(solver_params, instance_parameters=instance_params, epoch_size=60,
+                                        epoch_time_limit=10 ** 6, verbose_model=False)
+    time_limit = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    if len(sys.argv) > 1:
+        path_to_model = Path(sys.argv[1])
+    else:
+        path_to_model = Path(__file__).resolve().parent.parent / "temp/epoch_model.mps"
+        os.makedirs(path_to_model.parent, exist_ok=True)
+        store_epoch_model(get_instance(instance_params), solver_params, path_to_model)
+
+    thread_counts = [threads for threads in [1, 2, 4, 8, 16, 32, 64] if threads <= (os.cpu_count() or 1)]
+    configurations = [(f"Threads={threads}", dataclasses.replace(solver_params, gurobi_threads=threads))
+                      for threads in thread_counts]
+    if thread_counts[-1] > 1:
+        configurations.append((f"Threads={thread_counts[-1]}, ConcurrentMIP=2", dataclasses.replace(
+            solver_params, gurobi_threads=thread_counts[-1], gurobi_concurrent_mip=2)))
+
+    rows = [[name, *get_time_to_gaps(path_to_model, configuration, time_limit)]
+            for name, configuration in configurations]
+    print(f"Time [s] to reach each gap on {path_to_model.name} (time limit {time_limit:.0f} s):")
+    print(tabulate(rows, headers=["Mode", *[f"Gap {gap:.0%}" for gap in GAPS], "Final gap", "Runtime [s]",
+                                  "Nodes"], floatfmt=".2f", missingval="-"))
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3.9
+"""
+Benchmark of the construction of the offline MIP, adding the constraints one by one (addConstr) or in matrix
+blocks (addMConstr). Usage: python benchmarks/benchmark_model_construction.py [number_of_trips]
+"""
+import sys
+from pathlib import Path
+
+
+def setup_paths():
+    # Define paths relative to the script location
+    path_to_repo = Path(__file__).resolve().parent.parent
+    path_to_src = path_to_repo / "src"
+    path_to_build = path_to_repo / "cpp_module/cmake-build-{}".format(build)
+
+    # Append paths to the system path for module discovery
+    sys.path.extend([path_to_repo.as_posix(), path_to_src.as_posix(), path_to_build.as_posix()])
+
+
+def benchmark_model_construction(instance, solver_params) -> list[list]:
+    """Constructs the model of the offline epoch with both constraint paths and returns the timings."""
+    import datetime
+    import time
+    import MIP.constraints
+    from MIP.model import construct_model
+    from problem.epoch_instance import get_epoch_instance
+    from simplify.simplify import simplify_system
+    from solutions.core import get_offline_solution
+    from solutions.status_quo import get_cpp_instance, get_epoch_status_quo
+
+    cpp_instance = get_cpp_instance(instance, solver_params.epoch_time_limit)
+    get_offline_solution(instance, cpp_instance)
+    epoch_instance = get_epoch_instance(instance, 0, solver_params)
+    epoch_status_quo, _ = get_epoch_status_quo(epoch_instance, solver_params)
+    simplified_instance, simplified_status_quo = simplify_system(epoch_instance, epoch_status_quo, solver_params)
+
+    rows = []
+    for batched in [False, True]:
+        MIP.constraints.USE_BATCHED_CONSTRAINTS = batched
+        simplified_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+        start = time.perf_counter()
+        model = construct_model(simplified_instance, simplified_status_quo, simplified_status_quo, solver_params)
+        model.update()
+        rows.append(["addMConstr" if batched else "addConstr", time.perf_counter() - start, model.NumVars,
+                     model.NumConstrs, model.NumGenConstrs])
+        model.dispose()
+    return rows
+
+
+if __name__ == "__main__":
+    # Configuration for C++ build (options: release, debug, relwithdebinfo)
+    build = "relwithdebinfo"
+
+    # Setup paths for module imports
+    setup_paths()
+
+    import dataclasses
+    from tabulate import tabulate
+    import utils.run_procedure  # Imports the modules in the same order as main.py
+    from input_data import generate_input_data_from_script
+    from problem.instance import get_instance
+
+    instance_params, solver_params = generate_input_data_from_script()
+    if len(sys.argv) > 1:
+        instance_params = dataclasses.replace(instance_params, number_of_trips=int(sys.argv[1]))
+    # Offline epoch, with enough time to always construct the model
+    solver_params = dataclasses.replace(solver_params, instance_parameters=instance_params, epoch_size=60,
+                                        epoch_time_limit=10 ** 6)
+
+    timings = benchmark_model_construction(get_instance(instance_params), solver_params)
+    print(tabulate(timings, headers=["Path", "Build time [s]", "Variables", "Constraints", "General"],
+                   floatfmt=".2f"))
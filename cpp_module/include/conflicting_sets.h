@@ -0,0 +1,82 @@
+#pragma once
+
+#include <queue>
+#include <vector>
+#include "instance.h"
+
+namespace cpp_module {
+
+    // Time window of a trip on one arc of its route
+    struct TimeBound {
+        ArcID arc;
+        TripID vehicle;
+        Position position;
+        Time earliest_departure;
+        Time latest_departure;
+        Time earliest_arrival;
+        Time latest_arrival;
+        Time min_delay_on_arc;
+        Time max_delay_on_arc;
+    };
+
+    // Inputs of the conflicting sets computation (mirror of the python Instance attributes)
+    struct ConflictingSetsInput {
+        std::vector<std::vector<ArcID>> trip_routes;
+        std::vector<Time> travel_times_arcs;
+        std::vector<long> capacities_arcs;
+        VehicleSchedule earliest_departure_times;
+        std::vector<Time> max_staggering_applicable;
+        std::vector<double> list_of_slopes;
+        std::vector<double> list_of_thresholds;
+        double min_set_capacity;
+        bool incremental = true;  // recompute only the bounds whose inputs changed since the last iteration
+    };
+
+    // Outputs: time windows per trip and position, routes and arcs after splitting the conflicting sets
+    struct ConflictingSetsOutput {
+        std::vector<std::vector<ArcID>> trip_routes;
+        std::vector<Time> travel_times_arcs;
+        std::vector<long> capacities_arcs;
+        ConflictingSets conflicting_sets;
+        std::vector<ArcID> conflicting_sets_processing_arc_map;  // original arc of each copy, -1 otherwise
+        VehicleSchedule earliest_departure_times;
+        VehicleSchedule latest_departure_times;
+        VehicleSchedule min_delay_on_arcs;
+        VehicleSchedule max_delay_on_arcs;
+        long iterations = 0;
+        std::vector<long> touched_bounds;  // bounds recomputed at each iteration
+    };
+
+    // Results of one pass of the time-bounds computation, reused by the next pass to skip unchanged bounds
+    struct TimeBoundsSweep {
+        std::vector<std::pair<TripID, Position>> processing_order;
+        VehicleSchedule earliest_departures;
+        VehicleSchedule latest_departures;
+        VehicleSchedule earliest_arrivals;
+        VehicleSchedule latest_arrivals;
+        VehicleSchedule min_delays;
+        VehicleSchedule max_delays;
+        VehicleSchedule final_departure_keys;  // earliest departures used for the conflicts, after propagation
+        long touched_bounds = 0;
+    };
+
+    // Computes the delay on an arc given the number of vehicles on it
+    [[nodiscard]] auto compute_delay_on_arc(const ConflictingSetsInput &input, ArcID arc,
+                                            long vehicles_on_arc) -> double;
+
+    // One pass of the time-bounds computation given the known latest arrival times.
+    // Returns the bounds of each arc sorted by earliest departure and vehicle.
+    // If the previous pass is given, bounds which cannot observe any change since that pass are copied from it:
+    // `changed_latest_arrivals` flags the known latest arrival times which differ from the previous pass.
+    [[nodiscard]] auto get_arc_based_time_bounds(const ConflictingSetsInput &input,
+                                                 const VehicleSchedule &known_latest_arrival_times,
+                                                 const TimeBoundsSweep *previous_sweep,
+                                                 const std::vector<std::vector<bool>> &changed_latest_arrivals,
+                                                 TimeBoundsSweep &sweep)
+    -> std::vector<std::vector<TimeBound>>;
+
+    // Fixed point of the time bounds and split of the conflicting sets: native port of
+    // conflicting_sets.schedule_utilities.add_conflicting_sets_to_instance
+    [[nodiscard]] auto compute_conflicting_sets(const ConflictingSetsInput &input) -> ConflictingSetsOutput;
+
+} // namespace cpp_module
@@ -1,5 +1,9 @@
+#pragma once
+
+#include <algorithm>
 #include <utility>
 #include <vector>
+#include <memory>
 #include <limits>
 #include <stdexcept> // For std::out_of_range
 #include <../lib/json.hpp>
@@ -39,7 +43,25 @@ namespace cpp_module {
     using ConflictingSet = std::vector<TripID>;
     using ConflictingSets = std::vector<ConflictingSet>;
     using TripRoute = std::vector<ArcID>;
-    using ArcPositionMap = std::vector<std::vector<Position>>;
+
+    // Sparse (CSR) index: the trips traversing arc a are stored, sorted by trip id,
+    // in [offsets[a], offsets[a + 1]) of trip_ids, with their position in positions
+    struct ArcPositionIndex {
+        std::vector<long> offsets;
+        std::vector<TripID> trip_ids;
+        std::vector<Position> positions;
+    };
+
+    // Pairs of trips sharing a conflicting set (CSR over the arcs), built once per epoch instance on the Python side:
+    // the pairs of arc a are in [offsets[a], offsets[a + 1]). Empty if the pairs were not provided.
+    struct ConflictPairs {
+        std::vector<long> offsets;
+        std::vector<TripID> first_trips;
+        std::vector<TripID> second_trips;
+        std::vector<Position> first_positions;
+        std::vector<Position> second_positions;
+    };
+
 // Parameters
     const double CONSTR_TOLERANCE = 1e-3;
     const double TOLERANCE = 1e-6;
@@ -50,7 +72,7 @@ namespace cpp_module {
     private:
         // Attributes
         const std::vector<std::vector<TripID>> trip_routes;
-        const ArcPositionMap arc_position_in_routes_map;
+        const ArcPositionIndex arc_position_index;
         const std::vector<Time> travel_times_arcs;
         const std::vector<long> nominal_capacities_arcs;
         std::vector<Time> deadlines;
@@ -65,12 +87,16 @@ namespace cpp_module {
         std::vector<double> list_of_thresholds;
         double max_time_optimization;
         double lb_travel_time;
+        // Shared by the copies of the instance held by the scheduler and the local search
+        std::shared_ptr<const ConflictPairs> conflict_pairs;
 
     public:
         // Constructor
         Instance(
                 const std::vector<std::vector<TripID>> &arg_arc_based_shortest_paths,
-                ArcPositionMap arg_arc_position_in_routes_map,
+                std::vector<long> arg_arc_position_offsets,
+                std::vector<TripID> arg_arc_position_trips,
+                std::vector<Position> arg_arc_position_positions,
                 const std::vector<Time> &arg_nominal_travel_times_arcs,
                 const std::vector<long> &arg_nominal_capacities_arcs,
                 const std::vector<double> &arg_list_of_slopes,
@@ -81,10 +107,13 @@ namespace cpp_module {
                 ConflictingSets arg_conflicting_sets,
                 VehicleSchedule arg_earliest_times,
                 VehicleSchedule arg_latest_times,
-                double arg_lb_travel_time
+                double arg_lb_travel_time,
+                ConflictPairs arg_conflict_pairs = {}
         )
                 : trip_routes(arg_arc_based_shortest_paths),
-                  arc_position_in_routes_map(std::move(arg_arc_position_in_routes_map)),
+                  arc_position_index{std::move(arg_arc_position_offsets),
+                                     std::move(arg_arc_position_trips),
+                                     std::move(arg_arc_position_positions)},
                   travel_times_arcs(arg_nominal_travel_times_arcs),
                   nominal_capacities_arcs(arg_nominal_capacities_arcs),
                   conflicting_sets(std::move(arg_conflicting_sets)),
@@ -98,7 +127,8 @@ namespace cpp_module {
                   number_of_trips(static_cast<long>(arg_arc_based_shortest_paths.size())),
                   number_of_arcs(static_cast<long>(arg_nominal_travel_times_arcs.size())),
                   max_time_optimization(arg_parameters[0]),
-                  lb_travel_time(arg_lb_travel_time) {
+                  lb_travel_time(arg_lb_travel_time),
+                  conflict_pairs(std::make_shared<const ConflictPairs>(std::move(arg_conflict_pairs))) {
 
             add_total_free_flow_time_vehicles();
         }
@@ -106,7 +136,9 @@ namespace cpp_module {
         static Instance from_json(const nlohmann::json &json_obj) {
             return Instance{
                     json_obj["trip_routes"].get<std::vector<std::vector<TripID>>>(),
-                    json_obj["arc_position_in_routes_map"].get<ArcPositionMap>(),
+                    json_obj["arc_position_offsets"].get<std::vector<long>>(),
+                    json_obj["arc_position_trips"].get<std::vector<TripID>>(),
+                    json_obj["arc_position_positions"].get<std::vector<Position>>(),
                     json_obj["travel_time_arcs"].get<std::vector<double>>(),
                     json_obj["nominal_capacities_arcs"].get<std::vector<long>>(),
                     json_obj["list_of_slopes"].get<std::vector<double>>(),
@@ -118,6 +150,13 @@ namespace cpp_module {
                     json_obj["earliest_times"].get<VehicleSchedule>(),
                     json_obj["latest_times"].get<VehicleSchedule>(),
                     json_obj["lb_travel_time"].get<double>(),
+                    ConflictPairs{
+                            json_obj.value("conflict_pair_offsets", std::vector<long>{}),
+                            json_obj.value("conflict_pair_first_trips", std::vector<TripID>{}),
+                            json_obj.value("conflict_pair_second_trips", std::vector<TripID>{}),
+                            json_obj.value("conflict_pair_first_positions", std::vector<Position>{}),
+                            json_obj.value("conflict_pair_second_positions", std::vector<Position>{}),
+                    },
             };
         }
 
@@ -132,9 +171,16 @@ namespace cpp_module {
         }
 
         // Getters
-        // Find the index of an element in a vector
+        // Find the position of the arc in the trip route (-1 if the trip does not traverse the arc)
         [[nodiscard]] Position get_arc_position_in_trip_route(ArcID arc_id, TripID trip_id) const {
-            return arc_position_in_routes_map[arc_id][trip_id];
+            const auto &trip_ids = arc_position_index.trip_ids;
+            const auto first = trip_ids.begin() + arc_position_index.offsets[arc_id];
+            const auto last = trip_ids.begin() + arc_position_index.offsets[arc_id + 1];
+            const auto it = std::lower_bound(first, last, trip_id);
+            if (it == last || *it != trip_id) {
+                return -1;
+            }
+            return arc_position_index.positions[it - trip_ids.begin()];
         }
 
         [[nodiscard]] const std::vector<std::vector<TripID>> &get_trip_routes() const {
@@ -170,6 +216,14 @@ namespace cpp_module {
             return conflicting_sets[arc_id];
         }
 
+        [[nodiscard]] bool has_conflict_pairs() const {
+            return !conflict_pairs->offsets.empty();
+        }
+
+        [[nodiscard]] const ConflictPairs &get_conflict_pairs() const {
+            return *conflict_pairs;
+        }
+
         [[nodiscard]] bool is_conflicting_set_empty(ArcID arc_id) const {
             return conflicting_sets[arc_id].empty();
         }
@@ -1,5 +1,7 @@
 #include "scheduler.h"
 #include "chrono"
+#include <optional>
+#include <atomic>
 
 
 #ifndef CPP_MODULE_LOCAL_SEARCH_H
@@ -11,6 +13,8 @@
 namespace cpp_module {
 
 
+    // A LocalSearch is tied to the instance it is constructed with: the state kept between the runs assumes that
+    // every run is on that instance, so a new LocalSearch is needed for another instance
     class LocalSearch : public TieManager {
 
         // Define a comparison struct
@@ -66,6 +70,15 @@ namespace cpp_module {
         Counters counters;
         bool improvement_found_flag = false;
         bool verbose = true;
+        std::atomic<bool> stop_requested = false; // Set from another thread to end a running search
+
+        // State kept between the runs: the solution whose conflicts were last computed, with the delay flag and the
+        // conflicts of each trip, and the start times of the last run with its result
+        std::optional<Solution> evaluated_solution;
+        std::vector<bool> trip_has_delay;
+        std::vector<std::vector<Conflict>> trip_conflicts;
+        std::vector<Time> last_start_times;
+        std::optional<Solution> last_run_solution;
 
         [[nodiscard]] bool get_improvement_is_found() const {
             return improvement_found_flag;
@@ -145,6 +158,9 @@ namespace cpp_module {
 
         Solution run(std::vector<Time> &arg_start_times);
 
+        // Ends a running search at its next check of the time limit and makes every later run stop immediately
+        void request_stop() { stop_requested = true; }
+
         static void print_initial_delay(const Solution &arg_solution);
 
         static auto print_infeasible_message() -> void;
@@ -153,6 +169,10 @@ namespace cpp_module {
 
         bool check_vehicle_has_delay(const Solution &solution, long trip_id);
 
+        std::vector<bool> get_trips_to_update(const Solution &solution);
+
+        void update_trip_conflicts(const Solution &solution);
+
         ConflictsQueue get_conflicts_queue(const Solution &solution);
 
         TripInfo get_trip_info_struct(long current_trip, const Solution &solution, long position);
@@ -5,6 +5,7 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include "local_search.h"
+#include "conflicting_sets.h"
 
 
 namespace py = pybind11;
@@ -25,10 +26,27 @@ PYBIND11_MODULE(cpp_module, m) {
             .def("get_total_delay", &cpp_module::Solution::get_total_delay)
             .def("get_total_travel_time", &cpp_module::Solution::get_total_travel_time);
 
+    // Conflict pairs bindings
+    py::class_<cpp_module::ConflictPairs>(m, "cpp_conflict_pairs")
+            .def(py::init<>())
+            .def(py::init([](std::vector<long> offsets, std::vector<long> first_trips, std::vector<long> second_trips,
+                             std::vector<long> first_positions, std::vector<long> second_positions) {
+                     return cpp_module::ConflictPairs{std::move(offsets), std::move(first_trips),
+                                                      std::move(second_trips), std::move(first_positions),
+                                                      std::move(second_positions)};
+                 }),
+                 py::arg("offsets"),
+                 py::arg("first_trips"),
+                 py::arg("second_trips"),
+                 py::arg("first_positions"),
+                 py::arg("second_positions"));
+
     // Instance class bindings
     py::class_<cpp_module::Instance>(m, "cpp_instance")
             .def(py::init<const std::vector<std::vector<long>> &,
-                         const cpp_module::ArcPositionMap &,
+                         const std::vector<long> &,
+                         const std::vector<long> &,
+                         const std::vector<long> &,
                          const std::vector<double> &,
                          const std::vector<long> &,
                          const std::vector<double> &,
@@ -39,9 +57,12 @@ PYBIND11_MODULE(cpp_module, m) {
                          const cpp_module::ConflictingSets &,
                          const cpp_module::VehicleSchedule &,
                          const cpp_module::VehicleSchedule &,
-                         const double &>(),
+                         const double &,
+                         cpp_module::ConflictPairs>(),
                  py::arg("set_of_vehicle_paths"),
-                 py::arg("arc_position_in_routes_map"),
+                 py::arg("arc_position_offsets"),
+                 py::arg("arc_position_trips"),
+                 py::arg("arc_position_positions"),
                  py::arg("travel_times_arcs"),
                  py::arg("capacities_arcs"),
                  py::arg("list_of_slopes"),
@@ -52,7 +73,8 @@ PYBIND11_MODULE(cpp_module, m) {
                  py::arg("conflicting_sets"),
                  py::arg("earliest_departures"),
                  py::arg("latest_departures"),
-                 py::arg("lb_travel_time"))
+                 py::arg("lb_travel_time"),
+                 py::arg("conflict_pairs") = cpp_module::ConflictPairs{})
             .def("get_trip_routes", &cpp_module::Instance::get_trip_routes)
             .def("get_travel_times_arcs", &cpp_module::Instance::get_travel_times_arcs)
             .def("get_capacities_arcs", &cpp_module::Instance::get_capacities_arcs)
@@ -73,9 +95,52 @@ PYBIND11_MODULE(cpp_module, m) {
                  py::arg("start_times"));
 
 
-    // Solution class bindings
+    // Conflicting sets bindings
+    py::class_<cpp_module::ConflictingSetsOutput>(m, "cpp_conflicting_sets")
+            .def_readonly("trip_routes", &cpp_module::ConflictingSetsOutput::trip_routes)
+            .def_readonly("travel_times_arcs", &cpp_module::ConflictingSetsOutput::travel_times_arcs)
+            .def_readonly("capacities_arcs", &cpp_module::ConflictingSetsOutput::capacities_arcs)
+            .def_readonly("conflicting_sets", &cpp_module::ConflictingSetsOutput::conflicting_sets)
+            .def_readonly("conflicting_sets_processing_arc_map",
+                          &cpp_module::ConflictingSetsOutput::conflicting_sets_processing_arc_map)
+            .def_readonly("earliest_departure_times", &cpp_module::ConflictingSetsOutput::earliest_departure_times)
+            .def_readonly("latest_departure_times", &cpp_module::ConflictingSetsOutput::latest_departure_times)
+            .def_readonly("min_delay_on_arcs", &cpp_module::ConflictingSetsOutput::min_delay_on_arcs)
+            .def_readonly("max_delay_on_arcs", &cpp_module::ConflictingSetsOutput::max_delay_on_arcs)
+            .def_readonly("iterations", &cpp_module::ConflictingSetsOutput::iterations)
+            .def_readonly("touched_bounds", &cpp_module::ConflictingSetsOutput::touched_bounds);
+
+    m.def("compute_conflicting_sets",
+          [](const std::vector<std::vector<long>> &trip_routes,
+             const std::vector<double> &travel_times_arcs,
+             const std::vector<long> &capacities_arcs,
+             const cpp_module::VehicleSchedule &earliest_departure_times,
+             const std::vector<double> &max_staggering_applicable,
+             const std::vector<double> &list_of_slopes,
+             const std::vector<double> &list_of_thresholds,
+             double min_set_capacity,
+             bool incremental) {
+              py::gil_scoped_release release;
+              return cpp_module::compute_conflicting_sets(
+                      {trip_routes, travel_times_arcs, capacities_arcs, earliest_departure_times,
+                       max_staggering_applicable, list_of_slopes, list_of_thresholds, min_set_capacity,
+                       incremental});
+          },
+          py::arg("trip_routes"),
+          py::arg("travel_times_arcs"),
+          py::arg("capacities_arcs"),
+          py::arg("earliest_departure_times"),
+          py::arg("max_staggering_applicable"),
+          py::arg("list_of_slopes"),
+          py::arg("list_of_thresholds"),
+          py::arg("min_set_capacity"),
+          py::arg("incremental") = true);
+
+    // Local search bindings; run releases the GIL so that it can run on a thread next to the MIP callback
     py::class_<cpp_module::LocalSearch>(m, "LocalSearch")
             .def(py::init<cpp_module::Instance &, bool &>(),
                  py::arg("instance"), py::arg("verbose"))
-            .def("run", &cpp_module::LocalSearch::run);
+            .def("run", &cpp_module::LocalSearch::run, py::arg("start_times"),
+                 py::call_guard<py::gil_scoped_release>())
+            .def("request_stop", &cpp_module::LocalSearch::request_stop);
 }
@@ -0,0 +1,704 @@
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <stdexcept>
+#include <tuple>
+#include "conflicting_sets.h"
+
+// Native port of the python preprocessing in conflicting_sets/time_bounds.py and conflicting_sets/split.py.
+// The order of every floating point operation, the sorting (stable) and the priority queue (same algorithm
+// as python's heapq) follow the python code, so that both implementations return the same values.
+
+namespace cpp_module {
+
+    namespace {
+
+        // Same ordering as TimeBound.__lt__ in python: earliest departure with tolerance, then vehicle
+        auto is_earlier(const TimeBound &first, const TimeBound &second) -> bool {
+            if (std::abs(first.earliest_departure - second.earliest_departure) < TOLERANCE) {
+                return first.vehicle < second.vehicle;
+            }
+            return first.earliest_departure < second.earliest_departure;
+        }
+
+        // Binary heap implementing python's heapq.heappush / heappop
+        class TimeBoundHeap {
+            std::vector<TimeBound> heap;
+
+            void sift_down(size_t start_position, size_t position) {
+                TimeBound new_item = heap[position];
+                while (position > start_position) {
+                    size_t parent_position = (position - 1) >> 1;
+                    if (is_earlier(new_item, heap[parent_position])) {
+                        heap[position] = heap[parent_position];
+                        position = parent_position;
+                        continue;
+                    }
+                    break;
+                }
+                heap[position] = new_item;
+            }
+
+            void sift_up(size_t position) {
+                const size_t end_position = heap.size();
+                const size_t start_position = position;
+                TimeBound new_item = heap[position];
+                size_t child_position = 2 * position + 1;
+                while (child_position < end_position) {
+                    size_t right_position = child_position + 1;
+                    if (right_position < end_position && !is_earlier(heap[child_position], heap[right_position])) {
+                        child_position = right_position;
+                    }
+                    heap[position] = heap[child_position];
+                    position = child_position;
+                    child_position = 2 * position + 1;
+                }
+                heap[position] = new_item;
+                sift_down(start_position, position);
+            }
+
+        public:
+            [[nodiscard]] bool empty() const {
+                return heap.empty();
+            }
+
+            void push(const TimeBound &time_bound) {
+                heap.push_back(time_bound);
+                sift_down(0, heap.size() - 1);
+            }
+
+            auto pop() -> TimeBound {
+                TimeBound last_item = heap.back();
+                heap.pop_back();
+                if (heap.empty()) {
+                    return last_item;
+                }
+                TimeBound first_item = heap.front();
+                heap.front() = last_item;
+                sift_up(0);
+                return first_item;
+            }
+        };
+
+        struct DepartureKey {
+            Time earliest_departure;
+            TripID vehicle;
+            Position position;
+        };
+
+        auto operator<(const DepartureKey &first, const DepartureKey &second) -> bool {
+            if (first.earliest_departure != second.earliest_departure) {
+                return first.earliest_departure < second.earliest_departure;
+            }
+            return first.vehicle < second.vehicle;
+        }
+
+        // Earliest departures on one arc sorted by (earliest departure, vehicle), see ArcDeparturesIndex
+        struct ArcDepartures {
+            std::vector<DepartureKey> keys;
+
+            void delay(TripID vehicle, Position position, Time old_departure, Time new_departure) {
+                auto it = std::lower_bound(keys.begin(), keys.end(), DepartureKey{old_departure, vehicle, position});
+                keys.erase(it);
+                DepartureKey new_key{new_departure, vehicle, position};
+                keys.insert(std::upper_bound(keys.begin(), keys.end(), new_key), new_key);
+            }
+        };
+
+        struct Arrival {
+            Time earliest_arrival;
+            Time latest_arrival;
+            Time latest_departure;
+        };
+
+        // Bounds already computed on one arc, see ArcArrivalsIndex
+        struct ArcArrivals {
+            std::vector<Time> latest_arrivals;
+            std::vector<Arrival> arrivals_by_earliest_arrival;
+
+            void add(const TimeBound &time_bound) {
+                latest_arrivals.insert(
+                        std::upper_bound(latest_arrivals.begin(), latest_arrivals.end(), time_bound.latest_arrival),
+                        time_bound.latest_arrival);
+                Arrival arrival{time_bound.earliest_arrival, time_bound.latest_arrival, time_bound.latest_departure};
+                arrivals_by_earliest_arrival.insert(
+                        std::upper_bound(arrivals_by_earliest_arrival.begin(), arrivals_by_earliest_arrival.end(),
+                                         arrival.earliest_arrival,
+                                         [](Time time, const Arrival &other) {
+                                             return time < other.earliest_arrival;
+                                         }),
+                        arrival);
+            }
+
+            [[nodiscard]] auto count_latest_arrivals_after(Time time) const -> long {
+                return static_cast<long>(latest_arrivals.end() -
+                                         std::upper_bound(latest_arrivals.begin(), latest_arrivals.end(), time));
+            }
+        };
+
+        struct Event {
+            Time time;
+            int change;  // +1 departure, -1 arrival, 0 latest departure
+        };
+
+        auto get_earliest_arrival_time(const ConflictingSetsInput &input, const ArcArrivals &arrivals_on_arc,
+                                       Time current_latest_departure,
+                                       const TimeBound &earliest_departure) -> std::pair<Time, Time> {
+            const ArcID arc = earliest_departure.arc;
+            const double arc_capacity_threshold = std::max(
+                    input.min_set_capacity,
+                    static_cast<double>(input.capacities_arcs[arc]) * input.list_of_thresholds[0]);
+
+            const auto &arrivals = arrivals_on_arc.arrivals_by_earliest_arrival;
+            auto first_arrival = std::upper_bound(
+                    arrivals.begin(), arrivals.end(), current_latest_departure,
+                    [](Time time, const Arrival &other) { return time < other.earliest_arrival; });
+            long min_vehicles_on_arc = 1;
+            for (auto it = first_arrival; it != arrivals.end(); ++it) {
+                if (it->latest_arrival > earliest_departure.earliest_departure - TOLERANCE &&
+                    it->latest_departure + TOLERANCE < earliest_departure.earliest_departure &&
+                    current_latest_departure < it->earliest_arrival - TOLERANCE) {
+                    min_vehicles_on_arc++;
+                }
+            }
+
+            const double min_delay = static_cast<double>(min_vehicles_on_arc) >= arc_capacity_threshold
+                                     ? compute_delay_on_arc(input, arc, min_vehicles_on_arc) : 0.0;
+            const Time earliest_arrival_time =
+                    earliest_departure.earliest_departure + min_delay + input.travel_times_arcs[arc];
+            return {earliest_arrival_time, min_delay};
+        }
+
+        auto get_latest_arrival_time(const ConflictingSetsInput &input, const ArcArrivals &arrivals_on_arc,
+                                     const std::vector<DepartureKey> &conflicting_departures,
+                                     const VehicleSchedule &known_latest_arrival_times,
+                                     const TimeBound &earliest_departure,
+                                     Time latest_departure_time) -> std::pair<Time, Time> {
+            const ArcID arc = earliest_departure.arc;
+            const Time nominal_travel_time = input.travel_times_arcs[arc];
+            double max_delay = 0.0;
+
+            const Time start_conflicts = earliest_departure.earliest_departure - TOLERANCE;
+            const long number_of_conflicting_arrivals = arrivals_on_arc.count_latest_arrivals_after(start_conflicts);
+            Time current_latest_arrival = latest_departure_time + nominal_travel_time;
+
+            if (number_of_conflicting_arrivals == 0 && conflicting_departures.empty()) {
+                return {current_latest_arrival, 0.0};
+            }
+
+            // Arrivals up to the latest departure, departures, and arrivals of the departing vehicles
+            const Time end_arrivals = latest_departure_time - TOLERANCE;
+            const auto &latest_arrivals = arrivals_on_arc.latest_arrivals;
+            auto first_arrival = std::upper_bound(latest_arrivals.begin(), latest_arrivals.end(), start_conflicts);
+            auto last_arrival = std::max(
+                    first_arrival, std::upper_bound(latest_arrivals.begin(), latest_arrivals.end(), end_arrivals));
+
+            std::vector<Event> events;
+            events.reserve((last_arrival - first_arrival) + 2 * conflicting_departures.size() + 1);
+            for (auto it = first_arrival; it != last_arrival; ++it) {
+                events.push_back({*it, -1});
+            }
+            for (const auto &departure: conflicting_departures) {
+                events.push_back({departure.earliest_departure, 1});
+            }
+            const auto start_departing_arrivals = static_cast<long>(events.size());
+            for (const auto &departure: conflicting_departures) {
+                const Time latest_arrival = known_latest_arrival_times[departure.vehicle][departure.position];
+                if (!(latest_arrival > end_arrivals)) {
+                    events.push_back({latest_arrival, -1});
+                }
+            }
+            auto by_time = [](const Event &first, const Event &second) { return first.time < second.time; };
+            std::stable_sort(events.begin() + start_departing_arrivals, events.end(), by_time);
+            std::stable_sort(events.begin(), events.end(), by_time);
+            events.push_back({latest_departure_time, 0});
+
+            long vehicles_on_arc = number_of_conflicting_arrivals + 1;
+            for (const auto &event: events) {
+                const double delay = compute_delay_on_arc(input, arc, vehicles_on_arc);
+                const Time latest_arrival = event.time + delay + nominal_travel_time;
+                if (latest_arrival > current_latest_arrival + TOLERANCE) {
+                    current_latest_arrival = latest_arrival;
+                }
+                if (delay > max_delay + TOLERANCE) {
+                    max_delay = delay;
+                }
+                vehicles_on_arc += event.change;
+            }
+            return {current_latest_arrival, max_delay};
+        }
+
+        // Tracks what changed on each arc since the previous pass of the time-bounds computation.
+        // A bound observes the arrivals on its arc with latest arrival > earliest departure - TOLERANCE, and the
+        // departures of the other vehicles with earliest departure within [earliest departure - TOLERANCE,
+        // latest departure + TOLERANCE].
+        class ChangesSincePreviousSweep {
+            const TimeBoundsSweep *previous_sweep;
+            bool in_sync;
+            // Largest latest arrival (old or new) of the bounds which changed on each arc
+            std::vector<Time> max_changed_latest_arrival;
+            // Running maximum of the ends of departure ranges: the largest end, its vehicle, and the largest end
+            // among the other vehicles. A bound ignores the ranges of its own vehicle, which are not conflicts.
+            struct MaxEnds {
+                Time end;
+                TripID vehicle;
+                Time end_of_other_vehicles;
+            };
+            // Departures whose known latest arrival changed: time ranges of their departure, sorted by start,
+            // with the running maximum of the ends
+            std::vector<std::vector<Time>> changed_departures_starts;
+            std::vector<std::vector<MaxEnds>> changed_departures_max_ends;
+            // Departures delayed by a different min delay: all times after the first of their departures
+            std::vector<Time> min_delayed_departure;
+
+        public:
+            ChangesSincePreviousSweep(const ConflictingSetsInput &input, const TimeBoundsSweep *arg_previous_sweep,
+                                      const std::vector<std::vector<bool>> &changed_latest_arrivals)
+                    : previous_sweep(arg_previous_sweep),
+                      in_sync(arg_previous_sweep != nullptr),
+                      max_changed_latest_arrival(input.travel_times_arcs.size(),
+                                                 -std::numeric_limits<double>::infinity()),
+                      changed_departures_starts(input.travel_times_arcs.size()),
+                      changed_departures_max_ends(input.travel_times_arcs.size()),
+                      min_delayed_departure(input.travel_times_arcs.size(), std::numeric_limits<double>::infinity()) {
+                if (!in_sync) {
+                    return;
+                }
+                std::vector<std::vector<std::tuple<Time, Time, TripID>>> changed_departures(
+                        input.travel_times_arcs.size());
+                for (size_t vehicle = 0; vehicle < changed_latest_arrivals.size(); ++vehicle) {
+                    for (size_t position = 0; position < changed_latest_arrivals[vehicle].size(); ++position) {
+                        if (changed_latest_arrivals[vehicle][position]) {
+                            const ArcID arc = input.trip_routes[vehicle][position];
+                            changed_departures[arc].emplace_back(
+                                    input.earliest_departure_times[vehicle][position],
+                                    previous_sweep->final_departure_keys[vehicle][position],
+                                    static_cast<TripID>(vehicle));
+                        }
+                    }
+                }
+                for (size_t arc = 0; arc < changed_departures.size(); ++arc) {
+                    auto &ranges = changed_departures[arc];
+                    std::sort(ranges.begin(), ranges.end());
+                    MaxEnds max_ends{-std::numeric_limits<double>::infinity(), -1,
+                                     -std::numeric_limits<double>::infinity()};
+                    for (const auto &[start, end, vehicle]: ranges) {
+                        if (vehicle == max_ends.vehicle) {
+                            max_ends.end = std::max(max_ends.end, end);
+                        } else if (end > max_ends.end) {
+                            max_ends = {end, vehicle, max_ends.end};
+                        } else {
+                            max_ends.end_of_other_vehicles = std::max(max_ends.end_of_other_vehicles, end);
+                        }
+                        changed_departures_starts[arc].push_back(start);
+                        changed_departures_max_ends[arc].push_back(max_ends);
+                    }
+                }
+            }
+
+            // True if the previous pass processed the same departure at this step (and at all previous steps)
+            auto is_same_step(size_t step, TripID vehicle, Position position) -> bool {
+                if (in_sync) {
+                    const auto &order = previous_sweep->processing_order;
+                    in_sync = step < order.size() && order[step] == std::make_pair(vehicle, position);
+                }
+                return in_sync;
+            }
+
+            [[nodiscard]] auto is_unchanged(ArcID arc, TripID vehicle, Position position, Time earliest_departure,
+                                            Time latest_departure) const -> bool {
+                if (previous_sweep->earliest_departures[vehicle][position] != earliest_departure ||
+                    previous_sweep->latest_departures[vehicle][position] != latest_departure) {
+                    return false;
+                }
+                const Time window_start = earliest_departure - TOLERANCE;
+                const Time window_end = latest_departure + TOLERANCE;
+                if (max_changed_latest_arrival[arc] > window_start || !(min_delayed_departure[arc] > window_end)) {
+                    return false;
+                }
+                const auto &starts = changed_departures_starts[arc];
+                const auto last_range = std::upper_bound(starts.begin(), starts.end(), window_end) - starts.begin();
+                if (last_range == 0) {
+                    return true;
+                }
+                const MaxEnds &max_ends = changed_departures_max_ends[arc][last_range - 1];
+                return (max_ends.vehicle == vehicle ? max_ends.end_of_other_vehicles : max_ends.end) < window_start;
+            }
+
+            // Record the changes visible from the bounds processed later in the pass
+            void record(const ConflictingSetsInput &input, const TimeBound &time_bound, bool same_step) {
+                if (!same_step) {
+                    return;  // all the following bounds are recomputed
+                }
+                const TripID vehicle = time_bound.vehicle;
+                const Position position = time_bound.position;
+                const Time previous_latest_arrival = previous_sweep->latest_arrivals[vehicle][position];
+                if (previous_sweep->earliest_arrivals[vehicle][position] != time_bound.earliest_arrival ||
+                    previous_latest_arrival != time_bound.latest_arrival ||
+                    previous_sweep->latest_departures[vehicle][position] != time_bound.latest_departure) {
+                    max_changed_latest_arrival[time_bound.arc] = std::max(
+                            {max_changed_latest_arrival[time_bound.arc], previous_latest_arrival,
+                             time_bound.latest_arrival});
+                }
+                if (previous_sweep->min_delays[vehicle][position] != time_bound.min_delay_on_arc) {
+                    // The departures on the next arcs move, but never before their initial earliest departure
+                    const auto &route = input.trip_routes[vehicle];
+                    for (size_t next_position = position + 1; next_position < route.size(); ++next_position) {
+                        auto &first_departure = min_delayed_departure[route[next_position]];
+                        first_departure = std::min(first_departure,
+                                                   input.earliest_departure_times[vehicle][next_position]);
+                    }
+                }
+            }
+        };
+
+        auto get_rounded_departure(const TimeBound &time_bound) -> double {
+            return std::nearbyint(time_bound.earliest_departure / TOLERANCE);
+        }
+
+        // Groups the bounds of each arc in sets of overlapping time windows
+        auto split_time_bounds_on_arcs(const std::vector<std::vector<TimeBound>> &time_bounds_on_arcs)
+        -> std::vector<std::vector<std::vector<TripID>>> {
+            std::vector<std::vector<std::vector<TripID>>> bounds_on_arcs_split(time_bounds_on_arcs.size());
+            for (size_t arc = 1; arc < time_bounds_on_arcs.size(); ++arc) {
+                auto time_bounds = time_bounds_on_arcs[arc];
+                std::stable_sort(time_bounds.begin(), time_bounds.end(), [](const auto &first, const auto &second) {
+                    return first.earliest_departure < second.earliest_departure;
+                });
+                double max_latest_arrival = -std::numeric_limits<double>::infinity();
+                std::vector<TripID> bounds_split;
+                for (const auto &time_bound: time_bounds) {
+                    if (time_bound.earliest_departure > max_latest_arrival + TOLERANCE) {
+                        if (!bounds_split.empty()) {
+                            bounds_on_arcs_split[arc].push_back(bounds_split);
+                        }
+                        bounds_split.clear();
+                    }
+                    bounds_split.push_back(time_bound.vehicle);
+                    max_latest_arrival = std::max(max_latest_arrival, time_bound.latest_arrival);
+                }
+                if (!bounds_split.empty()) {
+                    bounds_on_arcs_split[arc].push_back(bounds_split);
+                }
+            }
+            return bounds_on_arcs_split;
+        }
+
+        auto arrange_bounds_by_vehicle(const std::vector<std::vector<TimeBound>> &arc_based_time_bounds,
+                                       size_t number_of_trips) -> std::vector<std::vector<TimeBound>> {
+            std::vector<std::vector<TimeBound>> vehicle_based_time_bounds(number_of_trips);
+            for (const auto &arc_time_bounds: arc_based_time_bounds) {
+                for (const auto &time_bound: arc_time_bounds) {
+                    vehicle_based_time_bounds[time_bound.vehicle].push_back(time_bound);
+                }
+            }
+            for (auto &vehicle_bounds: vehicle_based_time_bounds) {
+                std::stable_sort(vehicle_bounds.begin(), vehicle_bounds.end(),
+                                 [](const auto &first, const auto &second) {
+                                     return first.earliest_departure < second.earliest_departure;
+                                 });
+            }
+            return vehicle_based_time_bounds;
+        }
+
+        // Creates an arc copy for each conflicting set after the first one and reroutes its vehicles
+        auto split_conflicting_sets(ConflictingSetsOutput &output, const ConflictingSetsInput &input,
+                                    const std::vector<std::vector<std::vector<TripID>>> &undivided_conflicting_sets) {
+            const size_t number_of_arcs = input.travel_times_arcs.size();
+            output.travel_times_arcs = input.travel_times_arcs;
+            output.capacities_arcs = input.capacities_arcs;
+            output.conflicting_sets = ConflictingSets(number_of_arcs);
+            output.conflicting_sets_processing_arc_map = std::vector<ArcID>(number_of_arcs, -1);
+
+            for (size_t arc = 0; arc < undivided_conflicting_sets.size(); ++arc) {
+                for (size_t set_id = 0; set_id < undivided_conflicting_sets[arc].size(); ++set_id) {
+                    const auto &conflicting_set = undivided_conflicting_sets[arc][set_id];
+                    if (set_id == 0) {
+                        output.conflicting_sets[arc] = conflicting_set;
+                        continue;
+                    }
+                    output.travel_times_arcs.push_back(input.travel_times_arcs[arc]);
+                    output.capacities_arcs.push_back(input.capacities_arcs[arc]);
+                    output.conflicting_sets.push_back(conflicting_set);
+                    output.conflicting_sets_processing_arc_map.push_back(static_cast<ArcID>(arc));
+                    const auto last_arc_created = static_cast<ArcID>(output.travel_times_arcs.size() - 1);
+                    for (auto vehicle: conflicting_set) {
+                        auto &route = output.trip_routes[vehicle];
+                        auto old_arc = std::find(route.begin(), route.end(), static_cast<ArcID>(arc));
+                        if (old_arc == route.end()) {
+                            throw std::invalid_argument("Vehicle of a conflicting set does not traverse its arc");
+                        }
+                        *old_arc = last_arc_created;
+                    }
+                }
+            }
+        }
+
+    } // namespace
+
+
+    auto compute_delay_on_arc(const ConflictingSetsInput &input, ArcID arc, long vehicles_on_arc) -> double {
+        if (arc == 0) {
+            return 0.0;
+        }
+        const auto capacity = static_cast<double>(input.capacities_arcs[arc]);
+        double delay = 0.0;
+        double height_prev_piece = 0.0;
+        for (size_t i = 0; i < input.list_of_thresholds.size(); ++i) {
+            const double th_capacity = input.list_of_thresholds[i] * capacity;
+            const double slope = input.travel_times_arcs[arc] * input.list_of_slopes[i] / capacity;
+            if (static_cast<double>(vehicles_on_arc) > th_capacity) {
+                delay = std::max(delay, height_prev_piece + slope * (static_cast<double>(vehicles_on_arc) -
+                                                                     th_capacity));
+            }
+            if (i < input.list_of_slopes.size() - 1) {
+                const double next_th_cap = input.list_of_thresholds[i + 1] * capacity;
+                height_prev_piece += slope * (next_th_cap - th_capacity);
+            }
+        }
+        return delay;
+    }
+
+
+    auto get_arc_based_time_bounds(const ConflictingSetsInput &input,
+                                   const VehicleSchedule &known_latest_arrival_times,
+                                   const TimeBoundsSweep *previous_sweep,
+                                   const std::vector<std::vector<bool>> &changed_latest_arrivals,
+                                   TimeBoundsSweep &sweep)
+    -> std::vector<std::vector<TimeBound>> {
+        const size_t number_of_arcs = input.travel_times_arcs.size();
+        const size_t number_of_trips = input.trip_routes.size();
+        std::vector<std::vector<TimeBound>> arc_based_time_bounds(number_of_arcs);
+        std::vector<ArcArrivals> arc_based_arrivals(number_of_arcs);
+        std::vector<ArcDepartures> arc_based_departures(number_of_arcs);
+        // Earliest departures used to find the conflicts, delayed by the min delay of the previous arcs
+        VehicleSchedule earliest_departures(input.earliest_departure_times);
+        VehicleSchedule computed_latest_arrivals(number_of_trips);
+        TimeBoundHeap earliest_departures_queue;
+
+        sweep = TimeBoundsSweep{};
+        sweep.earliest_departures.resize(number_of_trips);
+        sweep.latest_departures.resize(number_of_trips);
+        sweep.earliest_arrivals.resize(number_of_trips);
+        sweep.latest_arrivals.resize(number_of_trips);
+        sweep.min_delays.resize(number_of_trips);
+        sweep.max_delays.resize(number_of_trips);
+
+        for (size_t vehicle = 0; vehicle < number_of_trips; ++vehicle) {
+            const auto &route = input.trip_routes[vehicle];
+            computed_latest_arrivals[vehicle].resize(route.size());
+            for (auto *times: {&sweep.earliest_departures[vehicle], &sweep.latest_departures[vehicle],
+                               &sweep.earliest_arrivals[vehicle], &sweep.latest_arrivals[vehicle],
+                               &sweep.min_delays[vehicle], &sweep.max_delays[vehicle]}) {
+                times->resize(route.size());
+            }
+            for (size_t position = 0; position < route.size(); ++position) {
+                const ArcID arc = route[position];
+                arc_based_departures[arc].keys.push_back(
+                        {earliest_departures[vehicle][position], static_cast<TripID>(vehicle),
+                         static_cast<Position>(position)});
+                if (position == 0) {
+                    const Time earliest_departure = earliest_departures[vehicle][position];
+                    earliest_departures_queue.push(
+                            {arc, static_cast<TripID>(vehicle), 0, earliest_departure,
+                             earliest_departure + input.max_staggering_applicable[vehicle],
+                             earliest_departure + input.travel_times_arcs[arc],
+                             known_latest_arrival_times[vehicle][position], 0.0, 0.0});
+                }
+            }
+        }
+        for (auto &departures: arc_based_departures) {
+            std::sort(departures.keys.begin(), departures.keys.end());
+        }
+
+        // Changes since the previous pass, by arc. A bound is copied from the previous pass only if it is
+        // processed at the same step, with the same departure window, and none of the changes is visible from it.
+        ChangesSincePreviousSweep changes(input, previous_sweep, changed_latest_arrivals);
+
+        std::vector<DepartureKey> conflicting_departures;
+        while (!earliest_departures_queue.empty()) {
+            const TimeBound earliest_departure = earliest_departures_queue.pop();
+            const ArcID arc = earliest_departure.arc;
+            const TripID vehicle = earliest_departure.vehicle;
+            const Position position = earliest_departure.position;
+            const auto &route = input.trip_routes[vehicle];
+
+            const Time latest_departure = position == 0
+                                          ? earliest_departure.earliest_departure +
+                                            input.max_staggering_applicable[vehicle]
+                                          : computed_latest_arrivals[vehicle][position - 1];
+
+            const bool same_step = changes.is_same_step(sweep.processing_order.size(), vehicle, position);
+            sweep.processing_order.emplace_back(vehicle, position);
+            auto &arrivals_on_arc = arc_based_arrivals[arc];
+
+            Time earliest_arrival, min_delay_on_arc, latest_arrival, max_delay_on_arc;
+            if (same_step && changes.is_unchanged(arc, vehicle, position, earliest_departure.earliest_departure,
+                                                  latest_departure)) {
+                earliest_arrival = previous_sweep->earliest_arrivals[vehicle][position];
+                min_delay_on_arc = previous_sweep->min_delays[vehicle][position];
+                latest_arrival = previous_sweep->latest_arrivals[vehicle][position];
+                max_delay_on_arc = previous_sweep->max_delays[vehicle][position];
+            } else {
+                sweep.touched_bounds++;
+
+                // Conflicting departures: other vehicles departing within [earliest, latest departure]
+                const auto &departure_keys = arc_based_departures[arc].keys;
+                auto first_departure = std::lower_bound(
+                        departure_keys.begin(), departure_keys.end(),
+                        earliest_departure.earliest_departure - TOLERANCE,
+                        [](const DepartureKey &key, Time time) { return key.earliest_departure < time; });
+                auto last_departure = std::upper_bound(
+                        departure_keys.begin(), departure_keys.end(), latest_departure + TOLERANCE,
+                        [](Time time, const DepartureKey &key) { return time < key.earliest_departure; });
+                conflicting_departures.clear();
+                for (auto it = first_departure; it < last_departure; ++it) {
+                    if (it->vehicle != vehicle) {
+                        conflicting_departures.push_back(*it);
+                    }
+                }
+
+                std::tie(earliest_arrival, min_delay_on_arc) = get_earliest_arrival_time(
+                        input, arrivals_on_arc, latest_departure, earliest_departure);
+                std::tie(latest_arrival, max_delay_on_arc) = get_latest_arrival_time(
+                        input, arrivals_on_arc, conflicting_departures, known_latest_arrival_times,
+                        earliest_departure, latest_departure);
+            }
+
+            // Propagate the min delay to the departures on the next arcs
+            if (min_delay_on_arc >= TOLERANCE && arc != 0) {
+                for (size_t next_position = position + 1; next_position < route.size(); ++next_position) {
+                    const Time old_departure = earliest_departures[vehicle][next_position];
+                    const Time new_departure = old_departure + min_delay_on_arc;
+                    arc_based_departures[route[next_position]].delay(vehicle, static_cast<Position>(next_position),
+                                                                     old_departure, new_departure);
+                    earliest_departures[vehicle][next_position] = new_departure;
+                }
+            }
+
+            const TimeBound time_bound{arc, vehicle, position, earliest_departure.earliest_departure,
+                                       latest_departure, earliest_arrival, latest_arrival,
+                                       min_delay_on_arc, max_delay_on_arc};
+            changes.record(input, time_bound, same_step);
+            arc_based_time_bounds[arc].push_back(time_bound);
+            arrivals_on_arc.add(time_bound);
+            computed_latest_arrivals[vehicle][position] = latest_arrival;
+            sweep.earliest_departures[vehicle][position] = time_bound.earliest_departure;
+            sweep.latest_departures[vehicle][position] = latest_departure;
+            sweep.earliest_arrivals[vehicle][position] = earliest_arrival;
+            sweep.latest_arrivals[vehicle][position] = latest_arrival;
+            sweep.min_delays[vehicle][position] = min_delay_on_arc;
+            sweep.max_delays[vehicle][position] = max_delay_on_arc;
+
+            // Schedule the next departure if the vehicle continues traveling
+            if (route[position] != 0) {
+                const ArcID next_arc = route[position + 1];
+                earliest_departures_queue.push(
+                        {next_arc, vehicle, position + 1, earliest_arrival, latest_arrival,
+                         earliest_arrival + input.travel_times_arcs[next_arc],
+                         known_latest_arrival_times[vehicle][position + 1], 0.0, 0.0});
+            }
+        }
+        sweep.final_departure_keys = std::move(earliest_departures);
+
+        // Sort time bounds on each arc by earliest departure time and vehicle ID
+        for (auto &time_bounds_on_arc: arc_based_time_bounds) {
+            std::stable_sort(time_bounds_on_arc.begin(), time_bounds_on_arc.end(),
+                             [](const auto &first, const auto &second) {
+                                 const double first_key = get_rounded_departure(first);
+                                 const double second_key = get_rounded_departure(second);
+                                 if (first_key != second_key) {
+                                     return first_key < second_key;
+                                 }
+                                 return first.vehicle < second.vehicle;
+                             });
+        }
+        return arc_based_time_bounds;
+    }
+
+
+    auto compute_conflicting_sets(const ConflictingSetsInput &input) -> ConflictingSetsOutput {
+        const size_t number_of_trips = input.trip_routes.size();
+        ConflictingSetsOutput output;
+
+        // Initial latest arrivals: free flow arrivals
+        VehicleSchedule known_latest_arrival_times(number_of_trips);
+        for (size_t trip = 0; trip < number_of_trips; ++trip) {
+            const auto &route = input.trip_routes[trip];
+            for (size_t position = 0; position < route.size(); ++position) {
+                known_latest_arrival_times[trip].push_back(
+                        input.earliest_departure_times[trip][position] + input.travel_times_arcs[route[position]]);
+            }
+        }
+
+        // Iteratively refine time bounds until convergence
+        std::vector<std::vector<TimeBound>> arc_based_time_bounds;
+        std::vector<std::vector<TimeBound>> vehicle_based_time_bounds;
+        TimeBoundsSweep previous_sweep, sweep;
+        std::vector<std::vector<bool>> changed_latest_arrivals(number_of_trips);
+        while (true) {
+            output.iterations++;
+            const bool reuse_previous_sweep = input.incremental && output.iterations > 1;
+            arc_based_time_bounds = get_arc_based_time_bounds(
+                    input, known_latest_arrival_times, reuse_previous_sweep ? &previous_sweep : nullptr,
+                    changed_latest_arrivals, sweep);
+            output.touched_bounds.push_back(sweep.touched_bounds);
+            vehicle_based_time_bounds = arrange_bounds_by_vehicle(arc_based_time_bounds, number_of_trips);
+
+            VehicleSchedule new_latest_arrival_times(number_of_trips);
+            for (size_t trip = 0; trip < number_of_trips; ++trip) {
+                for (const auto &time_bound: vehicle_based_time_bounds[trip]) {
+                    new_latest_arrival_times[trip].push_back(time_bound.latest_arrival);
+                }
+            }
+            if (new_latest_arrival_times == known_latest_arrival_times) {
+                break;
+            }
+            for (size_t trip = 0; trip < number_of_trips; ++trip) {
+                const auto &new_times = new_latest_arrival_times[trip];
+                const auto &known_times = known_latest_arrival_times[trip];
+                changed_latest_arrivals[trip].assign(new_times.size(), false);
+                for (size_t position = 0; position < new_times.size(); ++position) {
+                    changed_latest_arrivals[trip][position] = new_times[position] != known_times[position];
+                }
+            }
+            known_latest_arrival_times = std::move(new_latest_arrival_times);
+            std::swap(previous_sweep, sweep);
+        }
+
+        // Time windows of each trip
+        output.earliest_departure_times.resize(number_of_trips);
+        output.latest_departure_times.resize(number_of_trips);
+        output.min_delay_on_arcs.resize(number_of_trips);
+        output.max_delay_on_arcs.resize(number_of_trips);
+        for (size_t trip = 0; trip < number_of_trips; ++trip) {
+            for (const auto &bound: vehicle_based_time_bounds[trip]) {
+                output.earliest_departure_times[trip].push_back(bound.earliest_departure);
+                output.latest_departure_times[trip].push_back(
+                        bound.latest_departure > bound.earliest_departure
+                        ? bound.latest_departure
+                        : bound.earliest_departure + CONSTR_TOLERANCE);
+                output.min_delay_on_arcs[trip].push_back(bound.min_delay_on_arc);
+                output.max_delay_on_arcs[trip].push_back(bound.max_delay_on_arc);
+            }
+        }
+
+        // Undivided conflicting sets: sets with fewer vehicles than the capacity are left empty
+        auto undivided_conflicting_sets = split_time_bounds_on_arcs(arc_based_time_bounds);
+        for (size_t arc = 1; arc < undivided_conflicting_sets.size(); ++arc) {
+            const double min_set_size = std::max(
+                    input.min_set_capacity,
+                    static_cast<double>(input.capacities_arcs[arc]) * input.list_of_thresholds[0]);
+            for (auto &conflicting_set: undivided_conflicting_sets[arc]) {
+                if (!(static_cast<double>(conflicting_set.size()) > min_set_size)) {
+                    conflicting_set.clear();
+                }
+            }
+        }
+
+        output.trip_routes = input.trip_routes;
+        split_conflicting_sets(output, input, undivided_conflicting_sets);
+        return output;
+    }
+
+} // namespace cpp_module
@@ -10,6 +10,9 @@ namespace cpp_module {
 
 
     auto LocalSearch::check_if_time_limit_is_reached() -> bool {
+        if (stop_requested) {
+            return true;
+        }
         auto time_now = get_current_time_in_seconds();
         auto duration = (time_now - start_algo_global_clock);
         if (duration > instance.get_max_time_optimization()) {
@@ -124,17 +127,45 @@ namespace cpp_module {
         return conflicts_list;
     }
 
-    auto LocalSearch::get_conflicts_queue(const Solution &solution) -> ConflictsQueue {
-        ConflictsQueue conflicts_queue;
-        size_t total_size = instance.get_number_of_trips() * instance.get_number_of_arcs();
-        conflicts_queue.reserve(total_size); // Preallocate memory for the expected number of elements
+    auto LocalSearch::get_trips_to_update(const Solution &solution) -> std::vector<bool> {
+        // Trips whose schedule changed since the evaluated solution, and the trips sharing a conflicting set with them
+        const auto number_of_trips = instance.get_number_of_trips();
+        if (!evaluated_solution.has_value()) {
+            return std::vector<bool>(number_of_trips, true);
+        }
 
-        for (auto trip_id = 0; trip_id < instance.get_number_of_trips(); ++trip_id) {
-            if (!check_vehicle_has_delay(solution, trip_id)) {
+        std::vector<bool> trips_to_update(number_of_trips, false);
+        for (TripID trip_id = 0; trip_id < number_of_trips; ++trip_id) {
+            if (solution.get_trip_schedule(trip_id) == evaluated_solution->get_trip_schedule(trip_id)) {
+                continue;
+            }
+            trips_to_update[trip_id] = true;
+            for (size_t position = 0; position + 1 < instance.get_trip_route_size(trip_id); ++position) {
+                long arc = instance.get_arc_at_position_in_trip_route(trip_id, position);
+                for (auto other_trip: instance.get_conflicting_set(arc)) {
+                    trips_to_update[other_trip] = true;
+                }
+            }
+        }
+        return trips_to_update;
+    }
+
+    auto LocalSearch::update_trip_conflicts(const Solution &solution) -> void {
+        auto trips_to_update = get_trips_to_update(solution);
+        trip_has_delay.resize(instance.get_number_of_trips());
+        trip_conflicts.resize(instance.get_number_of_trips());
+
+        for (TripID trip_id = 0; trip_id < instance.get_number_of_trips(); ++trip_id) {
+            if (!trips_to_update[trip_id]) {
+                continue; // Conflicts still valid
+            }
+            trip_conflicts[trip_id].clear();
+            trip_has_delay[trip_id] = check_vehicle_has_delay(solution, trip_id);
+            if (!trip_has_delay[trip_id]) {
                 continue; // Skip vehicles without delay
             }
 
-            for (auto position = 0; position < instance.get_trip_route_size(trip_id) - 1; ++position) {
+            for (size_t position = 0; position + 1 < instance.get_trip_route_size(trip_id); ++position) {
                 long arc = instance.get_arc_at_position_in_trip_route(trip_id, position);
 
                 double arc_delay = solution.get_trip_arc_departure(trip_id, position + 1) -
@@ -149,12 +180,30 @@ namespace cpp_module {
                 auto conflicting_set = instance.get_conflicting_set(arc);
 
                 auto arc_conflicts = find_conflicts_on_arc(arc, arc_delay, solution, trip_info, conflicting_set);
-                for (auto &arc_conflict: arc_conflicts) {
-                    if (conflicts_queue.size() >= MAX_PQ_SIZE) {
-                        return conflicts_queue;
-                    }
-                    conflicts_queue.push(arc_conflict);
+                trip_conflicts[trip_id].insert(trip_conflicts[trip_id].end(), arc_conflicts.begin(),
+                                               arc_conflicts.end());
+            }
+        }
+        evaluated_solution = solution;
+    }
+
+    auto LocalSearch::get_conflicts_queue(const Solution &solution) -> ConflictsQueue {
+        // The conflicts are only recomputed for the trips affected by the changes since the previous call
+        update_trip_conflicts(solution);
+
+        ConflictsQueue conflicts_queue;
+        size_t total_size = instance.get_number_of_trips() * instance.get_number_of_arcs();
+        conflicts_queue.reserve(total_size); // Preallocate memory for the expected number of elements
+
+        for (TripID trip_id = 0; trip_id < instance.get_number_of_trips(); ++trip_id) {
+            if (!trip_has_delay[trip_id]) {
+                continue; // Skip vehicles without delay
+            }
+            for (const auto &conflict: trip_conflicts[trip_id]) {
+                if (conflicts_queue.size() >= MAX_PQ_SIZE) {
+                    return conflicts_queue;
                 }
+                conflicts_queue.push(conflict);
             }
         }
 
@@ -188,6 +237,11 @@ namespace cpp_module {
 
 
     auto LocalSearch::run(std::vector<Time> &arg_start_times) -> Solution {
+        // The start times of the last run give its result again
+        if (last_run_solution.has_value() && arg_start_times == last_start_times) {
+            return *last_run_solution;
+        }
+
         // Get the initial solution and print its delay
         auto start_run_clock = get_current_time_in_seconds();
         reset_counters();
@@ -231,8 +285,13 @@ namespace cpp_module {
             print_search_statistics(start_run_clock);
         }
 
-        // Construct the final solution and return it
-        return scheduler.construct_solution(best_found_solution.get_start_times());
+        // Construct the final solution and return it; a stopped search is not reused for the same start times
+        auto final_solution = scheduler.construct_solution(best_found_solution.get_start_times());
+        if (!stop_requested) {
+            last_start_times = arg_start_times;
+            last_run_solution = final_solution;
+        }
+        return final_solution;
     }
 
 
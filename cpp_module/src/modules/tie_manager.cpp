@@ -48,6 +48,18 @@ namespace cpp_module {
 
 // Check if there are any ties on a given arc
     auto TieManager::check_arc_ties(ArcID arc_id, Solution &complete_solution) -> bool {
+        if (instance.has_conflict_pairs()) {
+            const auto &conflict_pairs = instance.get_conflict_pairs();
+            for (long pair = conflict_pairs.offsets[arc_id]; pair < conflict_pairs.offsets[arc_id + 1]; ++pair) {
+                Tie tie = {conflict_pairs.first_trips[pair], conflict_pairs.second_trips[pair],
+                           conflict_pairs.first_positions[pair], conflict_pairs.second_positions[pair], arc_id};
+                if (check_tie(complete_solution, tie)) {
+                    return true;
+                }
+            }
+            return false;
+        }
+
         for (auto vehicle_one: instance.get_conflicting_set(arc_id)) {
             long position_one = instance.get_arc_position_in_trip_route(arc_id, vehicle_one);
 
@@ -260,7 +260,8 @@ def main(preset_name: str, comment: str, add_shortcuts: bool):
                 "improve_warm_start": improve_warm_start,
                 "local_search_callback": improve_warm_start,  # on purpose, same as improve warm start
                 "simplify": simplify,
-                "verbose_model": verbose_model
+                "verbose_model": verbose_model,
+                "gurobi_threads": cpu_per_run
             }
 
             # Generate the solver parameters filename
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-import itertools
-from typing import Optional, Iterator
-from input_data import TOLERANCE, CONSTR_TOLERANCE
+import atexit
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Optional
+from input_data import TOLERANCE, CONSTR_TOLERANCE, NAME_MODEL_VARIABLES
 import numpy as np
+import scipy.sparse
 from problem.instance import Instance
+from conflicting_sets.conflict_pairs import ConflictPairs
 from input_data import SolverParameters
 import datetime
 
@@ -12,12 +16,54 @@ import gurobipy as grb
 from utils.tools import SuppressOutput
 from utils.aliases import *
 
+_gurobi_env: Optional[grb.Env] = None
+
+
+def get_gurobi_env() -> grb.Env:
+    """
+    Gurobi environment shared by the models of all the epochs of the process, started (and licensed) once. It is
+    disposed at the exit of the process at the latest.
+    """
+    global _gurobi_env
+    if _gurobi_env is None:
+        with SuppressOutput():
+            _gurobi_env = grb.Env()
+        atexit.register(dispose_gurobi_env)
+    return _gurobi_env
+
+
+def dispose_gurobi_env() -> None:
+    """Releases the shared Gurobi environment and its license; the models using it must be disposed first."""
+    global _gurobi_env
+    if _gurobi_env is not None:
+        _gurobi_env.dispose()
+        _gurobi_env = None
+        atexit.unregister(dispose_gurobi_env)
+
+
+@dataclass
+class BigMRows:
+    """
+    Big-M constraints first departure - second departure + coefficient * binary <= rhs of the conflict pairs, as
+    (number of rows, 3) columns (-1 for constants) and coefficients; the terms on constants are in the rhs.
+    """
+    columns: np.ndarray
+    coefficients: np.ndarray
+    rhs: np.ndarray
+    pairs: np.ndarray  # conflict pair of each row
+
+    def select(self, rows: np.ndarray) -> BigMRows:
+        return BigMRows(self.columns[rows], self.coefficients[rows], self.rhs[rows], self.pairs[rows])
+
+    def get_lhs(self, values: np.ndarray) -> np.ndarray:
+        """Left-hand sides of the rows with the given values of the variables."""
+        return (self.coefficients * np.append(values, 0.0)[self.columns]).sum(axis=1)
+
 
 class StaggeredRoutingModel(grb.Model):
 
     def __init__(self, initial_total_delay, solver_params: SolverParameters):
-        with SuppressOutput():
-            super().__init__("staggered_routing")
+        super().__init__("staggered_routing", env=get_gurobi_env())
         # Optimization Metrics
         self._optimize_flag = True
         self._optimality_gaps_list = [100.0]
@@ -28,10 +74,21 @@ class StaggeredRoutingModel(grb.Model):
         self._best_lower_bound = 0
         self._best_upper_bound = float("inf")
         self._improvement_clock = datetime.datetime.now().timestamp()
+        self._bounds_record_clock = 0.0
         self._remaining_time_for_optimization = None
         # Info on constraints
         self._num_big_m_constraints = 0
-        # Variables
+        self._big_m_coefficients = []
+        self._lazy_big_m_rows: Optional[BigMRows] = None
+        self._is_lazy_row_added = np.zeros(0, dtype=bool)
+        # Variables (bounds indexed by the index of the variable in the model)
+        self._variables = []
+        self._variables_lb = np.zeros(0, dtype=np.float64)
+        self._variables_ub = np.zeros(0, dtype=np.float64)
+        self._conflict_vars_bounds = {}
+        # Columns of the variables (-1 for constants) and constant values, by variable type
+        self._continuous_vars_columns = {}
+        self._conflict_vars_columns = {}
         self._alpha = {}
         self._beta = {}
         self._gamma = {}
@@ -43,6 +100,7 @@ class StaggeredRoutingModel(grb.Model):
         # Callback
         self._cb_total_delay = None
         self._cb_start_times = []
+        self._local_search_future: Optional[Future] = None
 
     def get_cb_start_times(self):
         return self._cb_start_times
@@ -50,105 +108,86 @@ class StaggeredRoutingModel(grb.Model):
     def set_cb_start_times(self, start_times: list[float]):
         self._cb_start_times = start_times
 
-    def get_continuous_var_cb(self, vehicle, arc, var_type) -> float:
-        # Mapping for variable types
-        continuous_var = {
-            "departure": self._departure,
-            "delay": self._delay,
-            "load": self._load,
-        }
-        if self.is_gurobi_var(continuous_var[var_type][vehicle][arc]):
-            return self.cbGetSolution(continuous_var[var_type][vehicle][arc])
-        else:
-            return continuous_var[var_type][vehicle][arc]
-
-    def set_continuous_var(self, vehicle, arc, var_type, value_to_set, mode) -> None:
-        # Mapping for variable types
-        continuous_var = {
-            "departure": self._departure,
-            "delay": self._delay,
-            "load": self._load,
-        }
+    def get_local_search_future(self) -> Optional[Future]:
+        return self._local_search_future
 
-        if mode not in ["start", "cb"]:
-            raise ValueError("Mode must be either 'start' or 'cb'")
+    def set_local_search_future(self, future: Optional[Future]):
+        self._local_search_future = future
 
-        if self.is_gurobi_var(continuous_var[var_type][vehicle][arc]):
-            if mode == "cb":
-                self.cbSetSolution(continuous_var[var_type][vehicle][arc], value_to_set)
-            else:
-                continuous_var[var_type][vehicle][arc].Start = value_to_set
-
-    def set_conflicting_var(self, first_trip, second_trip, arc, var_type, value_to_set, mode) -> None:
-        # Mapping for variable types
-        conflict_var = {
-            "alpha": self._alpha,
-            "beta": self._beta,
-            "gamma": self._gamma,
-        }
-        if mode not in ["start", "cb"]:
-            raise ValueError("Mode must be either 'start' or 'cb'")
+    def get_solution_cb(self) -> np.ndarray:
+        """Values of all the variables of the MIPSOL incumbent, fetched in one call and indexed by column."""
+        return np.asarray(self.cbGetSolution(self._variables), dtype=np.float64)
 
-        if self.is_gurobi_var(conflict_var[var_type][arc][first_trip][second_trip]):
-            if mode == "cb":
-                self.cbSetSolution(conflict_var[var_type][arc][first_trip][second_trip], value_to_set)
-            else:
-                conflict_var[var_type][arc][first_trip][second_trip].Start = value_to_set
+    def get_continuous_vars_values(self, var_type: str, values: np.ndarray) -> np.ndarray:
+        """Values of the continuous variables of one type by route entry, given the values of all the variables."""
+        columns, constants = self._continuous_vars_columns[var_type]
+        return np.where(columns >= 0, np.append(values, 0.0)[columns], constants)
 
-    def get_list_conflicting_arcs(self) -> list[int]:
-        """Return a list of all conflicting arcs."""
-        return list(self._gamma)
+    def get_total_delay_column(self) -> int:
+        return self._total_delay.index
 
-    def get_arc_conflicting_pairs(self, arc: int) -> Iterator[tuple[int, int]]:
-        """Return an iterator of all conflicting trip pairs for a given arc."""
-        return itertools.combinations(self._gamma[arc], 2)
+    def set_solution_cb(self, columns: np.ndarray, values: np.ndarray) -> None:
+        """Sets the values of the variables in the given columns in one call; constants (-1) are skipped."""
+        is_variable = columns >= 0
+        self.cbSetSolution([self._variables[column] for column in columns[is_variable].tolist()],
+                           values[is_variable].tolist())
 
-    def get_trips_to_track_on_arc(self, arc: int) -> list[int]:
-        """Return an iterator of all conflicting trip pairs for a given arc."""
-        return list(self._gamma[arc])
+    def set_start_values(self, columns: np.ndarray, values: np.ndarray) -> None:
+        """Sets the MIP start in one call over all the variables; constants (-1) are skipped, the rest is undefined."""
+        start = np.full(len(self._variables), grb.GRB.UNDEFINED)
+        is_variable = columns >= 0
+        start[columns[is_variable]] = values[is_variable]
+        self.setAttr("Start", self._variables, start.tolist())
 
     @staticmethod
     def is_gurobi_var(variable) -> bool:
         return isinstance(variable, grb.Var)
 
-    def add_continuous_var(self, vehicle, arc, lb, ub, var_type, constant_flag: bool = False):
-        # Mapping for variable types
+    def _add_variables(self, lb: np.ndarray, ub: np.ndarray, vtype: str,
+                       names: Optional[list[str]] = None) -> list[grb.Var]:
+        """Adds a batch of variables with the matrix API and records their bounds."""
+        self.update()
+        assert self.NumVars == len(self._variables_lb), "Variables added without recording their bounds."
+        variables = self.addMVar(len(lb), lb=lb, ub=ub, vtype=vtype, name=names)
+        self.update()
+        self._variables_lb = np.concatenate((self._variables_lb, lb))
+        self._variables_ub = np.concatenate((self._variables_ub, ub))
+        variables = variables.tolist()
+        self._variables.extend(variables)
+        return variables
+
+    def _get_columns_of_new_variables(self, is_variable: np.ndarray) -> np.ndarray:
+        """Columns that the next batch of variables will take in the model, -1 where a constant is stored."""
+        columns = np.full(len(is_variable), -1, dtype=np.int64)
+        columns[is_variable] = len(self._variables_lb) + np.arange(np.count_nonzero(is_variable))
+        return columns
+
+    def add_continuous_vars(self, var_type: str, trips: list[int], arcs: list[int], lb: np.ndarray, ub: np.ndarray,
+                            is_variable: np.ndarray) -> None:
+        """
+        Adds the continuous variables of one type (departure, delay or load) in a single batch.
+        Where `is_variable` is False, the upper bound is stored as a constant instead of a variable.
+        """
         continuous_var = {
             "departure": self._departure,
             "delay": self._delay,
             "load": self._load,
-        }
-
-        # Initialize
-        if not vehicle in continuous_var[var_type]:
-            continuous_var[var_type][vehicle] = {}
+        }[var_type]
 
         # Validate bounds
-        assert lb <= ub + TOLERANCE, (
-            f"Invalid bounds for {var_type}_vehicle_{vehicle}_arc_{arc}: {lb} <= {ub}"
+        invalid = np.flatnonzero(lb > ub + TOLERANCE)
+        assert len(invalid) == 0, (
+            f"Invalid bounds for {var_type}_vehicle_{trips[invalid[0]]}_arc_{arcs[invalid[0]]}: "
+            f"{lb[invalid[0]]} <= {ub[invalid[0]]}"
         )
 
-        # Handle constant variable case
-        if abs(lb - ub) < TOLERANCE and constant_flag:
-            continuous_var[var_type][vehicle][arc] = ub
-            return
-
-        # Add a continuous variable to the model
-        variable = self.addVar(
-            vtype=grb.GRB.CONTINUOUS,
-            name=f"{var_type}_vehicle_{vehicle}_arc_{arc}",
-            lb=lb,
-            ub=ub,
-            obj=0,
-            column=None
-        )
-
-        # Store additional attributes
-        variable._lb = lb
-        variable._ub = ub
-
-        # Update the variable mapping
-        continuous_var[var_type][vehicle][arc] = variable
+        names = [f"{var_type}_vehicle_{trip}_arc_{arc}" for trip, arc, variable_flag in
+                 zip(trips, arcs, is_variable.tolist()) if variable_flag] if NAME_MODEL_VARIABLES else None
+        columns = self._get_columns_of_new_variables(is_variable)
+        self._continuous_vars_columns[var_type] = (columns, np.where(is_variable, 0.0, ub))
+        variables = iter(self._add_variables(lb[is_variable], ub[is_variable], grb.GRB.CONTINUOUS, names))
+        for trip, arc, variable_flag, constant in zip(trips, arcs, is_variable.tolist(), ub.tolist()):
+            continuous_var.setdefault(trip, {})[arc] = next(variables) if variable_flag else constant
 
     def get_flag_update(self) -> bool:
         return self._flag_update
@@ -182,35 +221,68 @@ class StaggeredRoutingModel(grb.Model):
     def get_remaining_time_for_optimization(self) -> float:
         return self._remaining_time_for_optimization
 
-    def add_conflict_pair_var(self, arc, first_vehicle, second_vehicle, name, lb, ub, var_name):
-        conflict_var = {
-            "alpha": self._alpha,
-            "beta": self._beta,
-            "gamma": self._gamma,
-        }
-        conflict_var[var_name][arc][first_vehicle][second_vehicle] = (
-            self.addVar(vtype=grb.GRB.BINARY, name=name, lb=lb, ub=ub, obj=0, column=None)
-            if lb != ub else lb)
-        if self.is_gurobi_var(conflict_var[var_name][arc][first_vehicle][second_vehicle]):
-            conflict_var[var_name][arc][first_vehicle][second_vehicle]._lb = lb
-            conflict_var[var_name][arc][first_vehicle][second_vehicle]._ub = ub
-
-    def get_conflict_pair_var_bound(self, bound: str, arc, first_trip, second_trip, var_name):
+    def add_conflict_vars(self, var_type: str, conflict_pairs: ConflictPairs, lb: np.ndarray, ub: np.ndarray) -> None:
+        """
+        Adds the binaries of one type (alpha, beta or gamma) of all conflict pairs in a single batch. The bounds are
+        (number of pairs, 2) arrays, column 1 referring to the inverted pair. Fixed binaries are stored as constants.
+        """
         conflict_var = {
             "alpha": self._alpha,
             "beta": self._beta,
             "gamma": self._gamma,
-        }
-        if self.is_gurobi_var(conflict_var[var_name][arc][first_trip][second_trip]):
-            if bound == "lb":
-                return conflict_var[var_name][arc][first_trip][second_trip]._lb
-            elif bound == "ub":
-                return conflict_var[var_name][arc][first_trip][second_trip]._ub
-            else:
-                raise ValueError("undefined case")
-        else:
+        }[var_type]
+        self._conflict_vars_bounds[var_type] = (lb, ub)
+
+        arcs = np.repeat(conflict_pairs.pair_arcs, 2).tolist()
+        first_trips = np.column_stack((conflict_pairs.first_trips, conflict_pairs.second_trips)).ravel().tolist()
+        second_trips = np.column_stack((conflict_pairs.second_trips, conflict_pairs.first_trips)).ravel().tolist()
+        lb, ub = lb.ravel(), ub.ravel()
+        is_variable = lb != ub
+
+        names = [f"{var_type}_arc_{arc}_vehicles_{first_trip}_{second_trip}" for
+                 arc, first_trip, second_trip, variable_flag in zip(arcs, first_trips, second_trips,
+                                                                    is_variable.tolist())
+                 if variable_flag] if NAME_MODEL_VARIABLES else None
+        columns = self._get_columns_of_new_variables(is_variable)
+        self._conflict_vars_columns[var_type] = (columns.reshape(-1, 2),
+                                                 np.where(is_variable, 0, lb).astype(np.float64).reshape(-1, 2))
+        variables = iter(self._add_variables(lb[is_variable].astype(np.float64), ub[is_variable].astype(np.float64),
+                                             grb.GRB.BINARY, names))
+        for arc, first_trip, second_trip, variable_flag, constant in zip(arcs, first_trips, second_trips,
+                                                                         is_variable.tolist(), lb.tolist()):
+            conflict_var[arc][first_trip][second_trip] = next(variables) if variable_flag else constant
+
+    def get_conflict_vars_bounds(self, var_type: str) -> tuple[np.ndarray, np.ndarray]:
+        """Bounds of the binaries of one type, as passed to add_conflict_vars."""
+        return self._conflict_vars_bounds[var_type]
+
+    def get_conflict_vars_columns(self, var_type: str) -> tuple[np.ndarray, np.ndarray]:
+        """Columns (-1 for fixed binaries) and constant values of the binaries of one type, shaped as the bounds."""
+        return self._conflict_vars_columns[var_type]
+
+    def get_continuous_vars_columns(self, var_type: str) -> tuple[np.ndarray, np.ndarray]:
+        """Columns (-1 for constants) and constant values of the continuous variables of one type, by route entry."""
+        return self._continuous_vars_columns[var_type]
+
+    def get_continuous_vars_bounds(self, var_type: str) -> tuple[np.ndarray, np.ndarray]:
+        """Bounds of the continuous variables of one type by route entry; both bounds of a constant are its value."""
+        columns, constants = self._continuous_vars_columns[var_type]
+        is_variable = columns >= 0
+        lb, ub = constants.copy(), constants.copy()
+        lb[is_variable] = self._variables_lb[columns[is_variable]]
+        ub[is_variable] = self._variables_ub[columns[is_variable]]
+        return lb, ub
+
+    def get_variable_bound(self, bound: str, variable) -> float:
+        if not self.is_gurobi_var(variable):
             # variable is constant
-            return conflict_var[var_name][arc][first_trip][second_trip]
+            return variable
+        if bound == "lb":
+            return float(self._variables_lb[variable.index])
+        elif bound == "ub":
+            return float(self._variables_ub[variable.index])
+        else:
+            raise ValueError("undefined case")
 
     def get_continuous_var_bound(self, bound: str, arc, trip, var_name):
         # Mapping for variable types
@@ -219,17 +291,7 @@ class StaggeredRoutingModel(grb.Model):
             "delay": self._delay,
             "load": self._load,
         }
-
-        if self.is_gurobi_var(continuous_var[var_name][trip][arc]):
-            if bound == "lb":
-                return continuous_var[var_name][trip][arc]._lb
-            elif bound == "ub":
-                return continuous_var[var_name][trip][arc]._ub
-            else:
-                raise ValueError("undefined case")
-        else:
-            # variable is constant
-            return continuous_var[var_name][trip][arc]
+        return self.get_variable_bound(bound, continuous_var[var_name][trip][arc])
 
     def get_conflicting_trips(self, arc, trip) -> list[int]:
         """Return a list of conflicting trips for a given arc and trip."""
@@ -245,9 +307,6 @@ class StaggeredRoutingModel(grb.Model):
         self._beta[arc][first_trip] = {}
         self._gamma[arc][first_trip] = {}
 
-    def has_trip_conflict_vars_on_arc(self, arc, trip) -> bool:
-        return trip in self._alpha[arc]
-
     @staticmethod
     def get_elapsed_time(start_solution_time: float) -> float:
         return datetime.datetime.now().timestamp() - start_solution_time
@@ -277,7 +336,7 @@ class StaggeredRoutingModel(grb.Model):
             raise IndexError("no ub values")
 
     def store_lower_bound(self, arg_value: Optional[float] = None):
-        if arg_value:
+        if arg_value is not None:
             self._lower_bounds_list.append(round(arg_value, 2))
         else:
             try:
@@ -286,13 +345,13 @@ class StaggeredRoutingModel(grb.Model):
                 self._lower_bounds_list.append(0.0)
 
     def store_upper_bound(self, arg_value: Optional[float] = None):
-        if arg_value:
+        if arg_value is not None:
             self._upper_bounds_list.append(round(arg_value, 2))
         else:
             self._upper_bounds_list.append(round(self.getObjective().getValue(), 2))
 
     def store_optimality_gap(self, arg_value: Optional[float] = None):
-        if arg_value:
+        if arg_value is not None:
             self._optimality_gaps_list.append(round(arg_value, 2))
         else:
             try:
@@ -315,6 +374,55 @@ class StaggeredRoutingModel(grb.Model):
     def get_optimization_time_list(self) -> list[float]:
         return self._optimization_times_list
 
+    def add_matrix_constraints(self, rows: np.ndarray, columns: np.ndarray, coefficients: np.ndarray, sense: str,
+                               rhs: np.ndarray, name: str) -> None:
+        """Adds a block of linear constraints with addMConstr, the coefficients given in coordinate format."""
+        matrix = scipy.sparse.csr_matrix((coefficients, (rows, columns)), shape=(len(rhs), len(self._variables_lb)))
+        self.addMConstr(matrix, None, sense, rhs, name=name if NAME_MODEL_VARIABLES else "")
+
+    def add_num_big_m_constraints(self, number: int) -> None:
+        self._num_big_m_constraints += number
+
+    def add_big_m_rows(self, big_m_rows: BigMRows, name: str) -> None:
+        """Adds the big-M rows as a block of constraints and counts them."""
+        rows = np.repeat(np.arange(len(big_m_rows.rhs)), 3)
+        columns, coefficients = big_m_rows.columns.ravel(), big_m_rows.coefficients.ravel()
+        is_variable = columns >= 0
+        self.add_matrix_constraints(rows[is_variable], columns[is_variable], coefficients[is_variable],
+                                    grb.GRB.LESS_EQUAL, big_m_rows.rhs, name)
+        self._num_big_m_constraints += len(big_m_rows.rhs)
+
+    def set_lazy_big_m_rows(self, big_m_rows: BigMRows) -> None:
+        """Big-M rows left out of the model, added from the callback once an incumbent violates them."""
+        self._lazy_big_m_rows = big_m_rows
+        self._is_lazy_row_added = np.zeros(len(big_m_rows.rhs), dtype=bool)
+        self.setParam("LazyConstraints", 1)
+
+    def has_lazy_constraints(self) -> bool:
+        return self._lazy_big_m_rows is not None
+
+    def add_violated_lazy_constraints(self, values: np.ndarray) -> int:
+        """
+        Adds with cbLazy the rows of the pairs with a row violated by the MIPSOL incumbent, given the values of all
+        the variables. Returns the number of rows added.
+        """
+        big_m_rows = self._lazy_big_m_rows
+        is_violated = (big_m_rows.get_lhs(values) > big_m_rows.rhs + TOLERANCE) & ~self._is_lazy_row_added
+        new_rows = np.flatnonzero(np.isin(big_m_rows.pairs, big_m_rows.pairs[is_violated]) &
+                                  ~self._is_lazy_row_added)
+        for row in new_rows.tolist():
+            is_variable = big_m_rows.columns[row] >= 0
+            self.cbLazy(grb.LinExpr(big_m_rows.coefficients[row][is_variable].tolist(),
+                                    [self._variables[column] for column in
+                                     big_m_rows.columns[row][is_variable].tolist()]) <= big_m_rows.rhs[row])
+        self._is_lazy_row_added[new_rows] = True
+        return len(new_rows)
+
+    def print_num_lazy_constraints(self) -> None:
+        if self.has_lazy_constraints():
+            print(f"Lazy BigM constraints added from the callback: {np.count_nonzero(self._is_lazy_row_added)} "
+                  f"of {len(self._is_lazy_row_added)}")
+
     def add_load_constraint(self, trip: int, arc: int) -> None:
         """Add load constraints for a specific vehicle and arc."""
         self.addConstr(self._load[trip][arc] == grb.quicksum(
@@ -330,18 +438,23 @@ class StaggeredRoutingModel(grb.Model):
             name=f"piecewise_delay_arc_{arc}_vehicle_{vehicle}"
         )
 
+    def add_pwl_epigraph_constraints(self, vehicle, arc, slopes: np.ndarray, intercepts: np.ndarray) -> None:
+        """Add one cut delay >= slope * load + intercept per piece of a convex delay function."""
+        for piece, (slope, intercept) in enumerate(zip(slopes.tolist(), intercepts.tolist())):
+            self.addConstr(
+                self._delay[vehicle][arc] >= slope * self._load[vehicle][arc] + intercept,
+                name=f"pwl_cut_{piece}_arc_{arc}_vehicle_{vehicle}"
+            )
+
     def add_alpha_constraints(self, arc: int, v1: int, v2: int) -> None:
         """Add alpha constraints for two vehicles on a given arc."""
         if not self.is_gurobi_var(self._alpha[arc][v1][v2]):
             return
         self._num_big_m_constraints += 2
-        M1 = int(
-            np.ceil(
-                self.get_continuous_var_bound("ub", arc, v1, "departure") -
-                self.get_continuous_var_bound("lb", arc, v2, "departure") + CONSTR_TOLERANCE + TOLERANCE))
-        M2 = int(
-            np.ceil(self.get_continuous_var_bound("ub", arc, v2, "departure") -
-                    self.get_continuous_var_bound("lb", arc, v1, "departure") + CONSTR_TOLERANCE + TOLERANCE))
+        M1 = self.get_big_m(self.get_continuous_var_bound("ub", arc, v1, "departure") -
+                            self.get_continuous_var_bound("lb", arc, v2, "departure"))
+        M2 = self.get_big_m(self.get_continuous_var_bound("ub", arc, v2, "departure") -
+                            self.get_continuous_var_bound("lb", arc, v1, "departure"))
 
         self.addConstr(
             self._departure[v1][arc] - self._departure[v2][arc] + CONSTR_TOLERANCE <= M1 *
@@ -376,26 +489,27 @@ class StaggeredRoutingModel(grb.Model):
         )
 
     def add_beta_constraints(self, arc: int, first_vehicle: int, second_vehicle: int,
-                             second_vehicle_path: list[int], arc_travel_time: float) -> None:
+                             next_arc_second_vehicle: int, arc_travel_time: float) -> None:
         """Add beta constraints for two vehicles on a specific arc."""
         if not self.is_gurobi_var(self._beta[arc][first_vehicle][second_vehicle]):
             return
-        # Get the index of the current arc and the next arc in the path of the second vehicle
-        idx_second_vehicle_path = second_vehicle_path.index(arc)
-        next_arc_second_vehicle = second_vehicle_path[idx_second_vehicle_path + 1]
 
         # Increment the count of Big-M constraints
         self._num_big_m_constraints += 2
 
-        # use BIG-M constraints
-        M3 = int(np.ceil(
-            self.get_continuous_var_bound("ub", next_arc_second_vehicle, second_vehicle, "departure")
-            - self.get_continuous_var_bound("lb", arc, first_vehicle, "departure")
-            + CONSTR_TOLERANCE + TOLERANCE))
-        M4 = int(np.ceil(
-            self.get_continuous_var_bound("ub", arc, first_vehicle, "departure") -
-            self.get_continuous_var_bound("lb", arc, second_vehicle,
-                                          "departure") - arc_travel_time + CONSTR_TOLERANCE + TOLERANCE))
+        # use BIG-M constraints, with the arrival of the second vehicle bounded by its departure window and delay
+        latest_arrival_second_vehicle = min(
+            self.get_continuous_var_bound("ub", next_arc_second_vehicle, second_vehicle, "departure"),
+            self.get_continuous_var_bound("ub", arc, second_vehicle, "departure") + arc_travel_time
+            + self.get_continuous_var_bound("ub", arc, second_vehicle, "delay"))
+        earliest_arrival_second_vehicle = max(
+            self.get_continuous_var_bound("lb", next_arc_second_vehicle, second_vehicle, "departure"),
+            self.get_continuous_var_bound("lb", arc, second_vehicle, "departure") + arc_travel_time
+            + self.get_continuous_var_bound("lb", arc, second_vehicle, "delay"))
+        M3 = self.get_big_m(latest_arrival_second_vehicle -
+                            self.get_continuous_var_bound("lb", arc, first_vehicle, "departure"))
+        M4 = self.get_big_m(self.get_continuous_var_bound("ub", arc, first_vehicle, "departure") -
+                            earliest_arrival_second_vehicle)
 
         # Add Big-M constraints
         self.addConstr(
@@ -412,13 +526,10 @@ class StaggeredRoutingModel(grb.Model):
         )
 
     def add_beta_constraints_indicators(self, arc: int, first_vehicle: int, second_vehicle: int,
-                                        second_vehicle_path: list[int]) -> None:
+                                        next_arc_second_vehicle: int) -> None:
         """Add beta constraints for two vehicles on a specific arc."""
         if not self.is_gurobi_var(self._beta[arc][first_vehicle][second_vehicle]):
             return
-        # Get the index of the current arc and the next arc in the path of the second vehicle
-        idx_second_vehicle_path = second_vehicle_path.index(arc)
-        next_arc_second_vehicle = second_vehicle_path[idx_second_vehicle_path + 1]
 
         # Increment the count of Big-M constraints
         self._num_big_m_constraints += 2
@@ -467,8 +578,7 @@ class StaggeredRoutingModel(grb.Model):
                 )
 
     def create_total_delay_var(self) -> grb.Var:
-        return self.addVar(vtype=grb.GRB.CONTINUOUS, name="total_delay", lb=0, ub=float("inf"), obj=0,
-                           column=None)
+        return self._add_variables(np.zeros(1), np.full(1, float("inf")), grb.GRB.CONTINUOUS, ["total_delay"])[0]
 
     def add_objective_function(self) -> None:
         """Set the objective function for minimizing total delay."""
@@ -496,12 +606,32 @@ class StaggeredRoutingModel(grb.Model):
     def trip_can_have_delay_on_arc(self, trip, arc) -> bool:
         return isinstance(self._load[trip][arc], grb.Var)
 
+    def get_big_m(self, max_difference: np.ndarray | float) -> np.ndarray | float:
+        """
+        Big-M of the constraints difference + CONSTR_TOLERANCE <= M * binary, where the difference of departures
+        is at most max_difference within the bounds of the pair. The coefficients are kept for the summary.
+        """
+        big_m = max_difference + CONSTR_TOLERANCE + TOLERANCE
+        self._big_m_coefficients.append(np.atleast_1d(big_m))
+        return big_m
+
     def print_num_big_m_constraints(self):
         print(f"Number of BigM constraints in model: {self._num_big_m_constraints}")
+        big_m_coefficients = np.concatenate(self._big_m_coefficients) if self._big_m_coefficients else None
+        if big_m_coefficients is not None and len(big_m_coefficients):
+            print(f"BigM coefficients: min {big_m_coefficients.min():.2f}, "
+                  f"median {np.median(big_m_coefficients):.2f}, mean {big_m_coefficients.mean():.2f}, "
+                  f"max {big_m_coefficients.max():.2f}")
 
     def set_improvement_clock(self):
         self._improvement_clock = datetime.datetime.now().timestamp()
 
+    def get_bounds_record_clock(self) -> float:
+        return self._bounds_record_clock
+
+    def set_bounds_record_clock(self, timestamp: float):
+        self._bounds_record_clock = timestamp
+
     def get_final_optimization_metrics(self, start_solution_time) -> OptimizationMeasures:
         self.store_lower_bound()
         self.store_upper_bound()
@@ -1,17 +1,29 @@
 from __future__ import annotations
-from typing import Callable
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
 import gurobipy as grb
-from input_data import SolverParameters, TOLERANCE, ACTIVATE_ASSERTIONS
+import numpy as np
+from input_data import SolverParameters, TOLERANCE, ACTIVATE_ASSERTIONS, CALLBACK_BOUNDS_INTERVAL
 from utils.aliases import Schedules
 from problem.epoch_instance import EpochInstance
-from problem.solution import Binaries
 from conflicting_sets.conflict_binaries import get_conflict_binaries
+from problem.ragged_routes import get_ragged_routes
 import cpp_module as cpp
 from MIP import StaggeredRoutingModel
+from MIP.warm_start import get_route_lengths_and_member_entries, get_solution_values
 
 
 def get_current_bounds(model: StaggeredRoutingModel, start_solution_time: float) -> None:
-    """Update the current bounds (lower and upper) for the optimization problem."""
+    """
+    Update the current bounds (lower and upper) for the optimization problem, at most once every
+    CALLBACK_BOUNDS_INTERVAL seconds.
+    """
+    now = datetime.datetime.now().timestamp()
+    if now - model.get_bounds_record_clock() < CALLBACK_BOUNDS_INTERVAL:
+        return
+    model.set_bounds_record_clock(now)
     new_lower_bound = model.cbGet(grb.GRB.Callback.MIP_OBJBND)
     new_upper_bound = model.cbGet(grb.GRB.Callback.MIP_OBJBST)
     lower_bound_improved = new_lower_bound >= model.get_last_lower_bound()
@@ -36,13 +48,10 @@ def update_remaining_time_for_optimization(model: StaggeredRoutingModel, epoch_t
         model.terminate()
 
 
-def get_callback_solution(model: StaggeredRoutingModel, instance: EpochInstance) -> None:
-    """Retrieve the current solution during a callback and update model attributes."""
-    model.set_cb_start_times([model.get_continuous_var_cb(vehicle, path[0], "departure")
-                              for vehicle, path in enumerate(instance.trip_routes)])
-    model.set_cb_total_delay(sum(model.get_continuous_var_cb(vehicle, arc, "delay")
-                                 for vehicle, path in enumerate(instance.trip_routes) for arc in path)
-                             )
+def get_callback_solution(model: StaggeredRoutingModel, values: np.ndarray, first_entries: np.ndarray) -> None:
+    """Retrieve the current solution from the values of all the variables and update model attributes."""
+    model.set_cb_start_times(model.get_continuous_vars_values("departure", values)[first_entries].tolist())
+    model.set_cb_total_delay(float(model.get_continuous_vars_values("delay", values).sum()))
 
     model.set_flag_update(True)
 
@@ -70,54 +79,85 @@ def assert_schedule(model: StaggeredRoutingModel, congested_schedule: Schedules,
                                                                              f"of vehicle {vehicle}.")
 
 
-def set_heuristic_continuous_variables(model: StaggeredRoutingModel, schedule: Schedules, delays_on_arcs: Schedules,
-                                       instance: EpochInstance) -> None:
-    """Set continuous variables in the model based on the heuristic solution."""
-    for vehicle, route in enumerate(instance.trip_routes):
-        for position, arc in enumerate(route):
-            model.set_continuous_var(vehicle, arc, "departure", schedule[vehicle][position], "cb")
-            model.set_continuous_var(vehicle, arc, "delay", delays_on_arcs[vehicle][position], "cb")
-
-
-def set_heuristic_binary_variables(model: StaggeredRoutingModel, heuristic_binaries: Binaries) -> None:
-    """Set binary variables in the model based on the heuristic solution."""
-    for arc in model.get_list_conflicting_arcs():
-        for first_vehicle, second_vehicle in model.get_arc_conflicting_pairs(arc):
-            if heuristic_binaries.gamma[arc][first_vehicle][second_vehicle] != -1:
-                model.set_conflicting_var(first_vehicle, second_vehicle, arc, "alpha",
-                                          heuristic_binaries.alpha[arc][first_vehicle][second_vehicle], "cb")
-                model.set_conflicting_var(first_vehicle, second_vehicle, arc, "beta",
-                                          heuristic_binaries.beta[arc][first_vehicle][second_vehicle], "cb")
-                model.set_conflicting_var(first_vehicle, second_vehicle, arc, "gamma",
-                                          heuristic_binaries.gamma[arc][first_vehicle][second_vehicle], "cb")
-
-
 def set_heuristic_solution(model: StaggeredRoutingModel, instance: EpochInstance,
                            heuristic_solution: cpp.cpp_solution,
-                           cpp_simplified_epoch_instance: cpp.cpp_instance) -> None:
-    """Apply the heuristic solution to the model if it improves the current solution."""
+                           cpp_simplified_epoch_instance: cpp.cpp_instance, route_lengths: list[int],
+                           member_entries: np.ndarray) -> None:
+    """
+    Apply the heuristic solution to the model if it improves the current solution. All the values are set, so that
+    Gurobi does not have to complete the solution.
+    """
     print("Setting heuristic solution in callback...")
     schedule = heuristic_solution.get_schedule()
     delays_on_arcs = heuristic_solution.get_delays_on_arcs(cpp_simplified_epoch_instance)
-    heuristic_binaries = get_conflict_binaries(instance.conflicting_sets, instance.trip_routes, schedule)
-    set_heuristic_binary_variables(model, heuristic_binaries)
-    set_heuristic_continuous_variables(model, schedule, delays_on_arcs, instance)
+    heuristic_binaries = get_conflict_binaries(instance.conflict_pairs, schedule)
+    model.set_solution_cb(*get_solution_values(model, instance, schedule, delays_on_arcs, heuristic_binaries,
+                                               route_lengths, member_entries))
     solution_value = model.cbUseSolution()
     print(f"Heuristic solution accepted with value {solution_value:.0f}")
     model.update()
     if solution_value == 1e+100:
         print("Heuristic solution not accepted - terminating model.")
-        new_lower_bound = model.cbGet(grb.GRB.Callback.MIP_OBJBND)
+        new_lower_bound = model.cbGet(grb.GRB.Callback.MIPNODE_OBJBND)
         if new_lower_bound > model.get_best_lower_bound():
             model.set_best_lower_bound(new_lower_bound)
         model.terminate()
 
 
+@dataclass
+class LocalSearchPolicy:
+    """
+    Adaptive invocation of the local search: after k runs in a row without improvement, the next run waits
+    (2^k - 1) times the duration of the last one. No run starts with less remaining time than the last run took.
+    """
+    failed_runs: int = 0
+    last_duration: float = 0.0
+    next_start_clock: float = 0.0
+
+    def can_start(self, now: float, remaining_time: Optional[float]) -> bool:
+        has_time = remaining_time is None or remaining_time > self.last_duration
+        return now >= self.next_start_clock and has_time
+
+    def finish(self, now: float, duration: float, improved: bool) -> None:
+        self.last_duration = duration
+        self.failed_runs = 0 if improved else min(self.failed_runs + 1, 10)
+        self.next_start_clock = now + duration * (2 ** self.failed_runs - 1)
+
+
+def run_local_search(cpp_local_search: cpp.cpp_local_search,
+                     start_times: list[float]) -> tuple[cpp.cpp_solution, float]:
+    """Runs the local search and measures its duration [s]."""
+    start = datetime.datetime.now().timestamp()
+    heuristic_solution = cpp_local_search.run(start_times)
+    return heuristic_solution, datetime.datetime.now().timestamp() - start
+
+
+def start_local_search(model: StaggeredRoutingModel, cpp_local_search: cpp.cpp_local_search,
+                       local_search_executor: ThreadPoolExecutor, policy: LocalSearchPolicy) -> None:
+    """
+    Run the local search on the last incumbent in the background, unless a run is still in progress or the policy
+    holds it back.
+    """
+    if not model.get_flag_update() or model.get_local_search_future() is not None:
+        return
+    if not policy.can_start(datetime.datetime.now().timestamp(), model.get_remaining_time_for_optimization()):
+        return
+    model.set_flag_update(False)
+    model.set_local_search_future(local_search_executor.submit(run_local_search, cpp_local_search,
+                                                               model.get_cb_start_times()))
+
+
 def callback(instance: EpochInstance, solver_params: SolverParameters,
              cpp_local_search: cpp.cpp_local_search,
-             cpp_simplified_epoch_instance: cpp.cpp_instance) -> Callable:
+             cpp_simplified_epoch_instance: cpp.cpp_instance,
+             local_search_executor: ThreadPoolExecutor) -> Callable:
     """Define the callback function for Gurobi.
+    The local search runs on the thread of the executor, started at MIPSOL and collected at the next MIPNODE once
+    finished, so that the branch and bound goes on meanwhile. The LocalSearchPolicy spaces out unsuccessful runs.
     """
+    policy = LocalSearchPolicy()
+    first_entries = get_ragged_routes(instance.trip_routes).offsets[:-1]
+    route_lengths, member_entries = get_route_lengths_and_member_entries(instance)
 
     def call_local_search(model: StaggeredRoutingModel, where: int) -> None:
         if where == grb.GRB.Callback.MIP:
@@ -125,18 +165,33 @@ def callback(instance: EpochInstance, solver_params: SolverParameters,
             update_remaining_time_for_optimization(model, solver_params.epoch_time_limit, instance.clock_start_epoch)
 
         if where == grb.GRB.Callback.MIPSOL:
-            get_callback_solution(model, instance)
+            values = model.get_solution_cb()
+            # An incumbent violating lazy constraints is cut off: it is neither stored nor improved
+            if model.has_lazy_constraints() and model.add_violated_lazy_constraints(values) > 0:
+                return
+            get_callback_solution(model, values, first_entries)
             model.set_improvement_clock()
             model.set_best_upper_bound(model.get_cb_total_delay())
-
-        if where == grb.GRB.Callback.MIPNODE and model.get_flag_update():
-            model.set_flag_update(False)
-            heuristic_solution = cpp_local_search.run(model.get_cb_start_times())
-            if is_solution_improving(model, heuristic_solution):
-                set_heuristic_solution(model, instance, heuristic_solution, cpp_simplified_epoch_instance)
+            if solver_params.local_search_callback:
+                start_local_search(model, cpp_local_search, local_search_executor, policy)
+
+        if where == grb.GRB.Callback.MIPNODE and solver_params.local_search_callback:
+            local_search_future = model.get_local_search_future()
+            if local_search_future is not None and local_search_future.done():
+                model.set_local_search_future(None)
+                heuristic_solution, duration = local_search_future.result()
+                is_improving = is_solution_improving(model, heuristic_solution)
+                policy.finish(datetime.datetime.now().timestamp(), duration, is_improving)
+                if is_improving:
+                    set_heuristic_solution(model, instance, heuristic_solution, cpp_simplified_epoch_instance,
+                                           route_lengths, member_entries)
+            # Incumbents found during the run, or held back by the policy, are searched next
+            start_local_search(model, cpp_local_search, local_search_executor, policy)
 
     return call_local_search
 
 
 def is_solution_improving(model: StaggeredRoutingModel, heuristic_solution: cpp.cpp_solution) -> bool:
-    return model.get_cb_total_delay() - heuristic_solution.get_total_delay() > TOLERANCE
+    """Compares with the incumbent at the MIPNODE, which may be better than the one the local search started from."""
+    incumbent_total_delay = min(model.get_cb_total_delay(), model.cbGet(grb.GRB.Callback.MIPNODE_OBJBST))
+    return incumbent_total_delay - heuristic_solution.get_total_delay() > TOLERANCE
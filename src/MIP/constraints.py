@@ -1,6 +1,17 @@
-from MIP import StaggeredRoutingModel
-from input_data import USE_GUROBI_INDICATORS
+from typing import Optional
+
+import gurobipy as grb
+import numpy as np
+
+from MIP import StaggeredRoutingModel, BigMRows
+from input_data import USE_GUROBI_INDICATORS, USE_BATCHED_CONSTRAINTS, CONSTR_TOLERANCE, \
+    TOLERANCE, USE_LAZY_CONFLICT_CONSTRAINTS
 from problem.instance import Instance
+from problem.solution import Solution
+from problem.ragged_routes import get_ragged_routes
+
+# Variable term of a constraint block: rows, coefficients, columns (-1 for constants) and constant values
+ConstraintTerm = tuple[np.ndarray, np.ndarray | float, np.ndarray, np.ndarray]
 
 
 def get_x_and_y_points_pwl_function(instance: Instance, arc: int) -> \
@@ -34,54 +45,325 @@ def get_x_and_y_points_pwl_function(instance: Instance, arc: int) -> \
     return x_axis_values, y_axis_values
 
 
+def get_pwl_function_cuts(x_axis_values: list[float], y_axis_values: list[float]) -> \
+        Optional[tuple[np.ndarray, np.ndarray]]:
+    """
+    Slopes and intercepts of the pieces of a convex PWL function, which is then the maximum of its pieces.
+    Returns None if the function is not convex. Pieces of zero width are skipped.
+    """
+    x_points, y_points = np.asarray(x_axis_values, dtype=np.float64), np.asarray(y_axis_values, dtype=np.float64)
+    widths = np.diff(x_points)
+    pieces = np.flatnonzero(widths > TOLERANCE)
+    slopes = np.diff(y_points)[pieces] / widths[pieces]
+    if np.any(np.diff(slopes) < -TOLERANCE):
+        return None
+    return slopes, y_points[pieces] - slopes * x_points[pieces]
+
+
 def add_conflict_constraints_between_vehicle_pair(
         model: StaggeredRoutingModel,
         first_vehicle: int,
         second_vehicle: int,
         arc: int,
-        second_vehicle_path: list[int],
+        next_arc_second_vehicle: int,
         arc_travel_time: float
 ) -> None:
     """Add conflict constraints (alpha, beta, gamma) between two vehicles on a specific arc."""
 
     if USE_GUROBI_INDICATORS:
         model.add_alpha_constraints_indicators(arc, first_vehicle, second_vehicle)
-        model.add_beta_constraints_indicators(arc, first_vehicle, second_vehicle, second_vehicle_path)
+        model.add_beta_constraints_indicators(arc, first_vehicle, second_vehicle, next_arc_second_vehicle)
     else:
         model.add_alpha_constraints(arc, first_vehicle, second_vehicle)
-        model.add_beta_constraints(arc, first_vehicle, second_vehicle, second_vehicle_path, arc_travel_time)
+        model.add_beta_constraints(arc, first_vehicle, second_vehicle, next_arc_second_vehicle, arc_travel_time)
 
     model.add_gamma_constraints(arc, first_vehicle, second_vehicle)
 
 
-def add_conflict_constraints(model: StaggeredRoutingModel, instance: Instance) -> None:
-    """Add conflict constraints to the model."""
+def _add_constraint_block(model: StaggeredRoutingModel, terms: list[ConstraintTerm], sense: str,
+                          rhs: np.ndarray | float, number_of_rows: int, name: str) -> None:
+    """Adds a block of linear constraints; the terms on constants are moved to the right-hand side."""
+    if number_of_rows == 0:
+        return
+    rhs = np.array(np.broadcast_to(rhs, number_of_rows), dtype=np.float64)
+    block_rows, block_columns, block_coefficients = [], [], []
+    for rows, coefficients, columns, constants in terms:
+        coefficients = np.broadcast_to(np.asarray(coefficients, dtype=np.float64), rows.shape)
+        is_variable = columns >= 0
+        block_rows.append(rows[is_variable])
+        block_columns.append(columns[is_variable])
+        block_coefficients.append(coefficients[is_variable])
+        np.subtract.at(rhs, rows[~is_variable], coefficients[~is_variable] * constants[~is_variable])
+    model.add_matrix_constraints(np.concatenate(block_rows), np.concatenate(block_columns),
+                                 np.concatenate(block_coefficients), sense, rhs, name)
+
+
+def _get_big_m_rows(terms: list[ConstraintTerm], rhs: np.ndarray | float, pairs: np.ndarray) -> BigMRows:
+    """Rows of a block of three-term big-M constraints, one per pair; the terms on constants go to the rhs."""
+    rhs = np.array(np.broadcast_to(rhs, len(pairs)), dtype=np.float64)
+    columns, coefficients = [], []
+    for rows, term_coefficients, term_columns, constants in terms:
+        term_coefficients = np.broadcast_to(np.asarray(term_coefficients, dtype=np.float64), rows.shape)
+        is_variable = term_columns >= 0
+        np.subtract.at(rhs, rows[~is_variable], term_coefficients[~is_variable] * constants[~is_variable])
+        columns.append(term_columns)
+        coefficients.append(np.where(is_variable, term_coefficients, 0.0))
+    return BigMRows(np.column_stack(columns), np.column_stack(coefficients), rhs, pairs)
+
+
+def _add_lazy_big_m_rows(model: StaggeredRoutingModel, big_m_rows: list[BigMRows],
+                         warm_start: Optional[Solution]) -> None:
+    """
+    Adds the big-M rows of the pairs sharing the arc in the warm start (gamma not zero in some orientation) and
+    leaves the others to the callback.
+    """
+    big_m_rows = BigMRows(*(np.concatenate([getattr(rows_block, field) for rows_block in big_m_rows])
+                            for field in ["columns", "coefficients", "rhs", "pairs"]))
+    is_seed_pair = (np.any(warm_start.binaries.gamma != 0, axis=1)
+                    if warm_start is not None and warm_start.binaries is not None else
+                    np.zeros(len(model.get_conflict_vars_bounds("gamma")[0]), dtype=bool))
+    is_seed_row = is_seed_pair[big_m_rows.pairs]
+    model.add_big_m_rows(big_m_rows.select(np.flatnonzero(is_seed_row)), "big_m_seed")
+    model.set_lazy_big_m_rows(big_m_rows.select(np.flatnonzero(~is_seed_row)))
+    print(f"Lazy BigM constraints: {np.count_nonzero(is_seed_row)} seeded from the warm start, "
+          f"{np.count_nonzero(~is_seed_row)} left to the callback")
+
+
+def _get_member_entries(instance: Instance) -> np.ndarray:
+    """Route entry (as in the ragged routes) of each conflicting set member."""
+    conflict_pairs = instance.conflict_pairs
+    ragged_routes = get_ragged_routes(instance.trip_routes)
+    return ragged_routes.offsets[conflict_pairs.member_trips] + conflict_pairs.member_positions
+
+
+def _get_oriented_pairs(model: StaggeredRoutingModel, instance: Instance,
+                        member_entries: np.ndarray) -> tuple[np.ndarray, ...]:
+    """
+    Pairs whose trip with the smaller id can have delay, in both orientations (smaller id first, then inverted).
+    Returns the pair, the column of its binaries and the members of the first and second trip of each orientation.
+    """
+    conflict_pairs = instance.conflict_pairs
+    is_swapped = conflict_pairs.first_trips > conflict_pairs.second_trips
+    lower_members = np.where(is_swapped, conflict_pairs.second_members, conflict_pairs.first_members)
+    load_columns, _ = model.get_continuous_vars_columns("load")
+    pairs = np.repeat(np.flatnonzero(load_columns[member_entries[lower_members]] >= 0), 2)
+    orientations = np.tile(np.array([0, 1]), len(pairs) // 2) ^ is_swapped[pairs]
+    first_members = np.where(orientations == 0, conflict_pairs.first_members[pairs],
+                             conflict_pairs.second_members[pairs])
+    second_members = np.where(orientations == 0, conflict_pairs.second_members[pairs],
+                              conflict_pairs.first_members[pairs])
+    return pairs, orientations, first_members, second_members
+
+
+def _add_load_constraints_in_batch(model: StaggeredRoutingModel, instance: Instance,
+                                   member_entries: np.ndarray) -> None:
+    """Add the load constraints of all the members that can have delay in one block."""
+    conflict_pairs = instance.conflict_pairs
+    load_columns, load_constants = model.get_continuous_vars_columns("load")
+    gamma_columns, gamma_constants = model.get_conflict_vars_columns("gamma")
+    load_members = np.flatnonzero(load_columns[member_entries] >= 0)
+    row_of_members = np.full(len(member_entries), -1, dtype=np.int64)
+    row_of_members[load_members] = np.arange(len(load_members))
+
+    # load = sum of the gammas of the member with its conflicting trips + 1
+    terms = [(np.arange(len(load_members)), 1.0, load_columns[member_entries[load_members]],
+              load_constants[member_entries[load_members]])]
+    for column, members in enumerate([conflict_pairs.first_members, conflict_pairs.second_members]):
+        pairs = np.flatnonzero(row_of_members[members] >= 0)
+        terms.append((row_of_members[members[pairs]], -1.0, gamma_columns[pairs, column],
+                      gamma_constants[pairs, column]))
+    _add_constraint_block(model, terms, grb.GRB.EQUAL, 1.0, len(load_members), "load_constraint")
+
+
+def _add_pair_constraints_in_batch(model: StaggeredRoutingModel, instance: Instance, member_entries: np.ndarray,
+                                   warm_start: Optional[Solution]) -> None:
+    """
+    Add the big-M alpha, beta and gamma constraints of all conflict pairs, one block per constraint family.
+    With USE_LAZY_CONFLICT_CONSTRAINTS, the alpha and beta rows are seeded with the warm start and left to the callback.
+    """
+    pairs, orientations, first_members, second_members = _get_oriented_pairs(model, instance, member_entries)
+    first_entries, second_entries = member_entries[first_members], member_entries[second_members]
+    second_next_entries = second_entries + 1
+    departure_columns, departure_constants = model.get_continuous_vars_columns("departure")
+    departure_lb, departure_ub = model.get_continuous_vars_bounds("departure")
+    delay_lb, delay_ub = model.get_continuous_vars_bounds("delay")
+    travel_times = np.asarray(instance.travel_times_arcs, dtype=np.float64)[
+        instance.conflict_pairs.pair_arcs[pairs]]
+    alpha, beta, gamma = ([values[pairs, orientations] for values in model.get_conflict_vars_columns(var_type)]
+                          for var_type in ["alpha", "beta", "gamma"])
+
+    def departure(entries: np.ndarray, selection: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return departure_columns[entries[selection]], departure_constants[entries[selection]]
+
+    def binary(values: list[np.ndarray], selection: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        return values[0][selection], values[1][selection]
+
+    # Alpha: departure of the first trip after the departure of the second one
+    selection = np.flatnonzero(alpha[0] >= 0)
+    rows = np.arange(len(selection))
+    big_m_one = model.get_big_m(departure_ub[first_entries[selection]] - departure_lb[second_entries[selection]])
+    big_m_two = model.get_big_m(departure_ub[second_entries[selection]] - departure_lb[first_entries[selection]])
+    big_m_rows = {
+        "alpha_constr_one": _get_big_m_rows([(rows, 1.0, *departure(first_entries, selection)),
+                                             (rows, -1.0, *departure(second_entries, selection)),
+                                             (rows, -big_m_one, *binary(alpha, selection))],
+                                            -CONSTR_TOLERANCE, pairs[selection]),
+        "alpha_constr_two": _get_big_m_rows([(rows, 1.0, *departure(second_entries, selection)),
+                                             (rows, -1.0, *departure(first_entries, selection)),
+                                             (rows, big_m_two, *binary(alpha, selection))],
+                                            big_m_two - CONSTR_TOLERANCE, pairs[selection]),
+    }
+
+    # Beta: departure of the first trip before the arrival of the second one, whose arrival is bounded by its
+    # departure window and delay
+    selection = np.flatnonzero(beta[0] >= 0)
+    rows = np.arange(len(selection))
+    second_departures, second_arrivals = second_entries[selection], second_next_entries[selection]
+    latest_arrivals = np.minimum(departure_ub[second_arrivals], departure_ub[second_departures]
+                                 + travel_times[selection] + delay_ub[second_departures])
+    earliest_arrivals = np.maximum(departure_lb[second_arrivals], departure_lb[second_departures]
+                                   + travel_times[selection] + delay_lb[second_departures])
+    big_m_three = model.get_big_m(latest_arrivals - departure_lb[first_entries[selection]])
+    big_m_four = model.get_big_m(departure_ub[first_entries[selection]] - earliest_arrivals)
+    big_m_rows["beta_to_zero"] = _get_big_m_rows([(rows, 1.0, *departure(second_next_entries, selection)),
+                                                  (rows, -1.0, *departure(first_entries, selection)),
+                                                  (rows, -big_m_three, *binary(beta, selection))],
+                                                 -CONSTR_TOLERANCE, pairs[selection])
+    big_m_rows["beta_to_one"] = _get_big_m_rows([(rows, 1.0, *departure(first_entries, selection)),
+                                                 (rows, -1.0, *departure(second_next_entries, selection)),
+                                                 (rows, big_m_four, *binary(beta, selection))],
+                                                big_m_four - CONSTR_TOLERANCE, pairs[selection])
+    if USE_LAZY_CONFLICT_CONSTRAINTS:
+        _add_lazy_big_m_rows(model, list(big_m_rows.values()), warm_start)
+    else:
+        for name, rows_block in big_m_rows.items():
+            model.add_big_m_rows(rows_block, name)
+
+    # Gamma: alpha and beta
+    selection = np.flatnonzero(gamma[0] >= 0)
+    rows = np.arange(len(selection))
+    _add_constraint_block(model, [(rows, 1.0, *binary(gamma, selection)), (rows, -1.0, *binary(alpha, selection)),
+                                  (rows, -1.0, *binary(beta, selection))],
+                          grb.GRB.GREATER_EQUAL, -1.0, len(selection), "gamma_1_constr")
+    _add_constraint_block(model, [(rows, 1.0, *binary(gamma, selection)), (rows, -0.5, *binary(alpha, selection)),
+                                  (rows, -0.5, *binary(beta, selection))],
+                          grb.GRB.LESS_EQUAL, 0.0, len(selection), "gamma_2_constr")
+    model.add_num_big_m_constraints(2 * len(selection))
+
+
+def _add_pair_constraints(model: StaggeredRoutingModel, instance: Instance) -> None:
+    """Add bidirectional conflict constraints for each pair, if the trip with the smaller id can have delay."""
+    for arc, first_trip, second_trip, first_position, second_position in instance.conflict_pairs.iterate():
+        if first_trip > second_trip:
+            first_trip, second_trip, first_position, second_position = \
+                second_trip, first_trip, second_position, first_position
+        if not model.trip_can_have_delay_on_arc(first_trip, arc):
+            continue
 
-    for arc in model.get_list_conflicting_arcs():
         arc_travel_time = instance.travel_times_arcs[arc]
+        next_arc_first_trip = instance.trip_routes[first_trip][first_position + 1]
+        next_arc_second_trip = instance.trip_routes[second_trip][second_position + 1]
+        add_conflict_constraints_between_vehicle_pair(
+            model, first_trip, second_trip, arc, next_arc_second_trip, arc_travel_time
+        )
+        add_conflict_constraints_between_vehicle_pair(
+            model, second_trip, first_trip, arc, next_arc_first_trip, arc_travel_time
+        )
 
-        # Process trips on the current arc
-        for trip in model.get_trips_to_track_on_arc(arc):
+
+def _add_pwl_epigraph_constraints_in_batch(model: StaggeredRoutingModel, member_entries: np.ndarray,
+                                           members_of_arcs: list[list[int]],
+                                           cuts_of_arcs: list[tuple[np.ndarray, np.ndarray]]) -> None:
+    """Add the cuts delay >= slope * load + intercept of the convex delay functions in one block."""
+    entries, slopes, intercepts = [], [], []
+    for members, (arc_slopes, arc_intercepts) in zip(members_of_arcs, cuts_of_arcs):
+        entries.append(np.repeat(member_entries[members], len(arc_slopes)))
+        slopes.append(np.tile(arc_slopes, len(members)))
+        intercepts.append(np.tile(arc_intercepts, len(members)))
+    if not entries:
+        return
+    entries, slopes, intercepts = np.concatenate(entries), np.concatenate(slopes), np.concatenate(intercepts)
+    rows = np.arange(len(entries))
+    delay_columns, delay_constants = model.get_continuous_vars_columns("delay")
+    load_columns, load_constants = model.get_continuous_vars_columns("load")
+    _add_constraint_block(model, [(rows, 1.0, delay_columns[entries], delay_constants[entries]),
+                                  (rows, -slopes, load_columns[entries], load_constants[entries])],
+                          grb.GRB.GREATER_EQUAL, intercepts, len(entries), "pwl_cut")
+
+
+def _add_load_and_delay_constraints(model: StaggeredRoutingModel, instance: Instance,
+                                    member_entries: Optional[np.ndarray], pwl_epigraph_relaxation: bool) -> None:
+    """
+    Add load (unless batched) and delay constraints of the trips on each conflicting arc. With the epigraph
+    relaxation, convex delay functions are modeled with their cuts and the others with general PWL constraints.
+    The cuts only bound the delay from below: since the delays also shift the departures on the next arcs, the
+    relaxed model lets trips wait on the arcs and its optimum is only a lower bound of the delay.
+    """
+    conflict_pairs = instance.conflict_pairs
+    conflicting_arcs = conflict_pairs.get_conflicting_arcs()
+    members_of_arcs, cuts_of_arcs = [], []
+    for arc in conflicting_arcs:
+        x_points, y_points = get_x_and_y_points_pwl_function(instance, arc)
+        cuts = get_pwl_function_cuts(x_points, y_points) if pwl_epigraph_relaxation else None
+        members = []
+        for member, (trip, _) in enumerate(conflict_pairs.get_members(arc),
+                                           start=int(conflict_pairs.member_offsets[arc])):
             if not model.trip_can_have_delay_on_arc(trip, arc):
                 continue
+            if not USE_BATCHED_CONSTRAINTS:
+                model.add_load_constraint(trip, arc)
+            if cuts is None:
+                model.add_pwl_constraint(trip, arc, x_points, y_points)
+            elif USE_BATCHED_CONSTRAINTS:
+                members.append(member)
+            else:
+                model.add_pwl_epigraph_constraints(trip, arc, *cuts)
+        if cuts is not None:
+            members_of_arcs.append(members)
+            cuts_of_arcs.append(cuts)
+
+    if USE_BATCHED_CONSTRAINTS:
+        _add_pwl_epigraph_constraints_in_batch(model, member_entries, members_of_arcs, cuts_of_arcs)
+    if pwl_epigraph_relaxation:
+        print(f"Relaxation: delay functions modeled with linear cuts on {len(cuts_of_arcs)} of "
+              f"{len(conflicting_arcs)} arcs.")
 
-            # Add load and piecewise linear (PWL) constraints
-            model.add_load_constraint(trip, arc)
-            x_points, y_points = get_x_and_y_points_pwl_function(instance, arc)
-            model.add_pwl_constraint(trip, arc, x_points, y_points)
 
-            # Add conflict constraints for conflicting trips
-            for conflicting_trip in model.get_conflicting_trips(arc, trip):
-                if trip >= conflicting_trip:
-                    continue
+def add_conflict_constraints(model: StaggeredRoutingModel, instance: Instance,
+                             warm_start: Optional[Solution] = None, pwl_epigraph_relaxation: bool = False) -> None:
+    """
+    Add conflict constraints to the model; the warm start seeds the lazy constraints. The epigraph relaxation of
+    the delay functions is approximate, see _add_load_and_delay_constraints.
+    """
+    member_entries = _get_member_entries(instance) if USE_BATCHED_CONSTRAINTS else None
+    if USE_BATCHED_CONSTRAINTS:
+        _add_load_constraints_in_batch(model, instance, member_entries)
+    _add_load_and_delay_constraints(model, instance, member_entries, pwl_epigraph_relaxation)
 
-                # Add bidirectional conflict constraints
-                add_conflict_constraints_between_vehicle_pair(
-                    model, trip, conflicting_trip, arc, instance.trip_routes[conflicting_trip], arc_travel_time
-                )
-                add_conflict_constraints_between_vehicle_pair(
-                    model, conflicting_trip, trip, arc, instance.trip_routes[trip], arc_travel_time
-                )
+    # Indicator constraints have no matrix counterpart
+    if USE_BATCHED_CONSTRAINTS and not USE_GUROBI_INDICATORS:
+        _add_pair_constraints_in_batch(model, instance, member_entries, warm_start)
+    else:
+        _add_pair_constraints(model, instance)
 
     # Finalize and update the model
     model.update()
+
+
+def add_travel_continuity_constraints(model: StaggeredRoutingModel, instance: Instance) -> None:
+    """Add travel continuity constraints to the model."""
+    if not USE_BATCHED_CONSTRAINTS:
+        model.add_travel_continuity_constraints(instance)
+        return
+
+    # departure on an arc - departure on the previous arc - delay on the previous arc = travel time previous arc
+    ragged_routes = get_ragged_routes(instance.trip_routes)
+    entries = np.flatnonzero(ragged_routes.position_of_entries > 0)
+    rows = np.arange(len(entries))
+    departure_columns, departure_constants = model.get_continuous_vars_columns("departure")
+    delay_columns, delay_constants = model.get_continuous_vars_columns("delay")
+    travel_times = np.asarray(instance.travel_times_arcs, dtype=np.float64)[ragged_routes.arcs[entries - 1]]
+    _add_constraint_block(model, [(rows, 1.0, departure_columns[entries], departure_constants[entries]),
+                                  (rows, -1.0, departure_columns[entries - 1], departure_constants[entries - 1]),
+                                  (rows, -1.0, delay_columns[entries - 1], delay_constants[entries - 1])],
+                          grb.GRB.EQUAL, travel_times, len(entries), "continuity")
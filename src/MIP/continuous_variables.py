@@ -1,96 +1,87 @@
+import itertools
+
+import numpy as np
+
+from problem.ragged_routes import RaggedRoutes, get_ragged_routes
 from problem.solution import Solution
 from problem.instance import Instance
 from input_data import FIX_MODEL, TOLERANCE
 from MIP import StaggeredRoutingModel
 
 
-def _add_departure_variable(
-        model: StaggeredRoutingModel,
-        vehicle: int,
-        arc: int,
-        instance: Instance,
-        status_quo: Solution,
-        epoch_warm_start: Solution
-) -> None:
-    """
-    Add a departure variable for a specific vehicle and arc.
+def _get_flat_values(values: list[list[float]], ragged_routes: RaggedRoutes) -> np.ndarray:
+    """Values of each (trip, position) entry of the routes, as a flat array aligned with the ragged routes."""
+    route_lengths = ragged_routes.get_route_lengths().tolist()
+    return np.fromiter(itertools.chain.from_iterable(
+        trip_values[:route_length] for trip_values, route_length in zip(values, route_lengths)
+    ), dtype=np.float64, count=len(ragged_routes.arcs))
+
 
-    """
-    # Get arc index and departure bounds
-    arc_index = instance.trip_routes[vehicle].index(arc)
-    earliest_departure = instance.earliest_departure_times[vehicle][arc_index]
-    latest_departure = instance.latest_departure_times[vehicle][arc_index]
+def _get_member_of_entries(instance: Instance, ragged_routes: RaggedRoutes) -> np.ndarray:
+    """Conflicting set member of each route entry, -1 if the trip is not in the conflicting set of the arc."""
+    conflict_pairs = instance.conflict_pairs
+    member_of_entries = np.full(len(ragged_routes.arcs), -1, dtype=np.int64)
+    member_entries = ragged_routes.offsets[conflict_pairs.member_trips] + conflict_pairs.member_positions
+    member_of_entries[member_entries] = np.arange(len(member_entries))
+    return member_of_entries
+
+
+def _add_departure_variables(model: StaggeredRoutingModel, instance: Instance, ragged_routes: RaggedRoutes,
+                             epoch_warm_start: Solution, trips: list[int], arcs: list[int]) -> None:
+    """Add the departure variables of all route entries."""
+    earliest_departures = _get_flat_values(instance.earliest_departure_times, ragged_routes)
+    latest_departures = _get_flat_values(instance.latest_departure_times, ragged_routes)
 
     # Fix numerical issues if needed
-    if latest_departure < earliest_departure + TOLERANCE:
-        latest_departure = earliest_departure + TOLERANCE
-        instance.latest_departure_times[vehicle][arc_index] = latest_departure
+    for entry in np.flatnonzero(latest_departures < earliest_departures + TOLERANCE).tolist():
+        latest_departures[entry] = earliest_departures[entry] + TOLERANCE
+        position = ragged_routes.position_of_entries[entry]
+        instance.latest_departure_times[trips[entry]][position] = latest_departures[entry]
 
-    # Add fixed or variable departure to the model
+    # Add fixed or variable departures to the model
     if FIX_MODEL:
-        fixed_departure = epoch_warm_start.congested_schedule[vehicle][arc_index]
-        model.add_continuous_var(
-            vehicle=vehicle,
-            arc=arc,
-            lb=fixed_departure,
-            ub=fixed_departure,
-            var_type="departure"
-        )
-    else:
-        model.add_continuous_var(
-            vehicle=vehicle,
-            arc=arc,
-            lb=earliest_departure,
-            ub=latest_departure,
-            var_type="departure"
-        )
-
-
-def _add_delay_variable(model: StaggeredRoutingModel, vehicle: int, arc: int, instance: Instance) -> None:
-    """Add delay variable for a specific vehicle and arc."""
-    if vehicle in instance.conflicting_sets[arc]:
-        position = instance.trip_routes[vehicle].index(arc)
-        lb = instance.min_delay_on_arcs[vehicle][position]
-        ub = instance.max_delay_on_arcs[vehicle][position]
-        model.add_continuous_var(vehicle, arc, lb, ub, "delay")
-    else:
-        model.add_continuous_var(vehicle, arc, 0, 0, "delay", True)
-
-
-def _add_load_variable(model: StaggeredRoutingModel, trip: int, arc: int, conflicting_set: list[int]) -> None:
-    """Add load variable for a specific vehicle and arc."""
-    if trip in conflicting_set:
-
-        lb = (sum(model.get_conflict_pair_var_bound(
-            bound="lb", var_name="gamma", arc=arc, first_trip=trip, second_trip=conflicting_trip) for conflicting_trip
-                  in model.get_conflicting_trips(arc, trip)) + 1)
-
-        ub = (sum(model.get_conflict_pair_var_bound(
-            bound="ub", var_name="gamma", arc=arc, first_trip=trip, second_trip=conflicting_trip) for conflicting_trip
-                  in model.get_conflicting_trips(arc, trip)) + 1)
-
-        model.add_continuous_var(trip, arc, lb, ub, "load")
-
-    else:
-        model.add_continuous_var(trip, arc, 1, 1, "load", True)
-
-
-def _add_continuous_variables_vehicle_on_arc(
-        model: StaggeredRoutingModel, instance: Instance, status_quo: Solution, vehicle: int, arc: int,
-        epoch_warm_start
-) -> None:
-    """Add all continuous variables (departure, delay, load) for a specific vehicle and arc."""
-    conflicting_set = instance.conflicting_sets[arc]
-    _add_departure_variable(model, vehicle, arc, instance, status_quo, epoch_warm_start)
-    _add_delay_variable(model, vehicle, arc, instance)
-    _add_load_variable(model, vehicle, arc, conflicting_set)
+        fixed_departures = _get_flat_values(epoch_warm_start.congested_schedule, ragged_routes)
+        earliest_departures, latest_departures = fixed_departures, fixed_departures.copy()
+
+    model.add_continuous_vars("departure", trips, arcs, earliest_departures, latest_departures,
+                              np.ones(len(trips), dtype=bool))
+
+
+def _add_delay_variables(model: StaggeredRoutingModel, instance: Instance, ragged_routes: RaggedRoutes,
+                         member_of_entries: np.ndarray, trips: list[int], arcs: list[int]) -> None:
+    """Add the delay variables; the delay is 0 on arcs where the trip is not in the conflicting set."""
+    is_member = member_of_entries >= 0
+    lb = np.where(is_member, _get_flat_values(instance.min_delay_on_arcs, ragged_routes), 0.0)
+    ub = np.where(is_member, _get_flat_values(instance.max_delay_on_arcs, ragged_routes), 0.0)
+    model.add_continuous_vars("delay", trips, arcs, lb, ub, is_member)
+
+
+def _add_load_variables(model: StaggeredRoutingModel, instance: Instance, member_of_entries: np.ndarray,
+                        trips: list[int], arcs: list[int]) -> None:
+    """Add the load variables; their bounds are the sums of the gamma bounds with the conflicting trips, plus one."""
+    conflict_pairs = instance.conflict_pairs
+    is_member = member_of_entries >= 0
+    load_bounds = []
+    for gamma_bounds in model.get_conflict_vars_bounds("gamma"):
+        member_bound = np.ones(len(conflict_pairs.member_trips), dtype=np.float64)
+        np.add.at(member_bound, conflict_pairs.first_members, gamma_bounds[:, 0])
+        np.add.at(member_bound, conflict_pairs.second_members, gamma_bounds[:, 1])
+        load_bound = np.ones(len(member_of_entries), dtype=np.float64)
+        load_bound[is_member] = member_bound[member_of_entries[is_member]]
+        load_bounds.append(load_bound)
+
+    model.add_continuous_vars("load", trips, arcs, load_bounds[0], load_bounds[1], is_member)
 
 
 def add_continuous_variables(
         model: StaggeredRoutingModel, instance: Instance, status_quo: Solution, epoch_warm_start
 ) -> None:
-    """Create all continuous variables for the optimization model."""
-
-    for trip_id, path in enumerate(instance.trip_routes):
-        for arc in path:
-            _add_continuous_variables_vehicle_on_arc(model, instance, status_quo, trip_id, arc, epoch_warm_start)
+    """Create all continuous variables for the optimization model, in one batch per variable type."""
+    ragged_routes = get_ragged_routes(instance.trip_routes)
+    trips = ragged_routes.trip_of_entries.tolist()
+    arcs = ragged_routes.arcs.tolist()
+    member_of_entries = _get_member_of_entries(instance, ragged_routes)
+
+    _add_departure_variables(model, instance, ragged_routes, epoch_warm_start, trips, arcs)
+    _add_delay_variables(model, instance, ragged_routes, member_of_entries, trips, arcs)
+    _add_load_variables(model, instance, member_of_entries, trips, arcs)
@@ -1,109 +1,68 @@
+import numpy as np
+
 from MIP import StaggeredRoutingModel
+from conflicting_sets.conflict_pairs import ConflictPairs
 from problem.instance import Instance
-from collections import namedtuple
 from input_data import TOLERANCE
 
-# TODO: remove named tuple
-BinariesBounds = namedtuple("BinariesBounds", ["lb_alpha", "ub_alpha", "lb_beta", "ub_beta", "lb_gamma", "ub_gamma"])
-
-
-def _get_bounds_for_binaries(
-        first_vehicle: int, second_vehicle: int, arc: int, instance: Instance
-) -> BinariesBounds:
-    """Calculate bounds for binary variables (alpha, beta, gamma) between two vehicles on a specific arc."""
-    lb_alpha = lb_beta = lb_gamma = 0
-    ub_alpha = ub_beta = ub_gamma = 1
 
-    # Get positions and timing bounds for the vehicles on the arc
-    arc_position_vehicle_1 = instance.trip_routes[first_vehicle].index(arc)
-    arc_position_vehicle_2 = instance.trip_routes[second_vehicle].index(arc)
-
-    earliest_departure_1, latest_departure_1 = (
-        instance.earliest_departure_times[first_vehicle][arc_position_vehicle_1],
-        instance.latest_departure_times[first_vehicle][arc_position_vehicle_1],
-    )
-    earliest_departure_2, latest_departure_2 = (
-        instance.earliest_departure_times[second_vehicle][arc_position_vehicle_2],
-        instance.latest_departure_times[second_vehicle][arc_position_vehicle_2],
-    )
-    earliest_next_departure_2, latest_next_departure_2 = (
-        instance.earliest_departure_times[second_vehicle][arc_position_vehicle_2 + 1],
-        instance.latest_departure_times[second_vehicle][arc_position_vehicle_2 + 1],
-    )
+def _get_member_time_bounds(conflict_pairs: ConflictPairs, instance: Instance) -> tuple[np.ndarray, ...]:
+    """Earliest and latest departures of each conflicting set member on the arc and on the next arc."""
+    earliest_departures, latest_departures, earliest_next_departures, latest_next_departures = (
+        np.empty(len(conflict_pairs.member_trips), dtype=np.float64) for _ in range(4))
+    for member, (trip, position) in enumerate(zip(conflict_pairs.member_trips.tolist(),
+                                                  conflict_pairs.member_positions.tolist())):
+        earliest_departures[member] = instance.earliest_departure_times[trip][position]
+        latest_departures[member] = instance.latest_departure_times[trip][position]
+        earliest_next_departures[member] = instance.earliest_departure_times[trip][position + 1]
+        latest_next_departures[member] = instance.latest_departure_times[trip][position + 1]
+    return earliest_departures, latest_departures, earliest_next_departures, latest_next_departures
+
+
+def get_bounds_for_binaries(first_members: np.ndarray, second_members: np.ndarray,
+                             member_time_bounds: tuple[np.ndarray, ...]) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Calculate bounds for binary variables (alpha, beta, gamma) of the ordered pairs (first, second)."""
+    earliest_departures, latest_departures, earliest_next_departures, latest_next_departures = member_time_bounds
+    earliest_departure_1, latest_departure_1 = earliest_departures[first_members], latest_departures[first_members]
+    earliest_departure_2, latest_departure_2 = earliest_departures[second_members], latest_departures[second_members]
+    earliest_next_departure_2 = earliest_next_departures[second_members]
+    latest_next_departure_2 = latest_next_departures[second_members]
 
     # Use tolerances in comparisons
     alpha_must_be_one = latest_departure_2 < earliest_departure_1 - TOLERANCE
     beta_must_be_one = latest_departure_1 < earliest_next_departure_2 - TOLERANCE
-    gamma_must_be_one = alpha_must_be_one and beta_must_be_one
+    gamma_must_be_one = alpha_must_be_one & beta_must_be_one
 
     alpha_must_be_zero = latest_departure_1 < earliest_departure_2 - TOLERANCE
     beta_must_be_zero = latest_next_departure_2 < earliest_departure_1 - TOLERANCE
+    assert not np.any(alpha_must_be_one & alpha_must_be_zero), "Conflicting bounds for alpha."
+    assert not np.any(beta_must_be_one & beta_must_be_zero), "Conflicting bounds for beta."
 
     # Adjust bounds based on conditions
-    if alpha_must_be_one:
-        assert not alpha_must_be_zero, "Conflicting bounds for alpha."
-        lb_alpha = ub_alpha = 1
-    if beta_must_be_one:
-        assert not beta_must_be_zero, "Conflicting bounds for beta."
-        lb_beta = ub_beta = 1
-    if gamma_must_be_one:
-        lb_gamma = ub_gamma = 1
-
-    if alpha_must_be_zero or beta_must_be_zero:
-        lb_alpha = ub_alpha = lb_beta = ub_beta = lb_gamma = ub_gamma = 0
-
-    return BinariesBounds(lb_alpha, ub_alpha, lb_beta, ub_beta, lb_gamma, ub_gamma)
-
-
-def _add_conflict_variables_between_two_vehicles(model: StaggeredRoutingModel, arc: int, first_vehicle: int,
-                                                 second_vehicle: int,
-                                                 instance: Instance) -> None:
-    """Add binary variables (alpha, beta, gamma) for a vehicle pair on a specific arc."""
-    bounds = _get_bounds_for_binaries(first_vehicle, second_vehicle, arc, instance)
-
-    # Alpha variable
-    alpha_name = f"alpha_arc_{arc}_vehicles_{first_vehicle}_{second_vehicle}"
-    model.add_conflict_pair_var(arc, first_vehicle, second_vehicle, alpha_name, bounds.lb_alpha, bounds.ub_alpha,
-                                "alpha")
-
-    # Beta variable
-    beta_name = f"beta_arc_{arc}_vehicles_{first_vehicle}_{second_vehicle}"
-    model.add_conflict_pair_var(arc, first_vehicle, second_vehicle, beta_name, bounds.lb_beta, bounds.ub_beta, "beta")
-
-    # Gamma variable
-    gamma_name = f"gamma_arc_{arc}_vehicles_{first_vehicle}_{second_vehicle}"
-    model.add_conflict_pair_var(arc, first_vehicle, second_vehicle, gamma_name, bounds.lb_gamma, bounds.ub_gamma,
-                                "gamma")
-
-
-def _add_conflict_variables_among_vehicles_in_conflicting_set(
-        model: StaggeredRoutingModel, arc: int, conflicting_set: list[int], instance: Instance
-) -> None:
-    """Add conflict variables for all pairs of vehicles in a conflicting set."""
-    model.add_arc_conflict_vars(arc)
-
-    for first_trip in conflicting_set:
-        # Initialize dictionaries for the first vehicle if not already present
-        if not model.has_trip_conflict_vars_on_arc(arc, first_trip):
-            model.add_trip_to_arc_conflict_vars(arc, first_trip)
-
-        for second_trip in conflicting_set:
-            if first_trip == second_trip:
-                continue
-
-            # Initialize dictionaries for the second vehicle if not already present
-            if not model.has_trip_conflict_vars_on_arc(arc, second_trip):
-                model.add_trip_to_arc_conflict_vars(arc, second_trip)
-
-            # Add conflict variables between the two vehicles
-            if first_trip < second_trip:
-                _add_conflict_variables_between_two_vehicles(model, arc, first_trip, second_trip, instance)
-                _add_conflict_variables_between_two_vehicles(model, arc, second_trip, first_trip, instance)
+    must_be_zero = alpha_must_be_zero | beta_must_be_zero
+    bounds = {}
+    for var_type, must_be_one in [("alpha", alpha_must_be_one), ("beta", beta_must_be_one),
+                                  ("gamma", gamma_must_be_one)]:
+        lb = np.where(must_be_one & ~must_be_zero, 1, 0).astype(np.int8)
+        ub = np.where(must_be_zero, 0, 1).astype(np.int8)
+        bounds[var_type] = (lb, ub)
+    return bounds
 
 
 def add_conflict_variables(model: StaggeredRoutingModel, instance: Instance) -> None:
-    """Add all conflict variables for each arc and its conflicting set."""
-
-    for arc, conflicting_set in enumerate(instance.conflicting_sets):
-        if conflicting_set:
-            _add_conflict_variables_among_vehicles_in_conflicting_set(model, arc, conflicting_set, instance)
+    """Add all conflict variables for each arc and its conflicting set, in one batch per binary type."""
+    conflict_pairs = instance.conflict_pairs
+    for arc in conflict_pairs.get_conflicting_arcs():
+        model.add_arc_conflict_vars(arc)
+        for trip, _ in conflict_pairs.get_members(arc):
+            model.add_trip_to_arc_conflict_vars(arc, trip)
+
+    member_time_bounds = _get_member_time_bounds(conflict_pairs, instance)
+    bounds_pair = get_bounds_for_binaries(conflict_pairs.first_members, conflict_pairs.second_members,
+                                           member_time_bounds)
+    bounds_inverted_pair = get_bounds_for_binaries(conflict_pairs.second_members, conflict_pairs.first_members,
+                                                    member_time_bounds)
+    for var_type in ["alpha", "beta", "gamma"]:
+        lb = np.column_stack((bounds_pair[var_type][0], bounds_inverted_pair[var_type][0]))
+        ub = np.column_stack((bounds_pair[var_type][1], bounds_inverted_pair[var_type][1]))
+        model.add_conflict_vars(var_type, conflict_pairs, lb, ub)
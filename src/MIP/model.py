@@ -1,5 +1,6 @@
 from __future__ import annotations
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import gurobipy as grb
 from typing import Optional
@@ -15,7 +16,7 @@ from MIP.support import (
 )
 from MIP.integer_variables import add_conflict_variables
 from MIP.continuous_variables import add_continuous_variables
-from MIP.constraints import add_conflict_constraints
+from MIP.constraints import add_conflict_constraints, add_travel_continuity_constraints
 from MIP.callback import callback
 from MIP.warm_start import set_warm_start_model
 from utils.aliases import OptimizationMeasures
@@ -29,6 +30,7 @@ def construct_model(
         status_quo: Solution,
         epoch_warm_start: Solution,
         solver_params: SolverParameters,
+        pwl_epigraph_relaxation: bool = False,
 ) -> StaggeredRoutingModel:
     """
     Construct and initialize the optimization model.
@@ -38,6 +40,8 @@ def construct_model(
         status_quo: The current solution state.
         epoch_warm_start: A warm start solution for the epoch.
         solver_params: Parameters controlling solver behavior.
+        pwl_epigraph_relaxation: Models the convex delay functions with linear cuts only. This is an approximate
+            relaxation (trips may wait on the arcs) whose optimum is a lower bound: the epoch solve never uses it.
 
     Returns:
         StaggeredRoutingModel: The constructed optimization model.
@@ -72,11 +76,11 @@ def construct_model(
     add_continuous_variables(model, instance, status_quo, epoch_warm_start)
     print("Continuous variables added.")
 
-    add_conflict_constraints(model, instance)
+    add_conflict_constraints(model, instance, epoch_warm_start, pwl_epigraph_relaxation)
     print("Conflict constraints added.")
     model.print_num_big_m_constraints()
 
-    model.add_travel_continuity_constraints(instance)
+    add_travel_continuity_constraints(model, instance)
     print("Travel continuity constraints added.")
 
     model.add_objective_function()
@@ -117,8 +121,9 @@ def run_model(model: StaggeredRoutingModel,
               solver_params: SolverParameters,
               cpp_local_search: cpp.cpp_local_search,
               cpp_simplified_epoch_instance: cpp.cpp_instance,
+              additional_warm_starts: Optional[list[Solution]] = None
               ) -> (Optional[OptimizationMeasures], list[float]):
-    """Runs the optimization model with the specified parameters."""
+    """Runs the optimization model with the specified parameters; the additional warm starts are further MIP starts."""
     print("=" * 50)
     print("Starting Model Optimization".center(50))
     print("=" * 50)
@@ -143,15 +148,26 @@ def run_model(model: StaggeredRoutingModel,
 
     if solver_params.warm_start:
         print("Applying warm start to the model...")
-        set_warm_start_model(model, warm_start, instance)
+        set_warm_start_model(model, [warm_start, *(additional_warm_starts or [])], instance)
 
     # Optimize the model
     print("Optimizing the model...")
-    if solver_params.local_search_callback:
-        print("Using local search callback during optimization.")
-        model.optimize(callback(instance, solver_params, cpp_local_search, cpp_simplified_epoch_instance))
+    if solver_params.local_search_callback or model.has_lazy_constraints():
+        if solver_params.local_search_callback:
+            print("Using local search callback during optimization.")
+        with ThreadPoolExecutor(max_workers=1) as local_search_executor:
+            model.optimize(callback(instance, solver_params, cpp_local_search, cpp_simplified_epoch_instance,
+                                    local_search_executor))
+            # Leaving the executor waits for a local search still running, whose result is discarded: stop it
+            if model.get_local_search_future() is not None:
+                cpp_local_search.request_stop()
+                join_start = datetime.datetime.now().timestamp()
+        if model.get_local_search_future() is not None:
+            print(f"Waited {datetime.datetime.now().timestamp() - join_start:.2f} sec for the local search to stop")
+            model.set_local_search_future(None)
     else:
         model.optimize()
+    model.print_num_lazy_constraints()
 
     # Handle infeasible or interrupted cases
     if model.status in [grb.GRB.Status.INFEASIBLE, grb.GRB.Status.UNBOUNDED]:
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
+from MIP.constraints import get_x_and_y_points_pwl_function
+from MIP.integer_variables import get_bounds_for_binaries
+from input_data import CONSTR_TOLERANCE, TOLERANCE
+from problem.epoch_instance import EpochInstance
+from problem.ragged_routes import RaggedRoutes, get_ragged_routes
+
+MAX_PRESOLVE_ITERATIONS = 100
+
+
+@dataclass
+class PresolveBounds:
+    """
+    Time windows and delay bounds of the route entries, as flat arrays aligned with the ragged routes.
+    The departure from the last entry of a route is the arrival of the trip.
+    """
+    earliest_departures: np.ndarray
+    latest_departures: np.ndarray
+    min_delays: np.ndarray
+    max_delays: np.ndarray
+
+    def has_empty_bounds(self) -> bool:
+        return bool(np.any(self.earliest_departures > self.latest_departures + CONSTR_TOLERANCE) or
+                    np.any(self.min_delays > self.max_delays + CONSTR_TOLERANCE))
+
+
+def _get_flat_values(values: list[list[float]], lengths: list[int]) -> np.ndarray:
+    return np.fromiter(itertools.chain.from_iterable(
+        trip_values[:length] for trip_values, length in zip(values, lengths)), dtype=np.float64)
+
+
+def _set_flat_values(values: list[list[float]], lengths: list[int], flat_values: np.ndarray) -> None:
+    """Writes back the flat values into the lists of the trips, which may be longer than the routes."""
+    flat_values_list, start = flat_values.tolist(), 0
+    for trip_values, length in zip(values, lengths):
+        trip_values[:length] = flat_values_list[start:start + length]
+        start += length
+
+
+def _get_bounds(instance: EpochInstance, ragged_routes: RaggedRoutes) -> PresolveBounds:
+    lengths = ragged_routes.get_route_lengths().tolist()
+    return PresolveBounds(
+        earliest_departures=_get_flat_values(instance.earliest_departure_times, lengths),
+        latest_departures=_get_flat_values(instance.latest_departure_times, lengths),
+        min_delays=_get_flat_values(instance.min_delay_on_arcs, lengths),
+        max_delays=_get_flat_values(instance.max_delay_on_arcs, lengths),
+    )
+
+
+def _set_bounds(instance: EpochInstance, ragged_routes: RaggedRoutes, bounds: PresolveBounds) -> None:
+    lengths = ragged_routes.get_route_lengths().tolist()
+    _set_flat_values(instance.earliest_departure_times, lengths, bounds.earliest_departures)
+    _set_flat_values(instance.latest_departure_times, lengths, bounds.latest_departures)
+    _set_flat_values(instance.min_delay_on_arcs, lengths, bounds.min_delays)
+    _set_flat_values(instance.max_delay_on_arcs, lengths, bounds.max_delays)
+
+
+def _tighten(values: np.ndarray, indices: np.ndarray, new_values: np.ndarray, increase: bool) -> bool:
+    """Moves the values towards the new ones where they improve by more than the tolerance."""
+    improves = new_values > values[indices] + TOLERANCE if increase else new_values < values[indices] - TOLERANCE
+    values[indices[improves]] = new_values[improves]
+    return bool(np.any(improves))
+
+
+def _propagate_time_windows(bounds: PresolveBounds, ragged_routes: RaggedRoutes, travel_times: np.ndarray,
+                            is_member: np.ndarray) -> bool:
+    """
+    One pass of the continuity constraints along the routes (departure + travel time + delay = next departure)
+    on the time windows and delay bounds. The delay is zero on the arcs where the trip is not in the conflicting
+    set, as in the model. Returns whether some bound was tightened.
+    """
+    entries = np.flatnonzero(ragged_routes.position_of_entries < ragged_routes.get_route_lengths()[
+        ragged_routes.trip_of_entries] - 1)
+    travel_times = travel_times[entries]
+    min_delays = np.where(is_member[entries], bounds.min_delays[entries], 0.0)
+    max_delays = np.where(is_member[entries], bounds.max_delays[entries], 0.0)
+    earliest, latest = bounds.earliest_departures, bounds.latest_departures
+
+    changed = _tighten(earliest, entries + 1, earliest[entries] + travel_times + min_delays, increase=True)
+    changed |= _tighten(earliest, entries, earliest[entries + 1] - travel_times - max_delays, increase=True)
+    changed |= _tighten(latest, entries + 1, latest[entries] + travel_times + max_delays, increase=False)
+    changed |= _tighten(latest, entries, latest[entries + 1] - travel_times - min_delays, increase=False)
+    changed |= _tighten(bounds.min_delays, entries, earliest[entries + 1] - latest[entries] - travel_times,
+                        increase=True)
+    changed |= _tighten(bounds.max_delays, entries, latest[entries + 1] - earliest[entries] - travel_times,
+                        increase=False)
+    return changed
+
+
+def _get_binaries_bounds(instance: EpochInstance, bounds: PresolveBounds,
+                         member_entries: np.ndarray) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Bounds of the binaries fixed by the time windows, shaped (number of pairs, 2) as in the model."""
+    conflict_pairs = instance.conflict_pairs
+    member_time_bounds = (bounds.earliest_departures[member_entries], bounds.latest_departures[member_entries],
+                          bounds.earliest_departures[member_entries + 1], bounds.latest_departures[member_entries + 1])
+    bounds_pair = get_bounds_for_binaries(conflict_pairs.first_members, conflict_pairs.second_members,
+                                          member_time_bounds)
+    bounds_inverted_pair = get_bounds_for_binaries(conflict_pairs.second_members, conflict_pairs.first_members,
+                                                   member_time_bounds)
+    return {var_type: tuple(np.column_stack((bounds_pair[var_type][bound], bounds_inverted_pair[var_type][bound]))
+                            for bound in range(2))
+            for var_type in ["alpha", "beta", "gamma"]}
+
+
+def _evaluate_pwl_function(x_points: list[float], y_points: list[float], values: np.ndarray) -> np.ndarray:
+    """PWL function of the model, extended beyond the last breakpoint with the slope of the last piece."""
+    function_values = np.interp(values, x_points, y_points)
+    last_slope = (y_points[-1] - y_points[-2]) / (x_points[-1] - x_points[-2])
+    return np.where(values > x_points[-1], y_points[-1] + last_slope * (values - x_points[-1]), function_values)
+
+
+def _tighten_delays_from_loads(instance: EpochInstance, bounds: PresolveBounds, member_entries: np.ndarray,
+                               binaries_bounds: dict[str, tuple[np.ndarray, np.ndarray]]) -> bool:
+    """
+    Bounds the loads with the fixed gammas, and the delays with the delay function of the loads.
+    """
+    conflict_pairs = instance.conflict_pairs
+    load_bounds = []
+    for gamma_bounds in binaries_bounds["gamma"]:
+        load_bound = np.ones(len(member_entries), dtype=np.float64)
+        np.add.at(load_bound, conflict_pairs.first_members, gamma_bounds[:, 0])
+        np.add.at(load_bound, conflict_pairs.second_members, gamma_bounds[:, 1])
+        load_bounds.append(load_bound)
+
+    changed = False
+    for arc in conflict_pairs.get_conflicting_arcs():
+        x_points, y_points = get_x_and_y_points_pwl_function(instance, arc)
+        start, end = conflict_pairs.member_offsets[arc], conflict_pairs.member_offsets[arc + 1]
+        entries = member_entries[start:end]
+        changed |= _tighten(bounds.min_delays, entries,
+                            _evaluate_pwl_function(x_points, y_points, load_bounds[0][start:end]), increase=True)
+        changed |= _tighten(bounds.max_delays, entries,
+                            _evaluate_pwl_function(x_points, y_points, load_bounds[1][start:end]), increase=False)
+    return changed
+
+
+def _count_free_binaries(binaries_bounds: dict[str, tuple[np.ndarray, np.ndarray]]) -> int:
+    return sum(int(np.count_nonzero(lb != ub)) for lb, ub in binaries_bounds.values())
+
+
+def presolve_bounds(instance: EpochInstance) -> None:
+    """
+    Tightens the time windows and delay bounds of the instance before the model is constructed. Alternates
+    between fixing the binaries with the time windows, bounding the loads and delays with the fixed binaries and
+    propagating the delays along the routes, until no bound changes.
+    """
+    print("Presolving bounds...", end=" ")
+    conflict_pairs = instance.conflict_pairs
+    ragged_routes = get_ragged_routes(instance.trip_routes)
+    member_entries = ragged_routes.offsets[conflict_pairs.member_trips] + conflict_pairs.member_positions
+    is_member = np.zeros(len(ragged_routes.arcs), dtype=bool)
+    is_member[member_entries] = True
+    travel_times = np.asarray(instance.travel_times_arcs, dtype=np.float64)[ragged_routes.arcs]
+
+    bounds = _get_bounds(instance, ragged_routes)
+    initial_windows = (bounds.earliest_departures.copy(), bounds.latest_departures.copy())
+    binaries_bounds = _get_binaries_bounds(instance, bounds, member_entries)
+    initial_free_binaries = _count_free_binaries(binaries_bounds)
+
+    iterations, changed = 0, True
+    while changed and iterations < MAX_PRESOLVE_ITERATIONS:
+        iterations += 1
+        changed = _tighten_delays_from_loads(instance, bounds, member_entries, binaries_bounds)
+        changed |= _propagate_time_windows(bounds, ragged_routes, travel_times, is_member)
+        binaries_bounds = _get_binaries_bounds(instance, bounds, member_entries)
+
+    if bounds.has_empty_bounds():
+        print("empty bounds found - the instance is not modified.")
+        return
+    _set_bounds(instance, ragged_routes, bounds)
+
+    free_binaries = _count_free_binaries(binaries_bounds)
+    tightened_windows = np.count_nonzero(
+        (bounds.earliest_departures != initial_windows[0]) |
+        (bounds.latest_departures != initial_windows[1]))
+    print(f"done after {iterations} iterations.")
+    print(f"  Binaries fixed: {initial_free_binaries - free_binaries} of {initial_free_binaries}")
+    print(f"  Big-M constraints removed: {2 * (initial_free_binaries - free_binaries)}")
+    print(f"  Time windows tightened: {tightened_windows} of {len(ragged_routes.arcs)}")
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import datetime
+import gurobipy as grb
 from utils.tools import SuppressOutput
 from input_data import SolverParameters, GUROBI_OPTIMALITY_GAP
 from problem.epoch_instance import EpochInstance
@@ -11,6 +12,19 @@ from MIP import StaggeredRoutingModel
 path_to_results = os.path.join(os.path.dirname(__file__), "../../results")
 
 
+def set_gurobi_solver_parameters(model: grb.Model, solver_params: SolverParameters) -> None:
+    """Set the threading and search parameters of Gurobi chosen in the solver parameters."""
+    model.setParam("NodeFileStart", solver_params.gurobi_node_file_start)
+    model.setParam("Threads", solver_params.gurobi_threads)
+    model.setParam("MIPFocus", solver_params.gurobi_mip_focus)
+    model.setParam("NumericFocus", solver_params.gurobi_numeric_focus)
+    if solver_params.gurobi_concurrent_mip > 1:
+        model.setParam("ConcurrentMIP", solver_params.gurobi_concurrent_mip)
+    if solver_params.gurobi_distributed_mip_jobs > 0:
+        model.setParam("WorkerPool", solver_params.gurobi_worker_pool)
+        model.setParam("DistributedMIPJobs", solver_params.gurobi_distributed_mip_jobs)
+
+
 def set_gurobi_parameters(model: StaggeredRoutingModel, instance: EpochInstance,
                           solver_params: SolverParameters) -> None:
     """Set Gurobi solver parameters based on time and optimization settings."""
@@ -24,11 +38,8 @@ def set_gurobi_parameters(model: StaggeredRoutingModel, instance: EpochInstance,
     model.setParam('OutputFlag', log_val)
     model.setParam("timeLimit", time_remaining)
     model.setParam("MIPGap", GUROBI_OPTIMALITY_GAP * 0.01)
-    model.setParam("NodeFileStart", 0.5)
-    model.setParam("Threads", 1)
-    model.setParam("MIPFocus", 2)
     model.setParam("Disconnected", 0)
-    model.setParam("NumericFocus", 2)
+    set_gurobi_solver_parameters(model, solver_params)
 
 
 def compute_iis_if_not_solved(model: StaggeredRoutingModel) -> None:
@@ -1,36 +1,84 @@
 from __future__ import annotations
-from problem.solution import Solution
+import itertools
+import numpy as np
+from problem.solution import Solution, Binaries
+from problem.ragged_routes import get_ragged_routes
 from MIP import StaggeredRoutingModel
 from problem.instance import Instance
+from utils.aliases import Schedules
+
+
+def get_route_lengths_and_member_entries(instance: Instance) -> tuple[list[int], np.ndarray]:
+    """Lengths of the routes and route entry (as in the ragged routes) of each conflicting set member."""
+    ragged_routes = get_ragged_routes(instance.trip_routes)
+    conflict_pairs = instance.conflict_pairs
+    member_entries = ragged_routes.offsets[conflict_pairs.member_trips] + conflict_pairs.member_positions
+    return ragged_routes.get_route_lengths().tolist(), member_entries
+
+
+def get_continuous_values(model: StaggeredRoutingModel, schedule: Schedules, delays_on_arcs: Schedules,
+                          route_lengths: list[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Columns and values of the departures and delays of a solution."""
+    columns, values = [], []
+    for var_type, trip_values in [("departure", schedule), ("delay", delays_on_arcs)]:
+        columns.append(model.get_continuous_vars_columns(var_type)[0])
+        values.append(np.fromiter(itertools.chain.from_iterable(
+            trip_values[trip][:length] for trip, length in enumerate(route_lengths)), dtype=np.float64))
+    return np.concatenate(columns), np.concatenate(values)
+
+
+def get_load_values(model: StaggeredRoutingModel, instance: Instance, binaries: Binaries,
+                    member_entries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Columns and values of the loads of a solution, empty if it has ties (left to Gurobi)."""
+    load_columns, _ = model.get_continuous_vars_columns("load")
+    if np.any(binaries.gamma == -1):
+        return load_columns[:0], np.zeros(0, dtype=np.float64)
+    conflict_pairs = instance.conflict_pairs
+    loads = np.ones(len(load_columns), dtype=np.float64)
+    np.add.at(loads, member_entries[conflict_pairs.first_members], binaries.gamma[:, 0])
+    np.add.at(loads, member_entries[conflict_pairs.second_members], binaries.gamma[:, 1])
+    return load_columns, loads
+
+
+def get_binary_values(model: StaggeredRoutingModel, binaries: Binaries) -> tuple[np.ndarray, np.ndarray]:
+    """Columns and values of the binaries of a solution, in both orientations of the pairs without ties."""
+    is_set = binaries.gamma != -1
+    columns, values = [], []
+    for var_type, var_binaries in [("alpha", binaries.alpha), ("beta", binaries.beta), ("gamma", binaries.gamma)]:
+        columns.append(model.get_conflict_vars_columns(var_type)[0][is_set])
+        values.append(var_binaries[is_set].astype(np.float64))
+    return np.concatenate(columns), np.concatenate(values)
+
+
+def get_solution_values(model: StaggeredRoutingModel, instance: Instance, schedule: Schedules,
+                        delays_on_arcs: Schedules, binaries: Binaries, route_lengths: list[int],
+                        member_entries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Columns (-1 for constants) and values of all the variables of a solution, so that Gurobi does not have to
+    complete it; only the binaries and loads affected by ties are left out.
+    """
+    binary_columns, binary_values = get_binary_values(model, binaries)
+    continuous_columns, continuous_values = get_continuous_values(model, schedule, delays_on_arcs, route_lengths)
+    load_columns, load_values = get_load_values(model, instance, binaries, member_entries)
+    # The delays are the second half of the continuous values
+    total_delay = continuous_values[len(continuous_values) // 2:].sum()
+    return (np.concatenate((binary_columns, continuous_columns, load_columns, [model.get_total_delay_column()])),
+            np.concatenate((binary_values, continuous_values, load_values, [total_delay])))
 
 
 def set_warm_start_model(model: StaggeredRoutingModel,
-                         warm_start: Solution,
+                         warm_starts: list[Solution],
                          instance: Instance) -> None:
-    """Set initial values for binary variables in the warm start model."""
-    for arc in model.get_list_conflicting_arcs():
-        for first_vehicle, second_vehicle in model.get_arc_conflicting_pairs(arc):
-            if warm_start.binaries.gamma[arc][first_vehicle][second_vehicle] != -1:
-                # First trip binaries
-                first_alpha_to_set = warm_start.binaries.alpha[arc][first_vehicle][second_vehicle]
-                first_beta_to_set = warm_start.binaries.beta[arc][first_vehicle][second_vehicle]
-                first_gamma_to_set = warm_start.binaries.gamma[arc][first_vehicle][second_vehicle]
-                model.set_conflicting_var(first_vehicle, second_vehicle, arc, "alpha", first_alpha_to_set, "start")
-                model.set_conflicting_var(first_vehicle, second_vehicle, arc, "beta", first_beta_to_set, "start")
-                model.set_conflicting_var(first_vehicle, second_vehicle, arc, "gamma", first_gamma_to_set, "start")
-
-                # Second trip binaries (roles inverted)
-                second_alpha_to_set = warm_start.binaries.alpha[arc][second_vehicle][first_vehicle]
-                second_beta_to_set = warm_start.binaries.beta[arc][second_vehicle][first_vehicle]
-                second_gamma_to_set = warm_start.binaries.gamma[arc][second_vehicle][first_vehicle]
-                model.set_conflicting_var(second_vehicle, first_vehicle, arc, "alpha", second_alpha_to_set, "start")
-                model.set_conflicting_var(second_vehicle, first_vehicle, arc, "beta", second_beta_to_set, "start")
-                model.set_conflicting_var(second_vehicle, first_vehicle, arc, "gamma", second_gamma_to_set, "start")
-
-    for trip, route in enumerate(instance.trip_routes):
-        for position, arc in enumerate(route):
-            schedule_value = warm_start.congested_schedule[trip][position]
-            delay_value = warm_start.delays_on_arcs[trip][position]
-
-            model.set_continuous_var(trip, arc, "departure", schedule_value, "start")
-            model.set_continuous_var(trip, arc, "delay", delay_value, "start")
+    """
+    Set the warm starts as MIP starts of the model, the best one first; the values of each start are set in one
+    call over all the variables.
+    """
+    route_lengths, member_entries = get_route_lengths_and_member_entries(instance)
+    if len(warm_starts) > 1:
+        model.NumStart = len(warm_starts)
+    for start_number, warm_start in enumerate(warm_starts):
+        if len(warm_starts) > 1:
+            model.setParam("StartNumber", start_number)
+        model.set_start_values(*get_solution_values(model, instance, warm_start.congested_schedule,
+                                                    warm_start.delays_on_arcs, warm_start.binaries, route_lengths,
+                                                    member_entries))
@@ -1,146 +1,68 @@
-import itertools
-from dataclasses import dataclass
+import numpy as np
+
+from conflicting_sets.conflict_pairs import ConflictPairs
 from problem.solution import Binaries
 from utils.aliases import *
 from input_data import CONSTR_TOLERANCE, TOLERANCE
 
 
-@dataclass
-class VehiclePair:
-    arc: int
-    vehicle_one: int
-    departure_one: float
-    arrival_one: float
-    vehicle_two: int
-    departure_two: float
-    arrival_two: float
-
-
-def update_alpha(binaries: Binaries, vehicle_pair: VehiclePair) -> None:
-    alpha_tie = abs(vehicle_pair.departure_one - vehicle_pair.departure_two) < CONSTR_TOLERANCE - TOLERANCE
-    departure_one_after_two = vehicle_pair.departure_one >= vehicle_pair.departure_two + (CONSTR_TOLERANCE - TOLERANCE)
-
-    if alpha_tie:
-        value = -1
-    elif departure_one_after_two:
-        binaries.alpha[vehicle_pair.arc][vehicle_pair.vehicle_one][vehicle_pair.vehicle_two] = 1
-        binaries.alpha[vehicle_pair.arc][vehicle_pair.vehicle_two][vehicle_pair.vehicle_one] = 0
-        return
-    else:
-        binaries.alpha[vehicle_pair.arc][vehicle_pair.vehicle_one][vehicle_pair.vehicle_two] = 0
-        binaries.alpha[vehicle_pair.arc][vehicle_pair.vehicle_two][vehicle_pair.vehicle_one] = 1
-        return
-
-    binaries.alpha[vehicle_pair.arc][vehicle_pair.vehicle_one][vehicle_pair.vehicle_two] = value
-    binaries.alpha[vehicle_pair.arc][vehicle_pair.vehicle_two][vehicle_pair.vehicle_one] = value
-
-
-def update_beta(binaries: Binaries, vehicle_pair: VehiclePair) -> None:
-    def set_beta(vehicle, departure, arrival):
-        beta_tie = abs(departure - arrival) < CONSTR_TOLERANCE - TOLERANCE
-        departure_after_arrival = departure >= arrival + (CONSTR_TOLERANCE - TOLERANCE)
-
-        if beta_tie:
-            return -1
-        return 0 if departure_after_arrival else 1
-
-    binaries.beta[vehicle_pair.arc][vehicle_pair.vehicle_one][vehicle_pair.vehicle_two] = set_beta(
-        vehicle_pair.vehicle_one, vehicle_pair.departure_one, vehicle_pair.arrival_two
-    )
-    binaries.beta[vehicle_pair.arc][vehicle_pair.vehicle_two][vehicle_pair.vehicle_one] = set_beta(
-        vehicle_pair.vehicle_two, vehicle_pair.departure_two, vehicle_pair.arrival_one
-    )
+def _get_alpha(departures_one: np.ndarray, departures_two: np.ndarray) -> np.ndarray:
+    """alpha = 1 if the first vehicle departs after the second one; the inverted pair gets the complement."""
+    tie = np.abs(departures_one - departures_two) < CONSTR_TOLERANCE - TOLERANCE
+    departure_one_after_two = departures_one >= departures_two + (CONSTR_TOLERANCE - TOLERANCE)
+    alpha = np.stack((departure_one_after_two, ~departure_one_after_two), axis=1).astype(np.int8)
+    alpha[tie] = -1
+    return alpha
 
 
-def update_gamma(binaries: Binaries, vehicle_pair: VehiclePair) -> None:
-    def set_gamma(vehicle_one, vehicle_two):
-        alpha = binaries.alpha[vehicle_pair.arc][vehicle_one][vehicle_two]
-        beta = binaries.beta[vehicle_pair.arc][vehicle_one][vehicle_two]
+def _get_beta(departures: np.ndarray, arrivals: np.ndarray) -> np.ndarray:
+    """beta = 1 if the vehicle departs before the other vehicle arrives."""
+    tie = np.abs(departures - arrivals) < CONSTR_TOLERANCE - TOLERANCE
+    departure_after_arrival = departures >= arrivals + (CONSTR_TOLERANCE - TOLERANCE)
+    beta = np.where(departure_after_arrival, 0, 1).astype(np.int8)
+    beta[tie] = -1
+    return beta
 
-        if alpha == -1 or beta == -1:
-            return -1
-        return 1 if alpha == 1 and beta == 1 else 0
 
-    binaries.gamma[vehicle_pair.arc][vehicle_pair.vehicle_one][vehicle_pair.vehicle_two] = set_gamma(
-        vehicle_pair.vehicle_one, vehicle_pair.vehicle_two
-    )
-    binaries.gamma[vehicle_pair.arc][vehicle_pair.vehicle_two][vehicle_pair.vehicle_one] = set_gamma(
-        vehicle_pair.vehicle_two, vehicle_pair.vehicle_one
-    )
+def _get_gamma(alpha: np.ndarray, beta: np.ndarray) -> np.ndarray:
+    gamma = ((alpha == 1) & (beta == 1)).astype(np.int8)
+    gamma[(alpha == -1) | (beta == -1)] = -1
+    return gamma
 
 
-def initialize_binaries(binaries: Binaries, arc: int, vehicle_pair: VehiclePair) -> None:
-    def ensure_vehicle_entry(vehicle):
-        if vehicle not in binaries.alpha[arc]:
-            binaries.alpha[arc][vehicle] = {}
-            binaries.beta[arc][vehicle] = {}
-            binaries.gamma[arc][vehicle] = {}
-
-    ensure_vehicle_entry(vehicle_pair.vehicle_one)
-    ensure_vehicle_entry(vehicle_pair.vehicle_two)
-
-
-def create_arc_entry(binaries: Binaries, arc: int) -> None:
-    if arc not in binaries.alpha:
-        binaries.alpha[arc] = {}
-        binaries.beta[arc] = {}
-        binaries.gamma[arc] = {}
-
-
-def process_vehicle_pair(binaries: Binaries, vehicle_pair: VehiclePair) -> None:
-    update_alpha(binaries, vehicle_pair)
-    update_beta(binaries, vehicle_pair)
-    update_gamma(binaries, vehicle_pair)
-
-
-def get_conflict_binaries(conflicting_sets: list[list[int]], shortest_paths: list[list[int]],
-                          congested_schedule: Schedules, print_variables=False) -> Binaries:
+def get_conflict_binaries(conflict_pairs: ConflictPairs, congested_schedule: Schedules,
+                          print_variables=False) -> Binaries:
+    """Computes alpha, beta and gamma of all the conflict pairs at once."""
     if print_variables:
         print("Computing conflicting binaries ...", end="")
 
-    binaries = Binaries({}, {}, {})
-    for arc, conflicting_set in enumerate(conflicting_sets):
-        if arc == 0 or not conflicting_set:
-            continue
-
-        create_arc_entry(binaries, arc)
-        for vehicle_one, vehicle_two in itertools.combinations(conflicting_set, 2):
-            position_one = shortest_paths[vehicle_one].index(arc)
-            position_two = shortest_paths[vehicle_two].index(arc)
-
-            vehicle_pair = VehiclePair(
-                arc=arc,
-                vehicle_one=vehicle_one,
-                vehicle_two=vehicle_two,
-                departure_one=congested_schedule[vehicle_one][position_one],
-                arrival_one=congested_schedule[vehicle_one][position_one + 1],
-                departure_two=congested_schedule[vehicle_two][position_two],
-                arrival_two=congested_schedule[vehicle_two][position_two + 1],
-            )
-
-            initialize_binaries(binaries, arc, vehicle_pair)
-            process_vehicle_pair(binaries, vehicle_pair)
-
-    number_of_binaries = sum(
-        len(binaries.alpha[arc]) * len(binaries.alpha[arc][v1])
-        for arc in binaries.alpha for v1 in binaries.alpha[arc]
-    ) * 3
+    departures = np.empty(len(conflict_pairs.member_trips), dtype=np.float64)
+    arrivals = np.empty(len(conflict_pairs.member_trips), dtype=np.float64)
+    for member, (trip, position) in enumerate(zip(conflict_pairs.member_trips.tolist(),
+                                                  conflict_pairs.member_positions.tolist())):
+        departures[member] = congested_schedule[trip][position]
+        arrivals[member] = congested_schedule[trip][position + 1]
+
+    departures_one, arrivals_one = departures[conflict_pairs.first_members], arrivals[conflict_pairs.first_members]
+    departures_two, arrivals_two = departures[conflict_pairs.second_members], arrivals[conflict_pairs.second_members]
+    alpha = _get_alpha(departures_one, departures_two)
+    beta = np.stack((_get_beta(departures_one, arrivals_two), _get_beta(departures_two, arrivals_one)), axis=1)
+    binaries = Binaries(alpha=alpha, beta=beta, gamma=_get_gamma(alpha, beta))
 
     if print_variables:
-        print(f"done! The number of binary variables is {number_of_binaries}")
+        print(f"done! The number of binary variables is {binaries.get_number_of_binaries()}")
 
     return binaries
 
 
-def derive_flows(instance, gammas) -> list[list[int]]:
-    flows = []
-    for vehicle, path in enumerate(instance.trip_routes):
-        vehicle_flows = []
-        for arc in path:
-            if arc in gammas and vehicle in gammas[arc]:
-                flow = sum(gammas[arc][vehicle].values())
-            else:
-                flow = 0
-            vehicle_flows.append(flow)
-        flows.append(vehicle_flows)
+def derive_flows(instance, binaries: Binaries) -> list[list[int]]:
+    conflict_pairs = instance.conflict_pairs
+    member_flows = np.zeros(len(conflict_pairs.member_trips), dtype=np.int64)
+    np.add.at(member_flows, conflict_pairs.first_members, binaries.gamma[:, 0])
+    np.add.at(member_flows, conflict_pairs.second_members, binaries.gamma[:, 1])
+
+    flows = [[0 for _ in path] for path in instance.trip_routes]
+    for trip, position, flow in zip(conflict_pairs.member_trips.tolist(), conflict_pairs.member_positions.tolist(),
+                                    member_flows.tolist()):
+        flows[trip][position] = flow
     return flows
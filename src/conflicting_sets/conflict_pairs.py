@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+
+from input_data import CONSTR_TOLERANCE
+from problem.arc_position_index import TripPositionIndex
+from utils.aliases import ConflictingSets, Schedules
+
+
+@dataclass
+class ConflictPairs:
+    """
+    Pairs of trips sharing a conflicting set, stored in contiguous arrays (CSR over the arcs).
+    The members of the conflicting set of arc `a` are in `[member_offsets[a], member_offsets[a + 1])` of
+    `member_trips`/`member_positions`, in conflicting set order. Its pairs are in `[pair_offsets[a],
+    pair_offsets[a + 1])`, ordered as `itertools.combinations` of the conflicting set. Pairs of trips that cannot
+    be on the arc at the same time are left out.
+    """
+    member_offsets: np.ndarray
+    member_trips: np.ndarray
+    member_positions: np.ndarray
+    pair_offsets: np.ndarray
+    first_members: np.ndarray
+    second_members: np.ndarray
+
+    def __post_init__(self):
+        self.first_trips = self.member_trips[self.first_members]
+        self.second_trips = self.member_trips[self.second_members]
+        self.first_positions = self.member_positions[self.first_members]
+        self.second_positions = self.member_positions[self.second_members]
+        self.pair_arcs = np.repeat(np.arange(len(self.pair_offsets) - 1), np.diff(self.pair_offsets))
+
+    def __len__(self) -> int:
+        return len(self.first_members)
+
+    def get_conflicting_arcs(self) -> list[int]:
+        """Arcs with a non-empty conflicting set."""
+        return np.flatnonzero(np.diff(self.member_offsets)).tolist()
+
+    def get_members(self, arc: int) -> list[tuple[int, int]]:
+        """(trip, position) of the members of the conflicting set of the arc."""
+        start, end = self.member_offsets[arc], self.member_offsets[arc + 1]
+        return list(zip(self.member_trips[start:end].tolist(), self.member_positions[start:end].tolist()))
+
+    def iterate(self, start: int = 0, end: Optional[int] = None) -> Iterator[tuple[int, int, int, int, int]]:
+        """Yields (arc, first trip, second trip, first position, second position) of the pairs in [start, end)."""
+        return zip(self.pair_arcs[start:end].tolist(),
+                   self.first_trips[start:end].tolist(), self.second_trips[start:end].tolist(),
+                   self.first_positions[start:end].tolist(), self.second_positions[start:end].tolist())
+
+
+def _get_combinations(size: int, cache: dict[int, tuple[np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    if size not in cache:
+        cache[size] = np.triu_indices(size, k=1)
+    return cache[size]
+
+
+def _get_overlapping_combinations(earliest_departures: np.ndarray,
+                                  latest_arrivals: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sweep over the members sorted by earliest departure: each member is paired with the following ones that depart
+    at the latest CONSTR_TOLERANCE after its latest arrival. The pairs are returned in combinations order.
+    """
+    order = np.argsort(earliest_departures, kind="stable")
+    sorted_earliest_departures = earliest_departures[order]
+    ends = np.searchsorted(sorted_earliest_departures, latest_arrivals[order] + CONSTR_TOLERANCE, side="right")
+    counts = np.maximum(ends - np.arange(1, len(order) + 1), 0)
+    first_sorted = np.repeat(np.arange(len(order)), counts)
+    pair_starts = np.cumsum(counts) - counts
+    second_sorted = np.arange(counts.sum()) - np.repeat(pair_starts, counts) + first_sorted + 1
+    first, second = order[first_sorted], order[second_sorted]
+    first, second = np.minimum(first, second), np.maximum(first, second)
+    combinations_order = np.lexsort((second, first))
+    return first[combinations_order], second[combinations_order]
+
+
+def get_conflict_pairs(conflicting_sets: ConflictingSets, trip_position_index: TripPositionIndex,
+                       earliest_departure_times: Optional[Schedules] = None,
+                       latest_departure_times: Optional[Schedules] = None) -> ConflictPairs:
+    """
+    Enumerates once the pairs of every conflicting set. The dummy arc 0 is not indexed.
+    With the time bounds, only the pairs whose [earliest departure, latest arrival] windows on the arc overlap are
+    enumerated: the binaries of the other pairs are all fixed to zero.
+    """
+    number_of_arcs = len(conflicting_sets)
+    set_sizes = np.array([len(conflicting_set) if arc != 0 else 0
+                          for arc, conflicting_set in enumerate(conflicting_sets)], dtype=np.int64)
+    member_offsets = np.zeros(number_of_arcs + 1, dtype=np.int64)
+    member_offsets[1:] = np.cumsum(set_sizes)
+    pair_counts = np.zeros(number_of_arcs, dtype=np.int64)
+
+    member_trips = np.empty(member_offsets[-1], dtype=np.int64)
+    member_positions = np.empty(member_offsets[-1], dtype=np.int64)
+    first_members, second_members = [], []
+    combinations_cache = {}
+    for arc in np.flatnonzero(set_sizes).tolist():
+        start, end = member_offsets[arc], member_offsets[arc + 1]
+        member_trips[start:end] = conflicting_sets[arc]
+        member_positions[start:end] = [trip_position_index.get_position(trip, arc) for trip in conflicting_sets[arc]]
+        if earliest_departure_times is None:
+            first, second = _get_combinations(end - start, combinations_cache)
+        else:
+            first, second = _get_overlapping_combinations(
+                np.array([earliest_departure_times[trip][position] for trip, position in
+                          zip(conflicting_sets[arc], member_positions[start:end].tolist())], dtype=np.float64),
+                np.array([latest_departure_times[trip][position + 1] for trip, position in
+                          zip(conflicting_sets[arc], member_positions[start:end].tolist())], dtype=np.float64))
+        pair_counts[arc] = len(first)
+        first_members.append(first + start)
+        second_members.append(second + start)
+
+    pair_offsets = np.zeros(number_of_arcs + 1, dtype=np.int64)
+    pair_offsets[1:] = np.cumsum(pair_counts)
+    first_members = np.concatenate(first_members).astype(np.int64) if first_members else np.zeros(0, dtype=np.int64)
+    second_members = np.concatenate(second_members).astype(np.int64) if second_members else np.zeros(0, dtype=np.int64)
+
+    return ConflictPairs(member_offsets=member_offsets, member_trips=member_trips, member_positions=member_positions,
+                         pair_offsets=pair_offsets, first_members=first_members, second_members=second_members)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from problem.instance import Instance
+from problem.ragged_routes import RaggedRoutes
+
+
+def compute_delay_on_arc(arc: int, instance: Instance, vehicles_on_arc: int) -> float:
+    """
+    Computes the delay on a given arc based on the number of vehicles present.
+    """
+    if arc == 0:
+        return 0
+
+    delay_at_pieces = [0]
+    height_prev_piece = 0
+
+    for i, threshold in enumerate(instance.instance_params.list_of_thresholds):
+        th_capacity = threshold * instance.capacities_arcs[arc]
+        slope = instance.travel_times_arcs[arc] * instance.instance_params.list_of_slopes[i] / instance.capacities_arcs[
+            arc]
+
+        if vehicles_on_arc > th_capacity:
+            delay_current_piece = height_prev_piece + slope * (vehicles_on_arc - th_capacity)
+            delay_at_pieces.append(delay_current_piece)
+
+        if i < len(instance.instance_params.list_of_slopes) - 1:
+            next_th_cap = instance.instance_params.list_of_thresholds[i + 1] * instance.capacities_arcs[arc]
+            height_prev_piece += slope * (next_th_cap - th_capacity)
+
+    return max(delay_at_pieces)
+
+
+@dataclass
+class ArcDelayTables:
+    """
+    Delay on each arc as a function of the number of vehicles on it, tabulated once per instance (CSR layout):
+    the delay of `n` vehicles on arc `a` is `delays[offsets[a] + n]`.
+    """
+    offsets: list[int]
+    delays: list[float]
+    instance: Instance
+
+    def get_delay(self, arc: int, vehicles_on_arc: int) -> float:
+        index = self.offsets[arc] + vehicles_on_arc
+        if index < self.offsets[arc + 1]:
+            return self.delays[index]
+        return compute_delay_on_arc(arc, self.instance, vehicles_on_arc)
+
+
+def get_arc_delay_tables(instance: Instance, ragged_routes: RaggedRoutes) -> ArcDelayTables:
+    """
+    Tabulates `compute_delay_on_arc` with the same floating point operations, for every number of vehicles which
+    can be counted on an arc during the time bounds sweep: at most one arrival and one departure per route entry
+    on the arc, plus the vehicle itself.
+    """
+    number_of_arcs = len(instance.travel_times_arcs)
+    table_sizes = 2 * np.bincount(ragged_routes.arcs, minlength=number_of_arcs) + 2
+    offsets = np.zeros(number_of_arcs + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(table_sizes)
+    arc_of_entries = np.repeat(np.arange(number_of_arcs), table_sizes)
+    vehicles_on_arc = np.arange(offsets[-1]) - offsets[:-1][arc_of_entries]
+
+    capacities = np.asarray(instance.capacities_arcs, dtype=np.float64)[arc_of_entries]
+    travel_times = np.asarray(instance.travel_times_arcs, dtype=np.float64)[arc_of_entries]
+    list_of_slopes = instance.instance_params.list_of_slopes
+    list_of_thresholds = instance.instance_params.list_of_thresholds
+    delays = np.zeros(len(arc_of_entries), dtype=np.float64)
+    height_prev_piece = np.zeros(len(arc_of_entries), dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for i, threshold in enumerate(list_of_thresholds):
+            th_capacity = threshold * capacities
+            slope = travel_times * list_of_slopes[i] / capacities
+            delay_current_piece = height_prev_piece + slope * (vehicles_on_arc - th_capacity)
+            delays = np.where(vehicles_on_arc > th_capacity, np.maximum(delays, delay_current_piece), delays)
+            if i < len(list_of_slopes) - 1:
+                height_prev_piece = height_prev_piece + slope * (list_of_thresholds[i + 1] * capacities - th_capacity)
+    delays[arc_of_entries == 0] = 0.0
+
+    return ArcDelayTables(offsets=offsets.tolist(), delays=delays.tolist(), instance=instance)
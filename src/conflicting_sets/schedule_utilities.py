@@ -1,48 +1,69 @@
 from __future__ import annotations
 import datetime
+import numpy as np
+import cpp_module as cpp
 import conflicting_sets.split
 import utils.prints
-from conflicting_sets.time_bounds import TimeBound, get_initial_latest_arrival_times, get_arc_based_time_bounds, \
-    split_time_bounds_on_arcs, arrange_bounds_by_vehicle, get_undivided_conflicting_sets
+from conflicting_sets.delay_tables import get_arc_delay_tables
+from conflicting_sets.time_bounds import TimeBounds, get_initial_latest_arrival_times, get_arc_based_time_bounds, \
+    split_time_bounds_on_arcs, get_undivided_conflicting_sets
 from problem.instance import Instance
-from input_data import CONSTR_TOLERANCE
+from input_data import CONSTR_TOLERANCE, MIN_SET_CAPACITY, USE_CPP_CONFLICTING_SETS, USE_INCREMENTAL_TIME_BOUNDS
 
 
-def get_max_delay_on_arcs(vehicle_based_time_bounds: list[list[TimeBound]]) -> list[list[float]]:
-    return [
-        [bound.max_delay_on_arc for bound in sorted(bounds_of_one_vehicle, key=lambda x: x.earliest_departure)]
-        for bounds_of_one_vehicle in vehicle_based_time_bounds
-    ]
+def get_max_delay_on_arcs(time_bounds: TimeBounds) -> list[list[float]]:
+    return time_bounds.get_vehicle_based(time_bounds.max_delay_on_arc)
 
 
-def get_min_delay_on_arcs(vehicle_based_time_bounds: list[list[TimeBound]]) -> list[list[float]]:
-    return [
-        [bound.min_delay_on_arc for bound in sorted(bounds_of_one_vehicle, key=lambda x: x.earliest_departure)]
-        for bounds_of_one_vehicle in vehicle_based_time_bounds
-    ]
+def get_min_delay_on_arcs(time_bounds: TimeBounds) -> list[list[float]]:
+    return time_bounds.get_vehicle_based(time_bounds.min_delay_on_arc)
 
 
-def get_earliest_departure_times(vehicle_based_time_bounds: list[list[TimeBound]]) -> list[list[float]]:
-    return [
-        [bound.earliest_departure for bound in sorted(bounds_of_one_vehicle, key=lambda x: x.earliest_departure)]
-        for bounds_of_one_vehicle in vehicle_based_time_bounds
-    ]
+def get_earliest_departure_times(time_bounds: TimeBounds) -> list[list[float]]:
+    return time_bounds.get_vehicle_based(time_bounds.earliest_departure)
 
 
-def get_latest_departure_times(vehicle_based_time_bounds: list[list[TimeBound]]) -> list[list[float]]:
+def get_latest_departure_times(time_bounds: TimeBounds) -> list[list[float]]:
     """
     Calculate the latest departure times for each vehicle based on time bounds.
 
     """
-    return [
-        [
-            bound.latest_departure
-            if bound.latest_departure > bound.earliest_departure
-            else bound.earliest_departure + CONSTR_TOLERANCE
-            for bound in sorted(bounds_of_one_vehicle, key=lambda x: x.earliest_departure)
-        ]
-        for bounds_of_one_vehicle in vehicle_based_time_bounds
+    return time_bounds.get_vehicle_based(np.where(
+        time_bounds.latest_departure > time_bounds.earliest_departure,
+        time_bounds.latest_departure,
+        time_bounds.earliest_departure + CONSTR_TOLERANCE,
+    ))
+
+
+def set_cpp_conflicting_sets(instance: Instance) -> list[int]:
+    """
+    Computes the time bounds fixed point and splits the conflicting sets with cpp_module.
+    Returns the number of time bounds recomputed at each iteration until convergence.
+    """
+    cpp_conflicting_sets = cpp.compute_conflicting_sets(
+        trip_routes=instance.trip_routes,
+        travel_times_arcs=instance.travel_times_arcs,
+        capacities_arcs=instance.capacities_arcs,
+        earliest_departure_times=instance.earliest_departure_times,
+        max_staggering_applicable=instance.max_staggering_applicable,
+        list_of_slopes=instance.instance_params.list_of_slopes,
+        list_of_thresholds=instance.instance_params.list_of_thresholds,
+        min_set_capacity=MIN_SET_CAPACITY,
+        incremental=USE_INCREMENTAL_TIME_BOUNDS,
+    )
+    instance.earliest_departure_times = cpp_conflicting_sets.earliest_departure_times
+    instance.latest_departure_times = cpp_conflicting_sets.latest_departure_times
+    instance.min_delay_on_arcs = cpp_conflicting_sets.min_delay_on_arcs
+    instance.max_delay_on_arcs = cpp_conflicting_sets.max_delay_on_arcs
+    instance.trip_routes = cpp_conflicting_sets.trip_routes
+    instance.update_trip_position_index()
+    instance.travel_times_arcs = cpp_conflicting_sets.travel_times_arcs
+    instance.capacities_arcs = cpp_conflicting_sets.capacities_arcs
+    instance.conflicting_sets = cpp_conflicting_sets.conflicting_sets
+    instance.conflicting_sets_processing_arc_map = [
+        None if arc == -1 else arc for arc in cpp_conflicting_sets.conflicting_sets_processing_arc_map
     ]
+    return cpp_conflicting_sets.touched_bounds
 
 
 def add_conflicting_sets_to_instance(instance: Instance) -> None:
@@ -58,9 +79,35 @@ def add_conflicting_sets_to_instance(instance: Instance) -> None:
     print("----------------------------------------")
     clock_start = datetime.datetime.now().timestamp()
 
-    # Initialize latest arrival times
-    print("Initializing latest arrival times...", end=" ")
-    known_latest_arrival_times = get_initial_latest_arrival_times(instance)
+    if USE_CPP_CONFLICTING_SETS:
+        print("Computing time bounds and splitting conflicting sets in cpp_module...", end=" ")
+        touched_bounds = set_cpp_conflicting_sets(instance)
+        print(f"done.\n  Convergence achieved after {len(touched_bounds)} iterations.")
+        print(f"  Time bounds recomputed per iteration: {touched_bounds}")
+    else:
+        add_conflicting_sets_to_instance_python(instance)
+    instance.update_arc_position_in_routes_map()
+    instance.update_conflict_pairs()
+
+    # Measure and display execution time
+    clock_end = datetime.datetime.now().timestamp()
+    print("----------------------------------------")
+    print(f"Process completed! Total execution time: {clock_end - clock_start:.2f} seconds")
+    print("========================================\n")
+
+    utils.prints.print_conflicting_sets_info(instance)
+
+
+def add_conflicting_sets_to_instance_python(instance: Instance) -> None:
+    """
+    Python implementation of the time bounds fixed point and of the conflicting sets splitting. Every iteration
+    recomputes all the time bounds: USE_INCREMENTAL_TIME_BOUNDS only applies to cpp_module.
+    """
+    # Initialize latest arrival times and delay tables
+    print("Initializing latest arrival times and delay tables...", end=" ")
+    ragged_trip_routes = instance.get_ragged_trip_routes()
+    delay_tables = get_arc_delay_tables(instance, ragged_trip_routes)
+    known_latest_arrival_times = get_initial_latest_arrival_times(instance, ragged_trip_routes)
     print("done.")
 
     # Iteratively refine time bounds until convergence
@@ -69,16 +116,13 @@ def add_conflicting_sets_to_instance(instance: Instance) -> None:
     while True:
         iteration += 1
         print(f"  Iteration {iteration}: Computing arc-based time bounds...", end=" ")
-        arc_based_time_bounds = get_arc_based_time_bounds(instance, known_latest_arrival_times)
-        bounds_on_arcs_split = split_time_bounds_on_arcs(instance, arc_based_time_bounds)
-        vehicle_based_time_bounds = arrange_bounds_by_vehicle(arc_based_time_bounds, instance.trip_routes)
+        time_bounds = get_arc_based_time_bounds(instance, ragged_trip_routes, delay_tables,
+                                                known_latest_arrival_times)
         print("done.")
 
         # Extract new latest arrival times
         print("  Extracting new latest arrival times...", end=" ")
-        new_latest_arrival_times = [
-            [bound.latest_arrival for bound in bounds] for bounds in vehicle_based_time_bounds
-        ]
+        new_latest_arrival_times = time_bounds.latest_arrival.tolist()
         print("done.")
 
         # Break loop if arrival times have converged
@@ -87,27 +131,19 @@ def add_conflicting_sets_to_instance(instance: Instance) -> None:
             break
         else:
             print(f"  Convergence not yet achieved. Updating arrival times...")
-        known_latest_arrival_times = new_latest_arrival_times[:]
+        known_latest_arrival_times = new_latest_arrival_times
 
     # Update instance properties
     print("\nUpdating instance properties...", end=" ")
-    undivided_conflicting_sets = get_undivided_conflicting_sets(instance, bounds_on_arcs_split)
-    instance.earliest_departure_times = get_earliest_departure_times(vehicle_based_time_bounds)
-    instance.latest_departure_times = get_latest_departure_times(vehicle_based_time_bounds)
-    instance.min_delay_on_arcs = get_min_delay_on_arcs(vehicle_based_time_bounds)
-    instance.max_delay_on_arcs = get_max_delay_on_arcs(vehicle_based_time_bounds)
+    bounds_on_arcs_split = split_time_bounds_on_arcs(instance, time_bounds)
+    undivided_conflicting_sets = get_undivided_conflicting_sets(instance, time_bounds, bounds_on_arcs_split)
+    instance.earliest_departure_times = get_earliest_departure_times(time_bounds)
+    instance.latest_departure_times = get_latest_departure_times(time_bounds)
+    instance.min_delay_on_arcs = get_min_delay_on_arcs(time_bounds)
+    instance.max_delay_on_arcs = get_max_delay_on_arcs(time_bounds)
     print("done.")
 
     # Split conflicting sets
     print("Splitting conflicting sets...", end=" ")
     conflicting_sets.split.split_conflicting_sets(instance, undivided_conflicting_sets)
-    instance.update_arc_position_in_routes_map()
     print("done.")
-
-    # Measure and display execution time
-    clock_end = datetime.datetime.now().timestamp()
-    print("----------------------------------------")
-    print(f"Process completed! Total execution time: {clock_end - clock_start:.2f} seconds")
-    print("========================================\n")
-
-    utils.prints.print_conflicting_sets_info(instance)
@@ -20,11 +20,9 @@ def update_vehicle_paths_in_conflicting_set(instance: Instance, arc: int) -> Non
     last_arc_created = len(instance.travel_times_arcs) - 1
     for vehicle in instance.conflicting_sets[last_arc_created]:
         # Replace the old arc with the new arc in the vehicle's path
-        try:
-            old_arc_index = instance.trip_routes[vehicle].index(arc)
-        except ValueError:
-            raise ValueError
+        old_arc_index = instance.get_arc_position_in_trip_route(vehicle, arc)
         instance.trip_routes[vehicle][old_arc_index] = last_arc_created
+        instance.trip_position_index.replace_arc(vehicle, arc, last_arc_created)
 
 
 def split_conflicting_sets(instance: Instance, undivided_conflicting_sets) -> None:
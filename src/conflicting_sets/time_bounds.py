@@ -1,361 +1,294 @@
 from __future__ import annotations
-import copy
-from queue import PriorityQueue
+import heapq
+import itertools
+from dataclasses import dataclass
+
+import numpy as np
+
 from input_data import ACTIVATE_ASSERTIONS, MIN_SET_CAPACITY, TOLERANCE
+from conflicting_sets.delay_tables import ArcDelayTables
+from conflicting_sets.time_bounds_index import ArcDeparturesIndex, ArcArrivalsIndex, DepartureKey
 from problem.instance import Instance
+from problem.ragged_routes import RaggedRoutes
 from utils.aliases import *
-from functools import total_ordering
-
-
-@total_ordering
-class TimeBound:
-    def __init__(self, arc, vehicle, position, earliest_departure, latest_arrival, earliest_arrival,
-                 latest_departure):
-        self.arc = arc
-        self.vehicle = vehicle
-        self.position = position
-        self.earliest_departure = earliest_departure
-        self.latest_departure = latest_departure
-        self.earliest_arrival = earliest_arrival
-        self.latest_arrival = latest_arrival
-        self.min_delay_on_arc = earliest_arrival - earliest_departure
-        self.max_delay_on_arc = latest_arrival - earliest_departure
-
-    @classmethod
-    def complete(
-            cls,
-            arc,
-            vehicle,
-            position,
-            earliest_departure,
-            latest_departure,
-            earliest_arrival,
-            latest_arrival,
-            min_delay_on_arc,
-            max_delay_on_arc,
-    ):
-        """Create a TimeBound instance with all fields initialized."""
-        time_bound = cls(arc, vehicle, position, earliest_departure, latest_arrival,
-                         earliest_arrival, latest_departure)
-        time_bound.min_delay_on_arc = min_delay_on_arc
-        time_bound.max_delay_on_arc = max_delay_on_arc
-        return time_bound
-
-    def update_earliest_departure(self, new_value):
-        self.earliest_departure = new_value
-
-    def __eq__(self, other):
-        if not isinstance(other, TimeBound):
-            return NotImplemented
-        # Two instances are equal if their earliest_departure is within TOLERANCE and vehicles are the same
-        return (
-                abs(self.earliest_departure - other.earliest_departure) < TOLERANCE
-                and self.vehicle == other.vehicle
-        )
 
-    def __lt__(self, other):
-        if not isinstance(other, TimeBound):
-            return NotImplemented
-        # Compare earliest_departure with TOLERANCE, then compare vehicles
-        if abs(self.earliest_departure - other.earliest_departure) < TOLERANCE:
-            return self.vehicle < other.vehicle
-        return self.earliest_departure < other.earliest_departure
 
-
-def split_time_bounds_on_arcs(instance: Instance, time_bounds_on_arcs: list[list[TimeBound]]) -> list[
-    list[list[TimeBound]]]:
+@dataclass
+class TimeBounds:
     """
-    Splits time bounds on arcs into sets based on non-overlapping intervals.
+    Time bounds of all the trips as a struct of arrays aligned with the flat routes (see RaggedRoutes):
+    the bound of trip `t` at position `p` is entry `offsets[t] + p`.
     """
-    bounds_on_arcs_split = [[] for _ in instance.travel_times_arcs]
+    ragged_routes: RaggedRoutes
+    earliest_departure: np.ndarray
+    latest_departure: np.ndarray
+    earliest_arrival: np.ndarray
+    latest_arrival: np.ndarray
+    min_delay_on_arc: np.ndarray
+    max_delay_on_arc: np.ndarray
 
-    for arc, time_bounds in enumerate(time_bounds_on_arcs[1:], start=1):
-        max_latest_arrival = float('-inf')
-        bounds_split = []
+    @property
+    def arc(self) -> np.ndarray:
+        return self.ragged_routes.arcs
 
-        for vehicle_bounds in sorted(time_bounds, key=lambda x: x.earliest_departure):
-            if vehicle_bounds.earliest_departure > max_latest_arrival + TOLERANCE:
-                if bounds_split:
-                    bounds_on_arcs_split[arc].append(bounds_split)
-                bounds_split = []
-            bounds_split.append(vehicle_bounds)
-            max_latest_arrival = max(max_latest_arrival, vehicle_bounds.latest_arrival)
+    @property
+    def vehicle(self) -> np.ndarray:
+        return self.ragged_routes.trip_of_entries
 
-        if bounds_split:
-            bounds_on_arcs_split[arc].append(bounds_split)
+    @property
+    def position(self) -> np.ndarray:
+        return self.ragged_routes.position_of_entries
 
-    return bounds_on_arcs_split
+    def get_vehicle_based(self, values: np.ndarray) -> list[list[float]]:
+        """Values of the bounds grouped by vehicle, in route order."""
+        return self.ragged_routes.split(values)
 
+    def get_arc_based_order(self) -> np.ndarray:
+        """Entries sorted by arc, then by earliest departure (within TOLERANCE) and vehicle."""
+        return np.lexsort((self.vehicle, np.round(self.earliest_departure / TOLERANCE), self.arc))
 
-def arrange_bounds_by_vehicle(arc_based_time_bounds: list[list[TimeBound]], paths: list[list[int]]) -> list[
-    list[TimeBound]]:
-    """
-    Rearranges time bounds from arc-based to vehicle-based grouping.
-    """
-    vehicle_based_time_bounds: list[list[TimeBound]] = [[] for _ in paths]
 
-    for arc, arc_time_bounds in enumerate(arc_based_time_bounds):
-        for bound in arc_time_bounds:
-            vehicle_based_time_bounds[bound.vehicle].append(bound)
+class QueuedDeparture:
+    """Entry of the departures heap, ordered by earliest departure (within TOLERANCE) and vehicle."""
+    __slots__ = ("earliest_departure", "vehicle", "entry")
 
-    return [
-        sorted(vehicle_bounds, key=lambda x: x.earliest_departure)
-        for vehicle_bounds in vehicle_based_time_bounds
-    ]
+    def __init__(self, earliest_departure: float, vehicle: int, entry: int):
+        self.earliest_departure = earliest_departure
+        self.vehicle = vehicle
+        self.entry = entry
 
+    def __lt__(self, other: QueuedDeparture) -> bool:
+        if abs(self.earliest_departure - other.earliest_departure) < TOLERANCE:
+            return self.vehicle < other.vehicle
+        return self.earliest_departure < other.earliest_departure
 
-def compute_delay_on_arc(arc: int, instance: Instance, vehicles_on_arc: int) -> float:
+
+def get_arc_based_entries(time_bounds: TimeBounds, number_of_arcs: int) -> tuple[np.ndarray, np.ndarray]:
     """
-    Computes the delay on a given arc based on the number of vehicles present.
+    Entries of the bounds sorted by arc and earliest departure (ties in the arc-based order),
+    with the offsets of each arc in the sorted entries.
     """
-    if arc == 0:
-        return 0
+    arc_based_order = time_bounds.get_arc_based_order()
+    earliest_departures = time_bounds.earliest_departure[arc_based_order]
+    arcs = time_bounds.arc[arc_based_order]
+    # Stable sort by earliest departure within each arc
+    sorted_entries = arc_based_order[np.lexsort((earliest_departures, arcs))]
+    arc_offsets = np.searchsorted(time_bounds.arc[sorted_entries], np.arange(number_of_arcs + 1))
+    return sorted_entries, arc_offsets
 
-    delay_at_pieces = [0]
-    height_prev_piece = 0
 
-    for i, threshold in enumerate(instance.instance_params.list_of_thresholds):
-        th_capacity = threshold * instance.capacities_arcs[arc]
-        slope = instance.travel_times_arcs[arc] * instance.instance_params.list_of_slopes[i] / instance.capacities_arcs[
-            arc]
+def split_bounds_on_arc(earliest_departures: list[float], latest_arrivals: list[float]) -> list[list[int]]:
+    """
+    Splits the bounds of one arc, sorted by earliest departure, into sets based on non-overlapping intervals.
+    Returns the indices of the bounds in each set.
+    """
+    bounds_on_arc_split = []
+    max_latest_arrival = float('-inf')
+    bounds_split = []
 
-        if vehicles_on_arc > th_capacity:
-            delay_current_piece = height_prev_piece + slope * (vehicles_on_arc - th_capacity)
-            delay_at_pieces.append(delay_current_piece)
+    for index, (earliest_departure, latest_arrival) in enumerate(zip(earliest_departures, latest_arrivals)):
+        if earliest_departure > max_latest_arrival + TOLERANCE:
+            if bounds_split:
+                bounds_on_arc_split.append(bounds_split)
+            bounds_split = []
+        bounds_split.append(index)
+        max_latest_arrival = max(max_latest_arrival, latest_arrival)
 
-        if i < len(instance.instance_params.list_of_slopes) - 1:
-            next_th_cap = instance.instance_params.list_of_thresholds[i + 1] * instance.capacities_arcs[arc]
-            height_prev_piece += slope * (next_th_cap - th_capacity)
+    if bounds_split:
+        bounds_on_arc_split.append(bounds_split)
 
-    return max(delay_at_pieces)
+    return bounds_on_arc_split
 
 
-def get_earliest_departures_list_and_pq(
-        instance: Instance,
-        known_latest_arrival_times,
-) -> tuple[list[list[TimeBound]], PriorityQueue]:
+def split_time_bounds_on_arcs(instance: Instance, time_bounds: TimeBounds) -> list[list[list[int]]]:
     """
-    Generates a list of earliest departures per arc and initializes a priority queue for processing.
+    Splits time bounds on arcs into sets based on non-overlapping intervals.
+    Returns the entries of the bounds in each set.
     """
-    # Initialize a priority queue and an empty list for arc-based earliest departures
-    earliest_departures_priority_queue = PriorityQueue()
-    arc_based_earliest_departures = [[] for _ in instance.travel_times_arcs]
-
-    # Populate the arc-based earliest departures and priority queue
-    for vehicle, earliest_departure_times in enumerate(instance.earliest_departure_times):
-        for position, earliest_departure in enumerate(earliest_departure_times):
-            arc = instance.trip_routes[vehicle][position]
-            latest_arrival = known_latest_arrival_times[vehicle][position]
-            earliest_arrival = earliest_departure + instance.travel_times_arcs[arc]
-            latest_departure = (
-                earliest_departure + instance.max_staggering_applicable[vehicle]
-                if position == 0
-                else known_latest_arrival_times[vehicle][position - 1]
-            )
+    number_of_arcs = len(instance.travel_times_arcs)
+    sorted_entries, arc_offsets = get_arc_based_entries(time_bounds, number_of_arcs)
+    sorted_entries_list = sorted_entries.tolist()
+    earliest_departures = time_bounds.earliest_departure[sorted_entries].tolist()
+    latest_arrivals = time_bounds.latest_arrival[sorted_entries].tolist()
+
+    bounds_on_arcs_split = [[] for _ in range(number_of_arcs)]
+    for arc in range(1, number_of_arcs):
+        start, end = arc_offsets[arc], arc_offsets[arc + 1]
+        bounds_on_arcs_split[arc] = [
+            [sorted_entries_list[start + index] for index in bounds_split]
+            for bounds_split in split_bounds_on_arc(earliest_departures[start:end], latest_arrivals[start:end])
+        ]
 
-            # Create a TimeBound instance
-            departure = TimeBound(
-                arc=arc,
-                vehicle=vehicle,
-                position=position,
-                earliest_departure=earliest_departure,
-                latest_departure=latest_departure,
-                earliest_arrival=earliest_arrival,
-                latest_arrival=latest_arrival,
-            )
+    return bounds_on_arcs_split
 
-            # Add to arc-based list and priority queue
-            arc_based_earliest_departures[arc].append(departure)
-            if position == 0:
-                earliest_departures_priority_queue.put(departure)
 
-    # Sort each arc by earliest departure time and vehicle ID
-    for arc in arc_based_earliest_departures:
-        arc.sort(key=lambda x: (round(x.earliest_departure / TOLERANCE), x.vehicle))
+def get_earliest_departures_index_and_pq(
+        instance: Instance,
+        ragged_routes: RaggedRoutes,
+        earliest_departure_times: list[float],
+) -> tuple[list[ArcDeparturesIndex], list[QueuedDeparture]]:
+    """
+    Generates the time-sorted index of earliest departures per arc and initializes a priority queue (heap)
+    for processing.
+    """
+    arc_based_earliest_departures: list[list[DepartureKey]] = [[] for _ in instance.travel_times_arcs]
+    for entry, (arc, vehicle) in enumerate(zip(ragged_routes.arcs.tolist(), ragged_routes.trip_of_entries.tolist())):
+        arc_based_earliest_departures[arc].append((earliest_departure_times[entry], vehicle, entry))
 
-    return arc_based_earliest_departures, earliest_departures_priority_queue
+    # The first departure of each trip is scheduled, the next ones once the previous arc is processed
+    earliest_departures_priority_queue = []
+    for vehicle, (start, end) in enumerate(zip(ragged_routes.offsets[:-1].tolist(),
+                                               ragged_routes.offsets[1:].tolist())):
+        if start < end:
+            heapq.heappush(earliest_departures_priority_queue,
+                           QueuedDeparture(earliest_departure_times[start], vehicle, start))
 
+    return ([ArcDeparturesIndex(departures) for departures in arc_based_earliest_departures],
+            earliest_departures_priority_queue)
 
-def propagate_min_delay(earliest_departures: list[list[TimeBound]], min_delay_on_this_arc: float,
-                        departure: TimeBound, instance: Instance) -> None:
+
+def propagate_min_delay(earliest_departures: list[ArcDeparturesIndex], earliest_departure_times: list[float],
+                        min_delay_on_this_arc: float, departure: QueuedDeparture, arcs: list[int],
+                        route_end: int) -> None:
     """
     Propagates a minimum delay along the vehicle's route for subsequent arcs.
     """
     if min_delay_on_this_arc < TOLERANCE:
         return
 
-    if departure.arc == 0:
+    if arcs[departure.entry] == 0:
         return  # No need to propagate delay for the last arc
 
-    path = instance.trip_routes[departure.vehicle]
-    current_position = path.index(departure.arc)
-
-    indices_departures_next_arcs = {
-        arc: next(
-            id_ed for id_ed, ed in enumerate(earliest_departures[arc])
-            if departure.vehicle == ed.vehicle
-        )
-        for arc in path[current_position + 1:]
-    }
+    for entry in range(departure.entry + 1, route_end):
+        old_departure = earliest_departure_times[entry]
+        new_departure = old_departure + min_delay_on_this_arc
+        earliest_departures[arcs[entry]].delay((old_departure, departure.vehicle, entry), new_departure)
+        earliest_departure_times[entry] = new_departure
 
-    for arc, index in indices_departures_next_arcs.items():
-        new_time = earliest_departures[arc][index].earliest_departure + min_delay_on_this_arc
-        earliest_departures[arc][index].update_earliest_departure(new_time)
 
-
-def combine_conflicts(conflicting_arrivals: list[TimeBound], conflicting_departures: list[TimeBound]) -> list[
-    tuple[float, str]]:
+def combine_conflicts(conflicting_latest_arrivals: list[float], conflicting_departures: list[DepartureKey],
+                      known_latest_arrival_times: list[float],
+                      latest_departure_time: float) -> list[tuple[float, str]]:
     """
-    Combines conflicting arrivals and departures into a sorted list of events.
+    Merges the (already sorted) conflicting arrivals and departures into a sorted list of events.
+    Arrivals after the latest departure are not relevant and are skipped.
+    Ties are ordered as arrivals, departures, and then arrivals of the departing vehicles.
     """
-    arrivals = [(arrival.latest_arrival, 'a') for arrival in conflicting_arrivals]
-    departures = [(departure.earliest_departure, 'd') for departure in conflicting_departures]
-    latest_arrivals = [(departure.latest_arrival, 'a') for departure in conflicting_departures]
-
-    list_of_events = arrivals + departures + latest_arrivals
-    return sorted(list_of_events, key=lambda x: x[0])
+    arrivals = [(arrival, 'a') for arrival in conflicting_latest_arrivals]
+    departures = [(departure, 'd') for departure, _, _ in conflicting_departures]
+    latest_arrivals = sorted(
+        ((known_latest_arrival_times[entry], 'a') for _, _, entry in conflicting_departures
+         if not known_latest_arrival_times[entry] > latest_departure_time - TOLERANCE), key=lambda x: x[0])
 
-
-def get_conflicting_latest_arrivals(
-        arc_based_arrivals: list[list[TimeBound]], earliest_departure: TimeBound
-) -> list[TimeBound]:
-    """
-    Get conflicting latest arrivals for a given earliest departure.
-    """
-    return [
-        arrival
-        for arrival in arc_based_arrivals[earliest_departure.arc]
-        if arrival.latest_arrival > earliest_departure.earliest_departure - TOLERANCE
-    ]
+    # The three lists are sorted runs: the stable sort only merges them
+    return sorted(arrivals + departures + latest_arrivals, key=lambda x: x[0])
 
 
 def get_conflicting_departures(
-        all_earliest_departures: list[list[TimeBound]],
-        current_earliest_departure: TimeBound,
+        all_earliest_departures: list[ArcDeparturesIndex],
+        arc: int,
+        current_earliest_departure: QueuedDeparture,
         current_latest_departure: float,
-) -> list[TimeBound]:
+) -> list[DepartureKey]:
     """
-    Get a list of conflicting departures for a given departure event.
+    Get a list of conflicting departures for a given departure event, sorted by earliest departure.
 
     A conflicting departure is one on the same arc, with a different vehicle, and whose earliest departure
     falls within the range of the current earliest and latest departure times.
     """
-    # Extract departures for the current arc
-    arc_departures = all_earliest_departures[current_earliest_departure.arc]
-
-    # Find conflicting departures
-    conflicting_departures = []
-    for other_departure in arc_departures:
-        is_different_vehicle = other_departure.vehicle != current_earliest_departure.vehicle
-        is_within_time_window = (
-                current_earliest_departure.earliest_departure - TOLERANCE
-                <= other_departure.earliest_departure
-                <= current_latest_departure + TOLERANCE
-        )
-
-        if is_different_vehicle and is_within_time_window:
-            conflicting_departures.append(other_departure)
-
-    return conflicting_departures
+    return all_earliest_departures[arc].get_departures_in_window(
+        current_earliest_departure.earliest_departure - TOLERANCE,
+        current_latest_departure + TOLERANCE,
+        excluded_vehicle=current_earliest_departure.vehicle,
+    )
 
 
-def assert_time_bound(time_bound: TimeBound) -> None:
+def assert_time_bound(earliest_departure: float, latest_departure: float, earliest_arrival: float,
+                      latest_arrival: float) -> None:
     """
     Assert that a given time bound is valid based on arrival and departure times.
     """
     if ACTIVATE_ASSERTIONS:
+        details = (earliest_departure, latest_departure, earliest_arrival, latest_arrival)
         assert (
-                time_bound.latest_arrival - time_bound.earliest_arrival > -TOLERANCE
-        ), f"TimeBoundError#1: Latest arrival <= Earliest arrival. Details: {time_bound}"
+                latest_arrival - earliest_arrival > -TOLERANCE
+        ), f"TimeBoundError#1: Latest arrival <= Earliest arrival. Details: {details}"
         assert (
-                time_bound.latest_departure - time_bound.earliest_departure > -TOLERANCE
-        ), f"TimeBoundError#2: Latest departure <= Earliest departure. Details: {time_bound}"
-
-
-def get_latest_departure(
-        earliest_departure: TimeBound,
-        instance: Instance,
-        arc_based_time_bounds: list[list[TimeBound]]
-) -> float:
-    """
-    Calculate the latest possible departure time for a given earliest departure.
-    """
-    if earliest_departure.position == 0:
-        # First arc
-        return earliest_departure.earliest_departure + instance.max_staggering_applicable[
-            earliest_departure.vehicle]
-    else:
-        previous_arc = instance.trip_routes[earliest_departure.vehicle][earliest_departure.position - 1]
-        previous_bound = next(
-            (bound.latest_arrival for bound in arc_based_time_bounds[previous_arc]
-             if bound.vehicle == earliest_departure.vehicle),
-            None
-        )
-        return previous_bound
+                latest_departure - earliest_departure > -TOLERANCE
+        ), f"TimeBoundError#2: Latest departure <= Earliest departure. Details: {details}"
 
 
 def get_earliest_arrival_time(
-        conflicting_arrivals: list[TimeBound],
+        arrivals_on_arc: ArcArrivalsIndex,
         current_latest_departure: float,
         instance: Instance,
-        earliest_departure: TimeBound
+        delay_tables: ArcDelayTables,
+        arc: int,
+        earliest_departure: float,
 ) -> tuple[float, float]:
     """
     Calculate the earliest possible arrival time for a given departure.
+    Only the vehicles which arrive after the latest departure can be on the arc for sure.
     """
     arc_capacity_threshold = max(
         MIN_SET_CAPACITY,
-        instance.capacities_arcs[earliest_departure.arc] * instance.instance_params.list_of_thresholds[0]
+        instance.capacities_arcs[arc] * instance.instance_params.list_of_thresholds[0]
     )
     min_vehicles_on_arc = sum(
-        1 for arrival in conflicting_arrivals
+        1 for arrival_ea, arrival_la, arrival_ld in arrivals_on_arc.get_arrivals_with_earliest_arrival_after(
+            current_latest_departure)
         if
-        arrival.latest_departure + TOLERANCE < earliest_departure.earliest_departure and current_latest_departure < arrival.earliest_arrival - TOLERANCE
+        arrival_la > earliest_departure - TOLERANCE and
+        arrival_ld + TOLERANCE < earliest_departure and current_latest_departure < arrival_ea - TOLERANCE
     ) + 1
 
-    min_delay = compute_delay_on_arc(
-        earliest_departure.arc, instance, min_vehicles_on_arc
-    ) if min_vehicles_on_arc >= arc_capacity_threshold else 0
+    min_delay = delay_tables.get_delay(arc, min_vehicles_on_arc) if min_vehicles_on_arc >= arc_capacity_threshold else 0
 
-    earliest_arrival_time = (
-            earliest_departure.earliest_departure + min_delay + instance.travel_times_arcs[earliest_departure.arc]
-    )
+    earliest_arrival_time = earliest_departure + min_delay + instance.travel_times_arcs[arc]
     return earliest_arrival_time, min_delay
 
 
 def get_latest_arrival_time(
-        conflicting_arrivals: list[TimeBound],
-        conflicting_departures: list[TimeBound],
-        earliest_departure: TimeBound,
+        arrivals_on_arc: ArcArrivalsIndex,
+        conflicting_departures: list[DepartureKey],
+        known_latest_arrival_times: list[float],
+        arc: int,
+        earliest_departure: float,
         latest_departure_time: float,
         instance: Instance,
+        delay_tables: ArcDelayTables,
 ) -> tuple[float, float]:
     """
     Calculate the latest possible arrival time for a given departure event.
     """
-    nominal_travel_time = instance.travel_times_arcs[earliest_departure.arc]
+    nominal_travel_time = instance.travel_times_arcs[arc]
     max_delay = 0.0
 
-    sorted_events = combine_conflicts(conflicting_arrivals, conflicting_departures)
+    # Conflicting arrivals: bounds on the arc whose latest arrival is after the earliest departure
+    start_conflicts = earliest_departure - TOLERANCE
+    number_of_conflicting_arrivals = arrivals_on_arc.count_latest_arrivals_after(start_conflicts)
     current_latest_arrival = latest_departure_time + nominal_travel_time
 
-    if not sorted_events:
+    if not number_of_conflicting_arrivals and not conflicting_departures:
         return current_latest_arrival, 0
 
-    vehicles_on_arc = len(conflicting_arrivals) + 1
-    filtered_events = [
-        event for event in sorted_events if not (event[1] == "a" and event[0] > latest_departure_time - TOLERANCE)
-    ]
+    vehicles_on_arc = number_of_conflicting_arrivals + 1
+    filtered_events = combine_conflicts(
+        arrivals_on_arc.get_latest_arrivals_between(start_conflicts, latest_departure_time - TOLERANCE),
+        conflicting_departures,
+        known_latest_arrival_times,
+        latest_departure_time,
+    )
     filtered_events.append((latest_departure_time, "latest_departure"))
 
     for interval_end, event_type in filtered_events:
-        delay = compute_delay_on_arc(earliest_departure.arc, instance, vehicles_on_arc)
+        delay = delay_tables.get_delay(arc, vehicles_on_arc)
         latest_arrival = interval_end + delay + nominal_travel_time
 
         if latest_arrival > current_latest_arrival + TOLERANCE:
-            current_latest_arrival = copy.copy(latest_arrival)
+            current_latest_arrival = latest_arrival
         if delay > max_delay + TOLERANCE:
-            max_delay = copy.copy(delay)
+            max_delay = delay
 
         vehicles_on_arc += 1 if event_type == "d" else -1 if event_type == "a" else 0
 
@@ -364,106 +297,116 @@ def get_latest_arrival_time(
 
 def get_arc_based_time_bounds(
         instance: Instance,
-        known_latest_arrival_times: Schedules,
-) -> list[list[TimeBound]]:
+        ragged_routes: RaggedRoutes,
+        delay_tables: ArcDelayTables,
+        known_latest_arrival_times: list[float],
+) -> TimeBounds:
     """
     Computes time bounds for all arcs in the network based on earliest and latest departures and arrivals.
+    The departures and the computed bounds are indexed by time on each arc, so that the conflicts of a
+    departure are found with binary searches instead of scanning the whole arc.
+    The known latest arrival times and the returned bounds are aligned with the flat routes.
     """
     # Initialize data structures
-    arc_based_time_bounds: list[list[TimeBound]] = [[] for _ in instance.travel_times_arcs]
-    arc_based_earliest_departures, edpq = get_earliest_departures_list_and_pq(instance,
-                                                                              known_latest_arrival_times)
-
-    while not edpq.empty():
+    number_of_entries = len(ragged_routes.arcs)
+    arcs = ragged_routes.arcs.tolist()
+    route_starts, route_ends = ragged_routes.offsets[:-1].tolist(), ragged_routes.offsets[1:].tolist()
+    # Earliest departures used to find the conflicts, delayed by the min delay of the previous arcs
+    earliest_departure_times = list(itertools.chain.from_iterable(instance.earliest_departure_times))
+    arc_based_arrivals = [ArcArrivalsIndex() for _ in instance.travel_times_arcs]
+    arc_based_earliest_departures, edpq = get_earliest_departures_index_and_pq(instance, ragged_routes,
+                                                                               earliest_departure_times)
+
+    # Struct of arrays of the computed bounds
+    earliest_departures = [0.0] * number_of_entries
+    latest_departures = [0.0] * number_of_entries
+    earliest_arrivals = [0.0] * number_of_entries
+    latest_arrivals = [0.0] * number_of_entries
+    min_delays = [0.0] * number_of_entries
+    max_delays = [0.0] * number_of_entries
+
+    while edpq:
         # Process the next earliest departure
-        earliest_departure = edpq.get()
-        latest_departure = get_latest_departure(earliest_departure, instance, arc_based_time_bounds)
-
-        # Find conflicting arrivals and earliest departures
-        conflicting_arrivals = get_conflicting_latest_arrivals(arc_based_time_bounds, earliest_departure)
+        earliest_departure = heapq.heappop(edpq)
+        entry, vehicle = earliest_departure.entry, earliest_departure.vehicle
+        arc = arcs[entry]
+        latest_departure = (earliest_departure.earliest_departure + instance.max_staggering_applicable[vehicle]
+                            if entry == route_starts[vehicle] else latest_arrivals[entry - 1])
+        arrivals_on_arc = arc_based_arrivals[arc]
+
+        # Find conflicting earliest departures
         conflicting_earliest_departures = get_conflicting_departures(arc_based_earliest_departures,
+                                                                     arc,
                                                                      earliest_departure,
                                                                      latest_departure,
                                                                      )
 
         # Calculate earliest and latest arrival times
         earliest_arrival, min_delay_on_arc = get_earliest_arrival_time(
-            conflicting_arrivals, latest_departure, instance, earliest_departure
+            arrivals_on_arc, latest_departure, instance, delay_tables, arc, earliest_departure.earliest_departure
         )
-        propagate_min_delay(arc_based_earliest_departures, min_delay_on_arc, earliest_departure, instance)
+        propagate_min_delay(arc_based_earliest_departures, earliest_departure_times, min_delay_on_arc,
+                            earliest_departure, arcs, route_ends[vehicle])
 
         latest_arrival, max_delay_on_arc = get_latest_arrival_time(
-            conflicting_arrivals,
+            arrivals_on_arc,
             conflicting_earliest_departures,
-            earliest_departure,
+            known_latest_arrival_times,
+            arc,
+            earliest_departure.earliest_departure,
             latest_departure,
             instance,
+            delay_tables,
         )
 
-        # Create and validate a new time bound
-        time_bound = TimeBound.complete(
-            arc=earliest_departure.arc,
-            position=earliest_departure.position,
-            vehicle=earliest_departure.vehicle,
-            earliest_departure=earliest_departure.earliest_departure,
-            latest_departure=latest_departure,
-            earliest_arrival=earliest_arrival,
-            latest_arrival=latest_arrival,
-            min_delay_on_arc=min_delay_on_arc,
-            max_delay_on_arc=max_delay_on_arc,
-        )
-        assert_time_bound(time_bound)
-
-        # Append the time bound to the arc's list
-        arc_based_time_bounds[earliest_departure.arc].append(time_bound)
+        # Store and validate the new time bound
+        assert_time_bound(earliest_departure.earliest_departure, latest_departure, earliest_arrival, latest_arrival)
+        earliest_departures[entry] = earliest_departure.earliest_departure
+        latest_departures[entry] = latest_departure
+        earliest_arrivals[entry] = earliest_arrival
+        latest_arrivals[entry] = latest_arrival
+        min_delays[entry] = min_delay_on_arc
+        max_delays[entry] = max_delay_on_arc
+        arrivals_on_arc.add(earliest_arrival, latest_arrival, latest_departure)
 
         # Schedule the next departure if the vehicle continues traveling
-        vehicle_is_traveling = instance.trip_routes[earliest_departure.vehicle][earliest_departure.position] != 0
+        vehicle_is_traveling = arc != 0 and entry + 1 < route_ends[vehicle]
         if vehicle_is_traveling:
-            next_arc = instance.trip_routes[earliest_departure.vehicle][earliest_departure.position + 1]
-            next_arc_travel_time = instance.travel_times_arcs[next_arc]
-            next_earliest_departure = TimeBound(
-                earliest_departure=earliest_arrival,
-                arc=next_arc,
-                vehicle=earliest_departure.vehicle,
-                position=earliest_departure.position + 1,
-                latest_arrival=known_latest_arrival_times[earliest_departure.vehicle][earliest_departure.position + 1],
-                earliest_arrival=earliest_arrival + next_arc_travel_time,
-                latest_departure=latest_arrival
-            )
-            edpq.put(next_earliest_departure)
-
-    # Sort time bounds on each arc by earliest departure time and vehicle ID
-    arc_based_time_bounds = [
-        sorted(
-            time_bounds_on_arc,
-            key=lambda x: (round(x.earliest_departure / TOLERANCE), x.vehicle)
-        )
-        for time_bounds_on_arc in arc_based_time_bounds
-    ]
-
-    return arc_based_time_bounds
+            heapq.heappush(edpq, QueuedDeparture(earliest_arrival, vehicle, entry + 1))
+
+    return TimeBounds(
+        ragged_routes=ragged_routes,
+        earliest_departure=np.array(earliest_departures, dtype=np.float64),
+        latest_departure=np.array(latest_departures, dtype=np.float64),
+        earliest_arrival=np.array(earliest_arrivals, dtype=np.float64),
+        latest_arrival=np.array(latest_arrivals, dtype=np.float64),
+        min_delay_on_arc=np.array(min_delays, dtype=np.float64),
+        max_delay_on_arc=np.array(max_delays, dtype=np.float64),
+    )
 
 
-def get_initial_latest_arrival_times(instance: Instance) -> list[list[float]]:
+def get_initial_latest_arrival_times(instance: Instance, ragged_routes: RaggedRoutes) -> list[float]:
     """
     The function calculates the latest arrival times for each vehicle at each stop,
     ensuring they respect the vehicle's deadline and account for available slack time.
+    The times are aligned with the flat routes.
     """
-
-    return [[instance.earliest_departure_times[trip_id][position] + instance.travel_times_arcs[arc] for position, arc in
-             enumerate(route)] for trip_id, route in enumerate(instance.trip_routes)]
+    earliest_departure_times = np.fromiter(itertools.chain.from_iterable(instance.earliest_departure_times),
+                                           dtype=np.float64, count=len(ragged_routes.arcs))
+    travel_times = np.asarray(instance.travel_times_arcs, dtype=np.float64)[ragged_routes.arcs]
+    return (earliest_departure_times + travel_times).tolist()
 
 
 def get_undivided_conflicting_sets(
-        instance: Instance, bounds_on_arcs_split: list[list[list[TimeBound]]]
+        instance: Instance, time_bounds: TimeBounds, bounds_on_arcs_split: list[list[list[int]]]
 ) -> UndividedConflictingSets:
     """
     Computes undivided conflicting sets for arcs based on the time bounds.
     """
+    vehicles = time_bounds.vehicle.tolist()
     undivided_conflicting_sets = [
         [
-            [time_bound.vehicle for time_bound in bounds_set]
+            [vehicles[entry] for entry in bounds_set]
             if len(bounds_set) > max(
                 MIN_SET_CAPACITY, instance.capacities_arcs[arc] * instance.instance_params.list_of_thresholds[0]
             )
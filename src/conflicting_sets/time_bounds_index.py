@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+from typing import Iterable, Iterator
+
+# Departure on an arc: (earliest departure, vehicle, entry of the departure in the flat routes)
+DepartureKey = tuple[float, int, int]
+# Computed bound on an arc: (earliest arrival, latest arrival, latest departure)
+Arrival = tuple[float, float, float]
+# Position in a SortedBlockList: (block, position in the block)
+Location = tuple[int, int]
+
+
+class SortedBlockList:
+    """
+    Sorted sequence stored as consecutive sorted blocks of bounded size, with the maximum of each block.
+    It is built with one sort; adding or removing a value bisects the maxima and then shifts a single block,
+    so updates cost O(log n + BLOCK_SIZE) instead of O(n) for a flat sorted list.
+    """
+    BLOCK_SIZE = 256
+
+    def __init__(self, values: Iterable = ()):
+        values = sorted(values)
+        self.blocks: list[list] = [values[start:start + self.BLOCK_SIZE]
+                                   for start in range(0, len(values), self.BLOCK_SIZE)]
+        self.maxes: list = [block[-1] for block in self.blocks]
+        self.length = len(values)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator:
+        return itertools.chain.from_iterable(self.blocks)
+
+    def _locate_left(self, value) -> Location:
+        """Location of the first value >= value."""
+        block_index = bisect.bisect_left(self.maxes, value)
+        if block_index == len(self.blocks):
+            return block_index, 0
+        return block_index, bisect.bisect_left(self.blocks[block_index], value)
+
+    def _locate_right(self, value) -> Location:
+        """Location of the first value > value."""
+        block_index = bisect.bisect_right(self.maxes, value)
+        if block_index == len(self.blocks):
+            return block_index, 0
+        return block_index, bisect.bisect_right(self.blocks[block_index], value)
+
+    def _get_values_between(self, first: Location, last: Location) -> list:
+        """Values from the first location (included) to the last location (excluded)."""
+        (first_block, first_position), (last_block, last_position) = first, last
+        if first >= last:
+            return []
+        if first_block == last_block:
+            return self.blocks[first_block][first_position:last_position]
+        values = self.blocks[first_block][first_position:]
+        for block in self.blocks[first_block + 1:last_block]:
+            values.extend(block)
+        if last_block < len(self.blocks):
+            values.extend(self.blocks[last_block][:last_position])
+        return values
+
+    def add(self, value) -> None:
+        """Inserts the value after the values equal to it."""
+        self.length += 1
+        if not self.blocks:
+            self.blocks.append([value])
+            self.maxes.append(value)
+            return
+        block_index = min(bisect.bisect_right(self.maxes, value), len(self.blocks) - 1)
+        block = self.blocks[block_index]
+        bisect.insort_right(block, value)
+        if len(block) > 2 * self.BLOCK_SIZE:
+            self.blocks.insert(block_index + 1, block[self.BLOCK_SIZE:])
+            self.maxes.insert(block_index + 1, block[-1])
+            del block[self.BLOCK_SIZE:]
+        self.maxes[block_index] = block[-1]
+
+    def remove(self, value) -> None:
+        """Removes one value equal to the given one, which must be in the list."""
+        block_index, position = self._locate_left(value)
+        block = self.blocks[block_index]
+        assert block[position] == value, f"{value} is not in the sorted list"
+        del block[position]
+        self.length -= 1
+        if block:
+            self.maxes[block_index] = block[-1]
+        else:
+            del self.blocks[block_index]
+            del self.maxes[block_index]
+
+    def count_greater_than(self, value) -> int:
+        """Number of values > value."""
+        block_index, position = self._locate_right(value)
+        return self.length - sum(len(block) for block in self.blocks[:block_index]) - position
+
+    def irange(self, minimum, maximum=None, include_minimum: bool = True) -> list:
+        """Sorted values from the minimum (included or not) to the maximum (included, or to the end if None)."""
+        first = self._locate_left(minimum) if include_minimum else self._locate_right(minimum)
+        last = (len(self.blocks), 0) if maximum is None else self._locate_right(maximum)
+        return self._get_values_between(first, last)
+
+
+class ArcDeparturesIndex:
+    """
+    Earliest departures of the vehicles traversing one arc, kept sorted by (earliest departure, vehicle).
+    Supports window queries, and moving a departure when its earliest departure is delayed.
+    """
+
+    def __init__(self, keys: list[DepartureKey]):
+        self.keys = SortedBlockList(keys)
+
+    def delay(self, key: DepartureKey, new_earliest_departure: float) -> None:
+        self.keys.remove(key)
+        self.keys.add((new_earliest_departure, key[1], key[2]))
+
+    def get_departures_in_window(self, start: float, end: float, excluded_vehicle: int) -> list[DepartureKey]:
+        """Departures with start <= earliest departure <= end, sorted by earliest departure."""
+        return [key for key in self.keys.irange((start,), (end, float("inf"))) if key[1] != excluded_vehicle]
+
+
+class ArcArrivalsIndex:
+    """
+    Time bounds already computed on one arc, kept sorted by latest arrival and by earliest arrival.
+    """
+
+    def __init__(self):
+        self.latest_arrivals = SortedBlockList()
+        self.arrivals_by_earliest_arrival = SortedBlockList()
+
+    def add(self, earliest_arrival: float, latest_arrival: float, latest_departure: float) -> None:
+        self.latest_arrivals.add(latest_arrival)
+        self.arrivals_by_earliest_arrival.add((earliest_arrival, latest_arrival, latest_departure))
+
+    def count_latest_arrivals_after(self, time: float) -> int:
+        """Number of bounds with latest arrival > time."""
+        return self.latest_arrivals.count_greater_than(time)
+
+    def get_latest_arrivals_between(self, start: float, end: float) -> list[float]:
+        """Sorted latest arrivals with start < latest arrival <= end."""
+        return self.latest_arrivals.irange(start, end, include_minimum=False)
+
+    def get_arrivals_with_earliest_arrival_after(self, time: float) -> list[Arrival]:
+        """Bounds with earliest arrival > time."""
+        return self.arrivals_by_earliest_arrival.irange((time, float("inf")))
@@ -10,14 +10,24 @@ from typing import Optional
 
 # Global configuration parameters
 SAVE_CPP = True  # Saves files to run catch2 tests in cpp_module
+USE_INSTANCE_SNAPSHOTS = True  # Loads preprocessed instances from binary snapshots when available
+USE_CPP_CONFLICTING_SETS = True  # Computes time bounds and conflicting sets with cpp_module
+USE_INCREMENTAL_TIME_BOUNDS = True  # Recomputes only the time bounds affected by the previous iteration (cpp_module path only: the python path recomputes all of them)
+MIP_PROCESSES = 1  # Processes solving the MIPs of independent groups of trips of an epoch (1: one model); spawning the workers takes a few seconds per epoch
 ACTIVATE_ASSERTIONS = False
 FIX_MODEL = False
 USE_GUROBI_INDICATORS = False
+USE_BOUNDS_PRESOLVE = False  # Tightens time windows, delay bounds and binaries before constructing the MIP
+USE_BATCHED_CONSTRAINTS = True  # Adds the conflict, load and continuity constraints in matrix blocks with addMConstr
+USE_LAZY_CONFLICT_CONSTRAINTS = False  # Adds the alpha/beta big-M constraints of the pairs not seeded by the warm start only when an incumbent violates them (batched constraints only)
+NAME_MODEL_VARIABLES = False  # Names the MIP variables (debugging only, slows down the model construction)
 SPEED_KPH = 20  # kph
 TOLERANCE = 1e-6
 MIN_SET_CAPACITY = 1.01
 CONSTR_TOLERANCE = 1e-3
 GUROBI_OPTIMALITY_GAP = 0.01
+CALLBACK_BOUNDS_INTERVAL = 1.0  # [s] between two records of the bounds in the MIP callback
+MIP_STARTS = 1  # MIP starts given to Gurobi: the warm start, then the status quo and local searches from randomly staggered start times
 dateExperiment = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
 os.environ['USE_PYGEOS'] = '0'  # Suppress warning from Shapely library
 
@@ -78,8 +88,18 @@ class SolverParameters:
     set_of_experiments: Optional[str]
     verbose_model: bool
     start_algorithm_clock: float = 0
+    # Gurobi parameters of the epoch models
+    gurobi_threads: int = 1
+    gurobi_mip_focus: int = 2
+    gurobi_numeric_focus: int = 2
+    gurobi_node_file_start: float = 0.5  # [GB] of nodes kept in memory before writing them to disk
+    gurobi_concurrent_mip: int = 1  # Independent MIP solves sharing the threads (1: off), for large offline epochs
+    gurobi_distributed_mip_jobs: int = 0  # Distributed MIP workers of gurobi_worker_pool (0: off)
+    gurobi_worker_pool: Optional[str] = None  # Gurobi Remote Services cluster, e.g. "server1:61000"
 
     def __post_init__(self):
+        if self.gurobi_distributed_mip_jobs > 0 and self.gurobi_worker_pool is None:
+            raise ValueError("Distributed MIP jobs need a Gurobi worker pool.")
         self.path_to_results = self.instance_parameters.path_to_instance.parent / (f"{self.get_string_mode()}/"
                                                                                    f"OPT{'YES' if self.optimize else 'NO'}_"
                                                                                    f"WARM{'YES' if self.warm_start else 'NO'}_"
@@ -180,6 +200,25 @@ def format_set_of_experiments_string(s: str):
         return s
 
 
+def format_worker_pool(arg_string_worker_pool: str) -> Optional[str]:
+    """
+    Gurobi worker pool: "None" (or empty) for no pool, otherwise a comma-separated list of servers
+    "host[:port]", optionally with the http(s):// scheme of a Cluster Manager.
+    """
+    worker_pool = arg_string_worker_pool.strip()
+    if worker_pool in ("", "None"):
+        return None
+    servers = [server.strip() for server in worker_pool.split(",")]
+    for server in servers:
+        address = server.split("://", 1)[1] if "://" in server else server
+        host, separator, port = address.partition(":")
+        if not host or any(character.isspace() for character in address) or (
+                separator and not (port.isdigit() and 0 < int(port) < 65536)):
+            raise ValueError(f"Invalid server '{server}' in Gurobi worker pool '{arg_string_worker_pool}': "
+                             f"expected host[:port].")
+    return ",".join(servers)
+
+
 def get_input_from_dicts(instance_params_dict: dict, solver_params_dict: dict) -> \
         (InstanceParameters, SolverParameters):
     """Called when using console args - transforms dicts in params"""
@@ -215,7 +254,14 @@ def get_input_from_dicts(instance_params_dict: dict, solver_params_dict: dict) -
         local_search_callback=format_bool(solver_params_dict["local_search_callback"]),
         epoch_time_limit=int(solver_params_dict["epoch_time_limit"]),
         verbose_model=format_bool(solver_params_dict["verbose_model"]),
-        simplify=format_bool(solver_params_dict["simplify"])
+        simplify=format_bool(solver_params_dict["simplify"]),
+        gurobi_threads=int(solver_params_dict.get("gurobi_threads", 1)),
+        gurobi_mip_focus=int(solver_params_dict.get("gurobi_mip_focus", 2)),
+        gurobi_numeric_focus=int(solver_params_dict.get("gurobi_numeric_focus", 2)),
+        gurobi_node_file_start=float(solver_params_dict.get("gurobi_node_file_start", 0.5)),
+        gurobi_concurrent_mip=int(solver_params_dict.get("gurobi_concurrent_mip", 1)),
+        gurobi_distributed_mip_jobs=int(solver_params_dict.get("gurobi_distributed_mip_jobs", 0)),
+        gurobi_worker_pool=format_worker_pool(solver_params_dict.get("gurobi_worker_pool", "None"))
     )
 
     return instance_params, solver_params
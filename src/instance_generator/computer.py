@@ -13,6 +13,7 @@ from instance_generator import real_world_graphs as real_world_graphs, real_worl
 from instance_generator.network import Network
 from instance_generator.trip import Trips
 from input_data import InstanceParameters
+from problem.arc_position_index import ArcPositionIndex, get_arc_position_index
 
 
 class InstanceComputer:
@@ -50,9 +51,12 @@ class InstanceComputer:
         """Create a CPP instance for the given epoch."""
         routes = trips.get_routes()
         travel_time_arcs = network.travel_time_arcs
+        arc_position_index = self.get_arc_position_in_routes_map(travel_time_arcs, routes)
         return cpp.cpp_instance(
             set_of_vehicle_paths=routes,
-            arc_position_in_routes_map=self.get_arc_position_in_routes_map(travel_time_arcs, routes),
+            arc_position_offsets=arc_position_index.offsets,
+            arc_position_trips=arc_position_index.trip_ids,
+            arc_position_positions=arc_position_index.positions,
             travel_times_arcs=travel_time_arcs,
             capacities_arcs=network.nominal_capacities_arcs,
             list_of_slopes=self.instance_params.list_of_slopes,
@@ -86,18 +90,9 @@ class InstanceComputer:
         return [[float("inf") for _ in route] for route in trip_routes]
 
     @staticmethod
-    def get_arc_position_in_routes_map(travel_times_arcs, trip_routes) -> list[list[int]]:
+    def get_arc_position_in_routes_map(travel_times_arcs, trip_routes) -> ArcPositionIndex:
         """Maps the arc to the position in the trip routes. Used for efficient operations of local search"""
-        arc_to_pos_map = [[-1 for _ in range(len(trip_routes))] for _ in
-                          range(len(travel_times_arcs))]  # size of arcs
-
-        for trip, route in enumerate(trip_routes):
-            for position, arc in enumerate(route):
-                if arc == 0:
-                    continue
-                arc_to_pos_map[arc][trip] = position
-
-        return arc_to_pos_map
+        return get_arc_position_index(trip_routes, len(travel_times_arcs))
 
     def _set_deadlines(self, trips: Trips, status_quo: cpp.cpp_solution):
         """Set deadlines to trips once computed status quo"""
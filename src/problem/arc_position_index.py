@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+
+from utils.aliases import TripID, Position
+
+
+@dataclass
+class ArcPositionIndex:
+    """
+    Sparse (CSR) index of the position of each arc in the routes of the trips traversing it.
+    The trips of arc `a` are stored, sorted by trip id, in `trip_ids[offsets[a]:offsets[a + 1]]`.
+    """
+    offsets: list[int]
+    trip_ids: list[TripID]
+    positions: list[Position]
+
+    def get_position(self, arc: int, trip: TripID) -> Position:
+        """Return the position of the arc in the trip route, or -1 if the trip does not traverse it."""
+        start, end = self.offsets[arc], self.offsets[arc + 1]
+        index = bisect.bisect_left(self.trip_ids, trip, start, end)
+        if index < end and self.trip_ids[index] == trip:
+            return self.positions[index]
+        return -1
+
+    def get_number_of_entries(self) -> int:
+        return len(self.trip_ids)
+
+
+def get_arc_position_index(trip_routes: list[list[int]], number_of_arcs: int) -> ArcPositionIndex:
+    """Build the arc position index in a single pass over the routes. The dummy sink arc 0 is not indexed."""
+    trips_on_arcs: list[list[TripID]] = [[] for _ in range(number_of_arcs)]
+    positions_on_arcs: list[list[Position]] = [[] for _ in range(number_of_arcs)]
+
+    for trip, route in enumerate(trip_routes):
+        for position, arc in enumerate(route):
+            if arc == 0:
+                continue
+            if trips_on_arcs[arc] and trips_on_arcs[arc][-1] == trip:
+                # Arc visited twice by the same trip: keep the last position
+                positions_on_arcs[arc][-1] = position
+                continue
+            trips_on_arcs[arc].append(trip)
+            positions_on_arcs[arc].append(position)
+
+    offsets = [0]
+    for trips in trips_on_arcs:
+        offsets.append(offsets[-1] + len(trips))
+
+    return ArcPositionIndex(
+        offsets=offsets,
+        trip_ids=[trip for trips in trips_on_arcs for trip in trips],
+        positions=[position for positions in positions_on_arcs for position in positions],
+    )
+
+
+def get_route_positions(route: list[int]) -> dict[int, Position]:
+    """Position of each arc in the route (the first one if the route traverses the arc twice, as `list.index`)."""
+    positions = {}
+    for position, arc in enumerate(route):
+        positions.setdefault(arc, position)
+    return positions
+
+
+class TripPositionIndex:
+    """
+    (trip, arc) -> position of the arc in the trip route, kept up to date when the routes are edited so that the
+    lookups are O(1) instead of `trip_routes[trip].index(arc)`.
+    """
+
+    def __init__(self, trip_routes: list[list[int]]):
+        self.positions: list[dict[int, Position]] = [get_route_positions(route) for route in trip_routes]
+
+    def get_position(self, trip: TripID, arc: int) -> Position:
+        try:
+            return self.positions[trip][arc]
+        except KeyError:
+            raise ValueError(f"Arc {arc} is not in the route of trip {trip}") from None
+
+    def replace_arc(self, trip: TripID, old_arc: int, new_arc: int) -> None:
+        """The arc at the position of old_arc in the route is now new_arc."""
+        self.positions[trip][new_arc] = self.positions[trip].pop(old_arc)
+
+    def update_trip(self, trip: TripID, route: list[int]) -> None:
+        """Arcs have been removed from or merged in the route of the trip."""
+        self.positions[trip] = get_route_positions(route)
+
+    def remove_trip(self, trip: TripID) -> None:
+        self.positions.pop(trip)
@@ -2,10 +2,16 @@ from __future__ import annotations
 
 import datetime
 
+import numpy as np
+
 import conflicting_sets.schedule_utilities
+import problem.snapshot
+import utils.prints
+from pathlib import Path
 from problem.instance import Instance
 from typing import Optional
-from input_data import SolverParameters, CONSTR_TOLERANCE, TOLERANCE
+from input_data import InstanceParameters, SolverParameters, CONSTR_TOLERANCE, TOLERANCE, USE_INSTANCE_SNAPSHOTS, \
+    MIN_SET_CAPACITY, USE_CPP_CONFLICTING_SETS
 
 
 class EpochInstance(Instance):
@@ -61,6 +67,53 @@ class EpochInstance(Instance):
             max_staggering_applicable=max_staggering_applicable,
         )
 
+    @classmethod
+    def from_snapshot(cls, epoch_id: int, instance_params: InstanceParameters,
+                      snapshot: dict[str, list]) -> EpochInstance:
+        """Restores a preprocessed epoch instance without recomputing its conflicting sets."""
+        epoch_instance = cls.__new__(cls)
+        epoch_instance.epoch_id = epoch_id
+        epoch_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+        epoch_instance.clock_end_epoch = None
+        epoch_instance.removed_vehicles = []
+        epoch_instance.removed_arcs = []
+        epoch_instance.instance_params = instance_params
+        epoch_instance.node_based_trip_routes = None
+        for name, value in snapshot.items():
+            setattr(epoch_instance, name, value)
+        epoch_instance.conflicting_sets_processing_arc_map = [
+            arc if arc >= 0 else None for arc in epoch_instance.conflicting_sets_processing_arc_map
+        ]
+        epoch_instance.update_arc_position_in_routes_map()
+        epoch_instance.update_trip_position_index()
+        epoch_instance.update_conflict_pairs()
+        return epoch_instance
+
+    def save_snapshot(self, path: Path) -> None:
+        """Saves the preprocessed epoch instance, i.e., after the conflicting sets have been added."""
+        problem.snapshot.save_snapshot(
+            path,
+            flat_attributes={
+                "trip_original_ids": self.trip_original_ids,
+                "release_times": self.release_times,
+                "deadlines": self.deadlines,
+                "max_staggering_applicable": self.max_staggering_applicable,
+                "travel_times_arcs": self.travel_times_arcs,
+                "capacities_arcs": self.capacities_arcs,
+                "conflicting_sets_processing_arc_map": [
+                    arc if arc is not None else -1 for arc in self.conflicting_sets_processing_arc_map
+                ],
+            },
+            ragged_attributes={
+                "trip_routes": (self.trip_routes, np.int64),
+                "conflicting_sets": (self.conflicting_sets, np.int64),
+                "earliest_departure_times": (self.earliest_departure_times, np.float64),
+                "latest_departure_times": (self.latest_departure_times, np.float64),
+                "min_delay_on_arcs": (self.min_delay_on_arcs, np.float64),
+                "max_delay_on_arcs": (self.max_delay_on_arcs, np.float64),
+            },
+        )
+
     def set_clock_end_epoch(self):
         self.clock_end_epoch = datetime.datetime.now().timestamp()
 
@@ -82,6 +135,7 @@ class EpochInstance(Instance):
 
         # Remove the arc from the trip route
         self.trip_routes[trip].pop(position)
+        self.trip_position_index.update_trip(trip, self.trip_routes[trip])
 
         # Adjust position index for timing-related attributes if mode is "last"
         timing_position = position + 1 if mode == "last" else position
@@ -101,6 +155,7 @@ class EpochInstance(Instance):
     def remove_trip(self, trip):
         self.max_staggering_applicable.pop(trip)
         self.trip_routes.pop(trip)
+        self.trip_position_index.remove_trip(trip)
         self.latest_departure_times.pop(trip)
         self.earliest_departure_times.pop(trip)
         self.max_delay_on_arcs.pop(trip)
@@ -193,6 +248,7 @@ class EpochInstance(Instance):
 
         del self.trip_routes[trip][start_idx:end_idx + 1]
         self.trip_routes[trip].insert(start_idx, merged_arc_id)
+        self.trip_position_index.update_trip(trip, self.trip_routes[trip])
 
 
 EpochInstances = list[EpochInstance]
@@ -231,6 +287,22 @@ def get_epoch_instance(
         map_previous_epoch_trips_to_start_time: Optional[dict[int, float]] = None
 ) -> EpochInstance:
     """Creates an EpochInstance for the specified epoch_id."""
+    snapshot_key = problem.snapshot.get_snapshot_key(
+        instance.instance_params,
+        epoch_size=solver_params.epoch_size,
+        epoch_id=epoch_id,
+        previous_epoch_trips_start_times=sorted((map_previous_epoch_trips_to_start_time or {}).items()),
+        # Settings changing the stored conflicting sets and time bounds
+        min_set_capacity=MIN_SET_CAPACITY,
+        use_cpp_conflicting_sets=USE_CPP_CONFLICTING_SETS,
+    )
+    snapshot_path = problem.snapshot.get_snapshot_path(instance.instance_params, snapshot_key)
+    snapshot = problem.snapshot.load_snapshot(snapshot_path) if USE_INSTANCE_SNAPSHOTS else None
+    if snapshot is not None:
+        epoch_instance = EpochInstance.from_snapshot(epoch_id, instance.instance_params, snapshot)
+        utils.prints.print_conflicting_sets_info(epoch_instance)
+        return epoch_instance
+
     first_time_epoch = epoch_id * solver_params.epoch_size * 60
     last_time_epoch = (epoch_id + 1) * solver_params.epoch_size * 60 - TOLERANCE
 
@@ -258,4 +330,6 @@ def get_epoch_instance(
         map_previous_epoch_trips_to_start_time=map_previous_epoch_trips_to_start_time,
     )
     conflicting_sets.schedule_utilities.add_conflicting_sets_to_instance(epoch_instance)
+    if USE_INSTANCE_SNAPSHOTS:
+        epoch_instance.save_snapshot(snapshot_path)
     return epoch_instance
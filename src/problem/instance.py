@@ -14,11 +14,16 @@ from networkx import DiGraph
 from networkx.readwrite import json_graph
 
 import conflicting_sets.schedule_utilities
+from conflicting_sets.conflict_pairs import ConflictPairs, get_conflict_pairs
+import problem.snapshot
 from instance_generator import InstanceComputer
 from problem.paths import get_arc_based_paths_with_features
+from problem.arc_position_index import ArcPositionIndex, TripPositionIndex, get_arc_position_index
+from problem.ragged_routes import RaggedRoutes, get_ragged_routes, get_route_travel_times, \
+    get_earliest_departure_times, get_latest_departure_times, get_max_delays, split_flat_values
 
-from input_data import InstanceParameters, SPEED_KPH
-from utils.aliases import Time, ConflictingSets, TripID, Position
+from input_data import InstanceParameters, SPEED_KPH, USE_INSTANCE_SNAPSHOTS
+from utils.aliases import Time, ConflictingSets
 from typing import Optional
 
 
@@ -39,15 +44,22 @@ class Instance:
     travel_times_arcs: list[float]
     deadlines: list[Time]
     max_staggering_applicable: list[float]
-    arc_position_in_routes_map: Optional[list[dict[TripID, Position]]] = None
+    arc_position_in_routes_map: Optional[ArcPositionIndex] = None
 
     def __post_init__(self):
+        ragged_trip_routes = self.get_ragged_trip_routes()
+        earliest_departure_times = self.initialize_earliest_departure_times(ragged_trip_routes)
+        latest_departure_times = self.initialize_latest_departure_times(ragged_trip_routes)
         self.conflicting_sets = self.initialize_conflicting_sets()
-        self.earliest_departure_times = self.initialize_earliest_departure_times()
-        self.latest_departure_times = self.initialize_latest_departure_times()
+        self.earliest_departure_times = ragged_trip_routes.split(earliest_departure_times)
+        self.latest_departure_times = split_flat_values(latest_departure_times,
+                                                        ragged_trip_routes.get_extended_offsets())
         self.min_delay_on_arcs = self.initialize_min_delay_on_arcs()
-        self.max_delay_on_arcs = self.initialize_max_delay_on_arcs()
+        self.max_delay_on_arcs = ragged_trip_routes.split(
+            get_max_delays(ragged_trip_routes, earliest_departure_times, latest_departure_times))
         self.arc_position_in_routes_map = self.get_arc_position_in_routes_map()
+        self.trip_position_index = TripPositionIndex(self.trip_routes)
+        self.conflict_pairs: Optional[ConflictPairs] = None
         self.conflicting_sets_processing_arc_map = [None for _ in self.travel_times_arcs]
 
     def save_json_for_cpp(self, file_name: str) -> None:
@@ -55,7 +67,9 @@ class Instance:
         os.makedirs(path_to_cpp_dir, exist_ok=True)
         output = {
             "trip_routes": self.trip_routes,
-            "arc_position_in_routes_map": self.arc_position_in_routes_map,
+            "arc_position_offsets": self.arc_position_in_routes_map.offsets,
+            "arc_position_trips": self.arc_position_in_routes_map.trip_ids,
+            "arc_position_positions": self.arc_position_in_routes_map.positions,
             "travel_time_arcs": self.travel_times_arcs,
             "nominal_capacities_arcs": self.capacities_arcs,
             "list_of_slopes": self.instance_params.list_of_slopes,
@@ -68,6 +82,14 @@ class Instance:
             "latest_times": self.latest_departure_times,
             "lb_travel_time": self.get_lb_travel_time()
         }
+        if self.conflict_pairs is not None:
+            output.update({
+                "conflict_pair_offsets": self.conflict_pairs.pair_offsets.tolist(),
+                "conflict_pair_first_trips": self.conflict_pairs.first_trips.tolist(),
+                "conflict_pair_second_trips": self.conflict_pairs.second_trips.tolist(),
+                "conflict_pair_first_positions": self.conflict_pairs.first_positions.tolist(),
+                "conflict_pair_second_positions": self.conflict_pairs.second_positions.tolist(),
+            })
         # test_ls.json
         with open(path_to_cpp_dir / file_name, "w") as output_file:
             json.dump(output, output_file, indent=4)
@@ -84,8 +106,14 @@ class Instance:
                 conflicting_sets[arc].append(trip)
         return conflicting_sets
 
+    def get_ragged_trip_routes(self) -> RaggedRoutes:
+        """Flat (offsets + arcs) copy of the current trip routes, used for the vectorized computations."""
+        return get_ragged_routes(self.trip_routes)
+
     def get_lb_travel_time(self) -> float:
-        return sum(self.travel_times_arcs[arc] for path in self.trip_routes for arc in path)
+        # Summed sequentially, in the order of the routes
+        travel_times_entries = np.asarray(self.travel_times_arcs, dtype=np.float64)[self.get_ragged_trip_routes().arcs]
+        return sum(travel_times_entries.tolist())
 
     def print_info_arcs_utilized(self):
         """
@@ -102,78 +130,50 @@ class Instance:
         print("\nInfo - Arcs Utilized:")
         print(summary)
 
-    def initialize_earliest_departure_times(self):
-        # Initialize a list to store the earliest departure times for each trip
-        earliest_departure_times = []
-
-        # Iterate over each trip and its route
-        for trip, route in enumerate(self.trip_routes):
-            # Start with the release time for the trip
-            release_time = self.release_times[trip]
-            trip_departure_times = [release_time]
-
-            # Calculate earliest departure times for each arc in the route
-            for arc in route[:-1]:
-                nominal_time = self.travel_times_arcs[arc]
-                last_time = trip_departure_times[-1]
-                trip_departure_times.append(last_time + nominal_time)
-
-            earliest_departure_times.append(trip_departure_times)
-
-        return earliest_departure_times
+    def initialize_earliest_departure_times(self, ragged_trip_routes: RaggedRoutes) -> np.ndarray:
+        """
+        Initializes the earliest departure times for each trip (flat array aligned with the routes):
+        release time plus the nominal travel times of the preceding arcs of the route.
+        """
+        return get_earliest_departure_times(ragged_trip_routes, self.travel_times_arcs, self.release_times)
 
     def set_release_times(self, arg_release_times):
         self.release_times = arg_release_times
 
-    def initialize_latest_departure_times(self):
+    def initialize_latest_departure_times(self, ragged_trip_routes: RaggedRoutes) -> np.ndarray:
         """
         Initializes the latest departure times for each trip based on the deadlines
         and nominal travel times for each arc in the route.
+        The first entry of each trip is the latest departure allowed by the max staggering applicable.
         """
-        # Initialize a list to store the latest departure times for each trip
-        latest_departure_times = []
-
-        # Iterate over each trip and its route
-        for trip, route in enumerate(self.trip_routes):
-            # Start with the deadline for the trip
-            deadline = self.deadlines[trip]
-            trip_departure_times = [deadline]
-
-            # Calculate latest departure times for each arc in reverse order
-            for arc in reversed(route[1:]):
-                nominal_time = self.travel_times_arcs[arc]
-                last_time = trip_departure_times[0]  # Get the last computed time (at the front of the list)
-                trip_departure_times.insert(0, last_time - nominal_time)
-            max_staggered_departure = self.earliest_departure_times[trip][0] + self.max_staggering_applicable[trip]
-            trip_departure_times.insert(0, max_staggered_departure)
-            # Add the calculated times for the current trip to the result
-            latest_departure_times.append(trip_departure_times)
-
-        return latest_departure_times
+        # The earliest departure on the first arc is the release time (also defined for empty routes)
+        max_staggered_departures = (np.asarray(self.release_times, dtype=np.float64)
+                                    + np.asarray(self.max_staggering_applicable, dtype=np.float64))
+        return get_latest_departure_times(ragged_trip_routes, self.travel_times_arcs, self.deadlines,
+                                          max_staggered_departures)
 
     def initialize_min_delay_on_arcs(self):
         return [[0 for _ in route] for route in self.trip_routes]
 
-    def initialize_max_delay_on_arcs(self):
-        return [[self.latest_departure_times[trip][position] - self.earliest_departure_times[trip][position] for
-                 position, arc in enumerate(route)] for trip, route in enumerate(self.trip_routes)]
-
-    def get_arc_position_in_routes_map(self) -> list[dict[TripID, Position]]:
+    def get_arc_position_in_routes_map(self) -> ArcPositionIndex:
         """Maps the arc to the position in the trip routes. Used for efficient operations of local search"""
-        arc_to_pos_map = [[-1 for _ in range(len(self.trip_routes))] for _ in
-                          range(len(self.travel_times_arcs))]  # size of arcs
-
-        for trip, route in enumerate(self.trip_routes):
-            for position, arc in enumerate(route):
-                if arc == 0:
-                    continue
-                arc_to_pos_map[arc][trip] = position
-
-        return arc_to_pos_map
+        return get_arc_position_index(self.trip_routes, len(self.travel_times_arcs))
 
     def update_arc_position_in_routes_map(self) -> None:
         self.arc_position_in_routes_map = self.get_arc_position_in_routes_map()
 
+    def update_trip_position_index(self) -> None:
+        """Rebuilds the (trip, arc) -> position index after the trip routes have been replaced."""
+        self.trip_position_index = TripPositionIndex(self.trip_routes)
+
+    def update_conflict_pairs(self) -> None:
+        """Enumerates the pairs of the conflicting sets, once they are final for the (simplified) instance."""
+        self.conflict_pairs = get_conflict_pairs(self.conflicting_sets, self.trip_position_index,
+                                                 self.earliest_departure_times, self.latest_departure_times)
+
+    def get_arc_position_in_trip_route(self, trip: int, arc: int) -> int:
+        return self.trip_position_index.get_position(trip, arc)
+
     def remove_arc_copies(self):
         assert len(self.travel_times_arcs) == len(self.conflicting_sets_processing_arc_map), (
             f"Length mismatch: travel_times_arcs has {len(self.travel_times_arcs)} elements, "
@@ -204,6 +204,13 @@ class Instance:
 
 def get_instance(instance_params: InstanceParameters) -> Instance:
     """Constructs an instance from input data without simplification."""
+    snapshot = problem.snapshot.load_snapshot(problem.snapshot.get_snapshot_path(
+        instance_params, problem.snapshot.get_snapshot_key(instance_params))) if USE_INSTANCE_SNAPSHOTS else None
+    if snapshot is not None:
+        instance = Instance(instance_params=instance_params, **snapshot)
+        instance.print_info_arcs_utilized()
+        return instance
+
     trips_data = import_trips_data(instance_params)
     graph = import_graph(instance_params)
     set_arcs_nominal_travel_times_and_capacities(graph, instance_params)
@@ -214,6 +221,16 @@ def get_instance(instance_params: InstanceParameters) -> Instance:
                         trip_routes=trip_routes, travel_times_arcs=travel_times_arcs, capacities_arcs=capacities_arcs,
                         node_based_trip_routes=trips_data.routes, release_times=trips_data.release_time,
                         max_staggering_applicable=max_staggering_applicable)
+    if USE_INSTANCE_SNAPSHOTS:
+        # The key is computed again: the instance file may have just been created
+        problem.snapshot.save_snapshot(
+            problem.snapshot.get_snapshot_path(instance_params, problem.snapshot.get_snapshot_key(instance_params)),
+            flat_attributes={"capacities_arcs": capacities_arcs, "release_times": trips_data.release_time,
+                             "travel_times_arcs": travel_times_arcs, "deadlines": trips_data.deadline,
+                             "max_staggering_applicable": max_staggering_applicable},
+            ragged_attributes={"trip_routes": (trip_routes, np.int64),
+                               "node_based_trip_routes": (trips_data.routes, np.int64)},
+        )
     instance.print_info_arcs_utilized()
     # conflicting_sets.schedule_utilities.add_conflicting_sets_to_instance(instance)
     return instance
@@ -229,22 +246,17 @@ def get_max_staggering_applicable(trip_routes: list[list[int]],
     based on input staggering cap, travel times, deadlines, and release times.
     """
     # TODO: move this into instance generation
-    max_staggering_applicable = []
-
-    for vehicle, path in enumerate(trip_routes):
-        # Calculate total travel time for the trip
-        travel_time = sum(travel_times_arcs[arc] for arc in path)
+    travel_times = get_route_travel_times(get_ragged_routes(trip_routes), travel_times_arcs)
 
-        # Calculate max staggering based on staggering cap
-        staggering_cap_limit = instance_params.staggering_cap / 100 * travel_time
+    # Calculate max staggering based on staggering cap
+    staggering_cap_limits = instance_params.staggering_cap / 100 * travel_times
 
-        # Calculate max staggering based on deadlines
-        deadline_limit = deadlines[vehicle] - (travel_time + release_times[vehicle])
+    # Calculate max staggering based on deadlines
+    deadline_limits = np.asarray(deadlines, dtype=np.float64) - (
+            travel_times + np.asarray(release_times, dtype=np.float64))
 
-        # The maximum staggering applicable is the minimum of the two limits
-        max_staggering = min(staggering_cap_limit, deadline_limit)
-        max_staggering_applicable.append(max_staggering)
-    return max_staggering_applicable
+    # The maximum staggering applicable is the minimum of the two limits
+    return np.minimum(staggering_cap_limits, deadline_limits).tolist()
 
 
 def import_trips_data(instance_parameters: InstanceParameters) -> TripsData:
@@ -50,8 +50,11 @@ def map_arc_based_shortest_paths(
     Maps arcs to their indices in the utilized list, adding a dummy sink arc.
 
     """
+    arc_ids = {}
+    for arc_id, arc in enumerate(arcs_utilized_ids):
+        arc_ids.setdefault(arc, arc_id)
     arc_based_shortest_paths = [
-        [arcs_utilized_ids.index(arc) + 1 for arc in path] for path in arc_based_shortest_paths_original_ids
+        [arc_ids[arc] + 1 for arc in path] for path in arc_based_shortest_paths_original_ids
     ]
     for path in arc_based_shortest_paths:
         path.append(0)  # Adding a final dummy edge representing the sink
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+
+@dataclass
+class RaggedRoutes:
+    """
+    Routes stored as a flat array of arc ids and an array of offsets (CSR layout).
+    The route of trip `t` is `arcs[offsets[t]:offsets[t + 1]]`.
+    """
+    offsets: np.ndarray
+    arcs: np.ndarray
+
+    def get_number_of_trips(self) -> int:
+        return len(self.offsets) - 1
+
+    def get_route_lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @cached_property
+    def trip_of_entries(self) -> np.ndarray:
+        """Trip id of each entry of the flat array."""
+        return np.repeat(np.arange(self.get_number_of_trips()), self.get_route_lengths())
+
+    @cached_property
+    def position_of_entries(self) -> np.ndarray:
+        """Position in the route of each entry of the flat array."""
+        return np.arange(len(self.arcs)) - self.offsets[:-1][self.trip_of_entries]
+
+    def get_extended_offsets(self) -> np.ndarray:
+        """Offsets of the arrays with one extra entry per trip, e.g. the latest departure times."""
+        return self.offsets + np.arange(len(self.offsets))
+
+    def split(self, flat_values: np.ndarray) -> list[list]:
+        """Transform an array aligned with the flat arcs back into a list of lists."""
+        return split_flat_values(flat_values, self.offsets)
+
+
+def split_flat_values(flat_values: np.ndarray, offsets: np.ndarray) -> list[list]:
+    values = flat_values.tolist()
+    offsets_list = offsets.tolist()
+    return [values[start:end] for start, end in zip(offsets_list[:-1], offsets_list[1:])]
+
+
+def get_ragged_routes(trip_routes: list[list[int]]) -> RaggedRoutes:
+    offsets = np.zeros(len(trip_routes) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(route) for route in trip_routes])
+    arcs = np.fromiter(itertools.chain.from_iterable(trip_routes), dtype=np.int64, count=offsets[-1])
+    return RaggedRoutes(offsets=offsets, arcs=arcs)
+
+
+def segmented_cumsum(values: np.ndarray, ragged_routes: RaggedRoutes) -> np.ndarray:
+    """
+    Inclusive cumulative sum of a flat array aligned with the routes, restarting at every route: one cumsum over the
+    flat array, minus an offset per route. The total of each route is taken out at the start of the next one, so that
+    the running sum stays of the size of a single route (e.g. one release time) instead of growing over all the
+    trips; the offset of a route is then only the rounding residual carried over from the previous ones.
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.float64)
+    non_empty = ragged_routes.get_route_lengths() > 0
+    starts = ragged_routes.offsets[:-1][non_empty]
+    reset_values = np.array(values, dtype=np.float64)
+    route_totals = np.add.reduceat(reset_values, starts)
+    reset_values[starts[1:]] -= route_totals[:-1]
+    cumulative_sums = np.cumsum(reset_values)
+    route_offsets = np.zeros(ragged_routes.get_number_of_trips(), dtype=np.float64)
+    route_offsets[np.flatnonzero(non_empty)[1:]] = cumulative_sums[starts[1:] - 1] - route_totals[:-1]
+    return cumulative_sums - route_offsets[ragged_routes.trip_of_entries]
+
+
+def get_route_travel_times(ragged_routes: RaggedRoutes, travel_times_arcs: list[float]) -> np.ndarray:
+    """Nominal travel time of each route."""
+    travel_times_entries = np.asarray(travel_times_arcs, dtype=np.float64)[ragged_routes.arcs]
+    non_empty = ragged_routes.get_route_lengths() > 0
+    route_travel_times = np.zeros(ragged_routes.get_number_of_trips(), dtype=np.float64)
+    route_travel_times[non_empty] = segmented_cumsum(travel_times_entries, ragged_routes)[
+        ragged_routes.offsets[1:][non_empty] - 1]
+    return route_travel_times
+
+
+def get_earliest_departure_times(ragged_routes: RaggedRoutes, travel_times_arcs: list[float],
+                                 release_times: list[float]) -> np.ndarray:
+    """
+    Flat array of the earliest departure on each arc: the release time plus the nominal travel time of the
+    preceding arcs of the route.
+    """
+    travel_times_entries = np.asarray(travel_times_arcs, dtype=np.float64)[ragged_routes.arcs]
+    # Each route becomes [release time, travel time of arcs 0 .. n - 2]
+    shifted_values = np.empty(len(ragged_routes.arcs), dtype=np.float64)
+    shifted_values[1:] = travel_times_entries[:-1]
+    non_empty = ragged_routes.get_route_lengths() > 0
+    shifted_values[ragged_routes.offsets[:-1][non_empty]] = np.asarray(release_times, dtype=np.float64)[non_empty]
+    return segmented_cumsum(shifted_values, ragged_routes)
+
+
+def get_latest_departure_times(ragged_routes: RaggedRoutes, travel_times_arcs: list[float],
+                               deadlines: list[float], max_staggered_departures: np.ndarray) -> np.ndarray:
+    """
+    Flat array of the latest departures, with one more entry per trip than the route:
+    the max staggered departure, followed by the deadline minus the nominal travel time of the arcs from
+    position 1 onwards, ending with the deadline itself.
+    """
+    trips, positions = ragged_routes.trip_of_entries, ragged_routes.position_of_entries
+    lengths = ragged_routes.get_route_lengths()
+    # Walk each route backwards: [deadline, -travel time of arcs n - 1 .. 1]
+    reversed_entries = ragged_routes.offsets[1:][trips] - 1 - positions
+    backward_values = -np.asarray(travel_times_arcs, dtype=np.float64)[ragged_routes.arcs[reversed_entries + 1 - (
+            positions == 0)]]
+    non_empty = lengths > 0
+    backward_values[ragged_routes.offsets[:-1][non_empty]] = np.asarray(deadlines, dtype=np.float64)[non_empty]
+    backward_times = segmented_cumsum(backward_values, ragged_routes)
+
+    # Entry `position + 1` of trip `t` lands at extended_offsets[t] + position + 1
+    extended_offsets = ragged_routes.get_extended_offsets()
+    latest_departure_times = np.empty(extended_offsets[-1], dtype=np.float64)
+    latest_departure_times[extended_offsets[:-1]] = max_staggered_departures
+    latest_departure_times[extended_offsets[:-1][trips] + lengths[trips] - positions] = backward_times
+    return latest_departure_times
+
+
+def get_max_delays(ragged_routes: RaggedRoutes, earliest_departure_times: np.ndarray,
+                   latest_departure_times: np.ndarray) -> np.ndarray:
+    """Flat array of the difference between latest and earliest departure at each position of the routes."""
+    entries = np.arange(len(ragged_routes.arcs))
+    return latest_departure_times[entries + ragged_routes.trip_of_entries] - earliest_departure_times
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import itertools
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from input_data import InstanceParameters
+
+# Increase when the preprocessing or the stored attributes change, so that stale snapshots are not loaded
+SNAPSHOT_VERSION = 2
+OFFSETS_SUFFIX = ".offsets"
+
+
+def _get_input_files_signature(instance_params: InstanceParameters) -> list[list]:
+    """Size and modification time of the input files, so that editing one of them invalidates the snapshots."""
+    signature = []
+    for path in [instance_params.path_to_G, instance_params.path_to_routes, instance_params.path_to_instance]:
+        stat = path.stat() if path.exists() else None
+        signature.append([path.name, stat.st_size, stat.st_mtime_ns] if stat else [path.name, None, None])
+    return signature
+
+
+def get_snapshot_key(instance_params: InstanceParameters, **extra_keys: Any) -> str:
+    """
+    Content address of a snapshot: hash of the instance parameters, of the input files and of the extra keys
+    (e.g. epoch size).
+    """
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "instance_params": dataclasses.asdict(instance_params),
+        "input_files": _get_input_files_signature(instance_params),
+        **extra_keys,
+    }
+    serialized_payload = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized_payload.encode()).hexdigest()[:20]
+
+
+def get_snapshot_path(instance_params: InstanceParameters, key: str) -> Path:
+    """Snapshots are stored next to the instance file."""
+    return instance_params.path_to_instance.parent / "snapshots" / key
+
+
+def _flatten(ragged_list: list[list], dtype: type) -> tuple[np.ndarray, np.ndarray]:
+    """Transform a list of lists into a flat array of values of the given type and an array of offsets."""
+    offsets = np.zeros(len(ragged_list) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in ragged_list])
+    values = np.fromiter(itertools.chain.from_iterable(ragged_list), dtype=dtype, count=int(offsets[-1]))
+    return values, offsets
+
+
+def _unflatten(values: np.ndarray, offsets: np.ndarray) -> list[list]:
+    values_list = values.tolist()
+    offsets_list = offsets.tolist()
+    return [values_list[start:end] for start, end in zip(offsets_list[:-1], offsets_list[1:])]
+
+
+def save_snapshot(path: Path, flat_attributes: dict[str, list],
+                  ragged_attributes: dict[str, tuple[list[list], type]]) -> None:
+    """
+    Save the attributes as uncompressed .npy files; the ragged attributes are given with the type of their values.
+    The snapshot is written in a temporary directory and moved in place once complete.
+    """
+    temporary_path = path.with_name(f"{path.name}.tmp{os.getpid()}")
+    os.makedirs(temporary_path, exist_ok=True)
+
+    for name, values in flat_attributes.items():
+        np.save(temporary_path / f"{name}.npy", np.asarray(values))
+
+    for name, (ragged_values, dtype) in ragged_attributes.items():
+        values, offsets = _flatten(ragged_values, dtype)
+        np.save(temporary_path / f"{name}.npy", values)
+        np.save(temporary_path / f"{name}{OFFSETS_SUFFIX}.npy", offsets)
+
+    try:
+        os.replace(temporary_path, path)
+    except OSError:
+        # Snapshot already written by a concurrent run
+        shutil.rmtree(temporary_path, ignore_errors=True)
+
+
+def load_snapshot(path: Path) -> Optional[dict[str, list]]:
+    """
+    Load a snapshot as the lists used by the instances (the arrays are read whole, not memory-mapped).
+    Returns None if the snapshot does not exist.
+    """
+    if not path.is_dir():
+        return None
+
+    attributes = {}
+    for file in path.glob("*.npy"):
+        name = file.stem
+        if name.endswith(OFFSETS_SUFFIX):
+            continue
+        values = np.load(file)
+        path_to_offsets = path / f"{name}{OFFSETS_SUFFIX}.npy"
+        if path_to_offsets.exists():
+            attributes[name] = _unflatten(values, np.load(path_to_offsets))
+        else:
+            attributes[name] = values.tolist()
+    return attributes
@@ -6,19 +6,29 @@ import statistics
 
 from dataclasses import dataclass
 
+import numpy as np
+
 from typing import Optional
 from utils.aliases import *
 from input_data import TOLERANCE, SolverParameters
 
 
 class Binaries:
-    def __init__(self, alpha: ConflictVarsDict,
-                 beta: ConflictVarsDict,
-                 gamma: ConflictVarsDict):
+    """
+    Alpha, beta and gamma of the conflict pairs, as (number of pairs, 2) int8 arrays: column 0 refers to
+    (first trip, second trip) of the pair, column 1 to (second trip, first trip). -1 marks a tie.
+    """
+
+    def __init__(self, alpha: np.ndarray,
+                 beta: np.ndarray,
+                 gamma: np.ndarray):
         self.alpha = alpha
         self.beta = beta
         self.gamma = gamma
 
+    def get_number_of_binaries(self) -> int:
+        return self.alpha.size + self.beta.size + self.gamma.size
+
 
 def _format_seconds(seconds: float) -> str:
     seconds = int(seconds)
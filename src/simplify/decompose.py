@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import copy
+
+import numpy as np
+import scipy.sparse
+import scipy.sparse.csgraph
+
+from problem.epoch_instance import EpochInstance
+
+
+def get_trip_components(instance: EpochInstance) -> list[list[int]]:
+    """
+    Connected components of the trips linked by a conflict pair, sorted by their first trip.
+    Trips without conflict pairs cannot be delayed by other trips and are left out.
+    """
+    conflict_pairs = instance.conflict_pairs
+    number_of_trips = len(instance.trip_routes)
+    graph = scipy.sparse.coo_matrix(
+        (np.ones(len(conflict_pairs.first_trips), dtype=np.int8),
+         (conflict_pairs.first_trips, conflict_pairs.second_trips)),
+        shape=(number_of_trips, number_of_trips))
+    _, labels = scipy.sparse.csgraph.connected_components(graph, directed=False)
+
+    has_pairs = np.zeros(number_of_trips, dtype=bool)
+    has_pairs[conflict_pairs.first_trips] = True
+    has_pairs[conflict_pairs.second_trips] = True
+    trips = np.flatnonzero(has_pairs)
+    trips = trips[np.argsort(labels[trips], kind="stable")]
+    boundaries = np.flatnonzero(np.diff(labels[trips])) + 1
+    return [component.tolist() for component in np.split(trips, boundaries)] if len(trips) else []
+
+
+def group_trip_components(instance: EpochInstance, components: list[list[int]],
+                          number_of_groups: int) -> list[list[int]]:
+    """
+    Splits the components into groups with about the same number of conflict pairs: the components with more pairs
+    go first, each to the group with the fewest pairs so far. The trips of each group are sorted.
+    """
+    pairs_of_trips = np.bincount(instance.conflict_pairs.first_trips, minlength=len(instance.trip_routes))
+    groups = [[] for _ in range(min(number_of_groups, len(components)))]
+    pairs_of_groups = [0 for _ in groups]
+    for component in sorted(components, key=lambda trips: -int(pairs_of_trips[trips].sum())):
+        group = pairs_of_groups.index(min(pairs_of_groups))
+        groups[group].extend(component)
+        pairs_of_groups[group] += int(pairs_of_trips[component].sum())
+    return [sorted(group) for group in groups]
+
+
+def get_component_instance(instance: EpochInstance, trips: list[int]) -> EpochInstance:
+    """Sub-instance with the given trips, renumbered in their order. The arcs are the ones of the instance."""
+    component_instance = copy.copy(instance)
+    trip_of_epoch_trip = {trip: component_trip for component_trip, trip in enumerate(trips)}
+    component_instance.trip_original_ids = [instance.trip_original_ids[trip] for trip in trips]
+    component_instance.removed_vehicles = []
+    for name in ["release_times", "deadlines", "max_staggering_applicable"]:
+        values = getattr(instance, name)
+        setattr(component_instance, name, [values[trip] for trip in trips])
+    for name in ["trip_routes", "earliest_departure_times", "latest_departure_times", "min_delay_on_arcs",
+                 "max_delay_on_arcs"]:
+        values = getattr(instance, name)
+        setattr(component_instance, name, [values[trip][:] for trip in trips])
+    component_instance.conflicting_sets = [
+        [trip_of_epoch_trip[trip] for trip in conflicting_set if trip in trip_of_epoch_trip]
+        for conflicting_set in instance.conflicting_sets
+    ]
+
+    component_instance.update_arc_position_in_routes_map()
+    component_instance.update_trip_position_index()
+    component_instance.update_conflict_pairs()
+    return component_instance
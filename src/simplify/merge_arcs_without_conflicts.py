@@ -6,13 +6,13 @@ def merge_arcs_on_paths_where_no_conflicts_can_happen(instance: EpochInstance, s
     """
     Merge arcs in vehicle paths where no conflicts can occur.
     """
-    for trip, route in enumerate(instance.trip_routes):
+    for trip in range(len(instance.trip_routes)):
         arc_sequences_to_merge = get_arc_sequences_to_merge(trip, instance)
         if arc_sequences_to_merge:
             for arc_sequence_to_merge in arc_sequences_to_merge:
                 # Update schedules and instance timing information
-                start_idx = route.index(arc_sequence_to_merge[0])
-                end_idx = route.index(arc_sequence_to_merge[-1])
+                start_idx = instance.get_arc_position_in_trip_route(trip, arc_sequence_to_merge[0])
+                end_idx = instance.get_arc_position_in_trip_route(trip, arc_sequence_to_merge[-1])
                 instance.merge_arc_sequence_in_trip_route(arc_sequence_to_merge, trip, start_idx, end_idx)
                 status_quo.remove_trip_arcs_between_indices(trip, start_idx, end_idx)
 
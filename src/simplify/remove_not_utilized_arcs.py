@@ -61,5 +61,6 @@ def remove_not_utilized_arcs(instance: EpochInstance) -> list[int]:
     _update_trip_routes(instance, arcs_to_remove)
 
     instance.update_arc_position_in_routes_map()
+    instance.update_trip_position_index()
 
     return arcs_to_remove
@@ -113,11 +113,8 @@ def simplify_system(
     instance.removed_arcs = remove_not_utilized_arcs(instance)
     print(f" Removed unused arcs: {len(instance.removed_arcs)}.")
 
-    status_quo.binaries = get_conflict_binaries(
-        instance.conflicting_sets,
-        instance.trip_routes,
-        status_quo.congested_schedule
-    )
+    instance.update_conflict_pairs()
+    status_quo.binaries = get_conflict_binaries(instance.conflict_pairs, status_quo.congested_schedule)
     print(" Updated conflict binaries.")
 
     print("System simplification complete.\n")
@@ -1,9 +1,18 @@
+import contextlib
+import importlib
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
 import utils.prints
-from input_data import SolverParameters, TOLERANCE, SAVE_CPP
+from conflicting_sets.conflict_binaries import get_conflict_binaries
+from input_data import SolverParameters, TOLERANCE, SAVE_CPP, USE_BOUNDS_PRESOLVE, MIP_PROCESSES, MIP_STARTS
 from MIP.model import construct_model, run_model
+from MIP.presolve import presolve_bounds
 from problem.instance import Instance
+from simplify.decompose import get_component_instance, get_trip_components, group_trip_components
 from simplify.map_back import map_simplified_epoch_solution
-from solutions.epoch_warm_start import get_epoch_warm_start
+from solutions.epoch_warm_start import get_epoch_warm_start, get_additional_warm_starts
 from solutions.model_solution import get_epoch_model_solution
 from problem.solution import Solution
 from typing import Optional
@@ -76,21 +85,14 @@ def print_comparison_between_solution_and_status_quo(epoch_status_quo: Solution,
     print("=" * 50)
 
 
-def get_epoch_solution(
+def _solve_simplified_instance(
         simplified_instance: EpochInstance,
         simplified_status_quo: Solution,
-        epoch_instance: EpochInstance,
-        epoch_status_quo: Solution,
-        solver_params: SolverParameters,
-        cpp_epoch_instance: cpp.cpp_instance
+        solver_params: SolverParameters
 ) -> tuple[Solution, Optional[OptimizationMeasures]]:
     """
-    Computes the solution for a single epoch, mapping it back to the full system.
+    Computes the warm start, constructs and solves the model of a simplified instance.
     """
-    # Handle the case where no optimization is required.
-    if not simplified_status_quo.congested_schedule:
-        return epoch_status_quo, None
-
     # Prepare the simplified instance for optimization.
     cpp_simplified_epoch_instance = get_cpp_instance(simplified_instance, solver_params.epoch_time_limit)
     cpp_local_search = cpp.LocalSearch(cpp_simplified_epoch_instance, solver_params.verbose_model)
@@ -103,6 +105,18 @@ def get_epoch_solution(
         cpp_local_search,
         cpp_simplified_epoch_instance
     )
+    additional_warm_starts = get_additional_warm_starts(
+        simplified_instance,
+        simplified_status_quo,
+        epoch_warm_start,
+        solver_params,
+        cpp_local_search,
+        cpp_simplified_epoch_instance
+    ) if solver_params.warm_start and MIP_STARTS > 1 else []
+
+    # Tighten the bounds of the model; the cpp instances keep the original time windows.
+    if USE_BOUNDS_PRESOLVE:
+        presolve_bounds(simplified_instance)
 
     # Construct and solve the optimization model.
     model = construct_model(
@@ -117,7 +131,8 @@ def get_epoch_solution(
         epoch_warm_start,
         solver_params,
         cpp_local_search,
-        cpp_simplified_epoch_instance
+        cpp_simplified_epoch_instance,
+        additional_warm_starts
     )
 
     # Extract the solution from the optimization model.
@@ -130,6 +145,137 @@ def get_epoch_solution(
         cpp_simplified_epoch_instance,
         solution_start_times
     )
+    # Free the model at once: the Gurobi environment outlives it
+    model.dispose()
+    return model_solution, optimization_measures
+
+
+def _get_trip_groups(simplified_instance: EpochInstance, solver_params: SolverParameters) -> list[list[int]]:
+    """
+    Groups of trips of the simplified instance whose models are independent, one per process.
+    """
+    if MIP_PROCESSES <= 1 or not solver_params.optimize or simplified_instance.conflict_pairs is None:
+        return []
+    components = get_trip_components(simplified_instance)
+    if len(components) <= 1:
+        return []
+    trip_groups = group_trip_components(simplified_instance, components, MIP_PROCESSES)
+    print(f"Decomposed the simplified instance into {len(components)} components, "
+          f"solved in {len(trip_groups)} processes.")
+    return trip_groups
+
+
+def solve_trip_group(
+        component_instance: EpochInstance,
+        start_times: list[float],
+        solver_params: SolverParameters
+) -> tuple[list[float], Optional[OptimizationMeasures], str]:
+    """
+    Worker: solves the model of a group of trips, with its own warm start and local search callback.
+    Returns the start times of the trips, the optimization measures and the output of the worker.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        cpp_component_instance = get_cpp_instance(component_instance, solver_params.epoch_time_limit)
+        cpp_status_quo = cpp.cpp_scheduler(cpp_component_instance).construct_solution(start_times)
+        component_status_quo = Solution.from_cpp_solution(cpp_status_quo, cpp_component_instance)
+        component_status_quo.binaries = get_conflict_binaries(component_instance.conflict_pairs,
+                                                              component_status_quo.congested_schedule)
+        component_solution, optimization_measures = _solve_simplified_instance(
+            component_instance,
+            component_status_quo,
+            solver_params
+        )
+    return component_solution.start_times, optimization_measures, output.getvalue()
+
+
+def _merge_optimization_measures(
+        optimization_measures_list: list[Optional[OptimizationMeasures]]
+) -> Optional[OptimizationMeasures]:
+    """
+    Sums up the initial and the final bounds of the groups of trips, so that the lists start with the status quo
+    entry as the ones of a single model; the final gap is the one of the sums.
+    """
+    optimization_measures_list = [measures for measures in optimization_measures_list if measures is not None]
+    if not optimization_measures_list:
+        return None
+    lower_bounds, upper_bounds = [
+        [sum(measures[name][entry] for measures in optimization_measures_list) for entry in [0, -1]]
+        for name in ["lower_bounds_list", "upper_bounds_list"]
+    ]
+    optimality_gap = round((upper_bounds[-1] - lower_bounds[-1]) / upper_bounds[-1] * 100, 2) \
+        if upper_bounds[-1] > TOLERANCE else 0.0
+    return {
+        "lower_bounds_list": lower_bounds,
+        "upper_bounds_list": upper_bounds,
+        "optimality_gaps_list": [optimization_measures_list[0]["optimality_gaps_list"][0], optimality_gap],
+    }
+
+
+def _solve_trip_groups_in_parallel(
+        simplified_instance: EpochInstance,
+        simplified_status_quo: Solution,
+        trip_groups: list[list[int]],
+        solver_params: SolverParameters
+) -> tuple[Solution, Optional[OptimizationMeasures]]:
+    """
+    Solves the groups of trips in a process pool and merges their start times; the trips without conflict pairs
+    keep their status quo start times. The workers are spawned (Gurobi environments must not be forked) and import
+    the modules in the same order as main.py.
+    """
+    start_times = simplified_status_quo.start_times[:]
+    optimization_measures_list = []
+    with ProcessPoolExecutor(max_workers=len(trip_groups), mp_context=multiprocessing.get_context("spawn"),
+                             initializer=importlib.import_module, initargs=("utils.run_procedure",)) as executor:
+        futures = [
+            executor.submit(solve_trip_group, get_component_instance(simplified_instance, trips),
+                            [start_times[trip] for trip in trips], solver_params)
+            for trips in trip_groups
+        ]
+        for group, (trips, future) in enumerate(zip(trip_groups, futures)):
+            group_start_times, optimization_measures, output = future.result()
+            print(f"\n--- Group {group}: {len(trips)} trips ---")
+            print(output, end="")
+            for trip, start_time in zip(trips, group_start_times):
+                start_times[trip] = start_time
+            optimization_measures_list.append(optimization_measures)
+
+    cpp_simplified_epoch_instance = get_cpp_instance(simplified_instance, solver_params.epoch_time_limit)
+    cpp_solution = cpp.cpp_scheduler(cpp_simplified_epoch_instance).construct_solution(start_times)
+    model_solution = Solution.from_cpp_solution(cpp_solution, cpp_simplified_epoch_instance)
+    return model_solution, _merge_optimization_measures(optimization_measures_list)
+
+
+def get_epoch_solution(
+        simplified_instance: EpochInstance,
+        simplified_status_quo: Solution,
+        epoch_instance: EpochInstance,
+        epoch_status_quo: Solution,
+        solver_params: SolverParameters,
+        cpp_epoch_instance: cpp.cpp_instance
+) -> tuple[Solution, Optional[OptimizationMeasures]]:
+    """
+    Computes the solution for a single epoch, mapping it back to the full system.
+    """
+    # Handle the case where no optimization is required.
+    if not simplified_status_quo.congested_schedule:
+        return epoch_status_quo, None
+
+    # Solve the independent groups of trips in parallel, or the whole simplified instance.
+    trip_groups = _get_trip_groups(simplified_instance, solver_params)
+    if len(trip_groups) > 1:
+        model_solution, optimization_measures = _solve_trip_groups_in_parallel(
+            simplified_instance,
+            simplified_status_quo,
+            trip_groups,
+            solver_params
+        )
+    else:
+        model_solution, optimization_measures = _solve_simplified_instance(
+            simplified_instance,
+            simplified_status_quo,
+            solver_params
+        )
 
     # Map the solution back to the full system.
     epoch_solution = map_simplified_epoch_solution(
@@ -1,6 +1,7 @@
 import datetime
+import numpy as np
 from input_data import SolverParameters
-from input_data import TOLERANCE, SAVE_CPP
+from input_data import TOLERANCE, SAVE_CPP, MIP_STARTS
 from problem.epoch_instance import EpochInstance
 from problem.solution import Solution
 from conflicting_sets.conflict_binaries import get_conflict_binaries
@@ -24,6 +25,22 @@ def _is_time_left_for_optimization(instance: EpochInstance, solver_params: Solve
     return _compute_remaining_time(instance, solver_params) > TOLERANCE
 
 
+def _get_local_search_solution(cpp_solution: cpp.cpp_solution, epoch_instance: EpochInstance,
+                               cpp_instance: cpp.cpp_instance) -> Solution:
+    """
+    Converts a local search solution, with the binaries of its conflict pairs.
+    """
+    congested_schedule = cpp_solution.get_schedule()
+    return Solution(
+        total_delay=cpp_solution.get_total_delay(),
+        congested_schedule=congested_schedule,
+        delays_on_arcs=cpp_solution.get_delays_on_arcs(cpp_instance),
+        start_times=cpp_solution.get_start_times(),
+        binaries=get_conflict_binaries(epoch_instance.conflict_pairs, congested_schedule),
+        total_travel_time=cpp_solution.get_total_travel_time(),
+    )
+
+
 def get_epoch_warm_start(
         epoch_instance: EpochInstance, epoch_status_quo: Solution, solver_params: SolverParameters,
         cpp_local_search: cpp.LocalSearch, cpp_instance: cpp.cpp_instance
@@ -52,32 +69,39 @@ def get_epoch_warm_start(
         print("=" * 50)
         return epoch_status_quo
 
-    # Compute necessary metrics for the warm start solution
-    congested_schedule = cpp_solution.get_schedule()
-    total_delay = cpp_solution.get_total_delay()
-    total_travel_time = cpp_solution.get_total_travel_time()
-    start_times = cpp_solution.get_start_times()
-    delays_on_arcs = cpp_solution.get_delays_on_arcs(cpp_instance)
-    binaries = get_conflict_binaries(epoch_instance.conflicting_sets, epoch_instance.trip_routes, congested_schedule)
-
-    # Construct the warm start solution
-    warm_start = Solution(
-        total_delay=total_delay,
-        congested_schedule=congested_schedule,
-        delays_on_arcs=delays_on_arcs,
-        start_times=start_times,
-        binaries=binaries,
-        total_travel_time=total_travel_time,
-    )
+    warm_start = _get_local_search_solution(cpp_solution, epoch_instance, cpp_instance)
 
     # Print final metrics
-    if total_travel_time > TOLERANCE:
-        delay_percentage = total_delay / total_travel_time * 100
+    if warm_start.total_travel_time > TOLERANCE:
+        delay_percentage = warm_start.total_delay / warm_start.total_travel_time * 100
     else:
         delay_percentage = 0
     print(f"Warm start solution computed successfully.")
-    print(f" - Total Delay: {total_delay:.2f}")
+    print(f" - Total Delay: {warm_start.total_delay:.2f}")
     print(f" - Delay as % of Travel Time: {delay_percentage:.2f}%")
     print("=" * 50)
 
     return warm_start
+
+
+def get_additional_warm_starts(
+        epoch_instance: EpochInstance, epoch_status_quo: Solution, warm_start: Solution,
+        solver_params: SolverParameters, cpp_local_search: cpp.LocalSearch, cpp_instance: cpp.cpp_instance
+) -> list[Solution]:
+    """
+    Computes up to MIP_STARTS - 1 further MIP starts: the status quo, if it is not already the warm start, and
+    local searches from the status quo start times staggered by random fractions of the slack of the trips.
+    """
+    additional_warm_starts = [] if warm_start is epoch_status_quo else [epoch_status_quo]
+    rng = np.random.default_rng(epoch_instance.epoch_id)
+    slacks = np.maximum(0.0, [latest_departures[0] - start_time for latest_departures, start_time in
+                              zip(epoch_instance.latest_departure_times, epoch_status_quo.start_times)])
+    while len(additional_warm_starts) < MIP_STARTS - 1 and _is_time_left_for_optimization(epoch_instance,
+                                                                                        solver_params):
+        start_times = np.add(epoch_status_quo.start_times, rng.random(len(slacks)) * slacks).tolist()
+        additional_warm_starts.append(
+            _get_local_search_solution(cpp_local_search.run(start_times), epoch_instance, cpp_instance))
+    additional_warm_starts = additional_warm_starts[:MIP_STARTS - 1]
+    print(f"Computed {len(additional_warm_starts)} additional MIP starts, total delays: "
+          f"{[round(solution.total_delay, 2) for solution in additional_warm_starts]}")
+    return additional_warm_starts
@@ -33,11 +33,26 @@ def assert_trips_are_not_duplicated(epoch_instance: EpochInstance, vehicles_util
                     f"Duplicate values in vehicles utilizing arcs for arc {arc}."
 
 
+def get_cpp_conflict_pairs(instance: Instance) -> cpp.cpp_conflict_pairs:
+    """Pass the conflict pairs table of the instance, if built, to the CPP instance (used to check ties)."""
+    if instance.conflict_pairs is None:
+        return cpp.cpp_conflict_pairs()
+    return cpp.cpp_conflict_pairs(
+        offsets=instance.conflict_pairs.pair_offsets.tolist(),
+        first_trips=instance.conflict_pairs.first_trips.tolist(),
+        second_trips=instance.conflict_pairs.second_trips.tolist(),
+        first_positions=instance.conflict_pairs.first_positions.tolist(),
+        second_positions=instance.conflict_pairs.second_positions.tolist(),
+    )
+
+
 def get_cpp_instance(instance: Instance, time_limit: int) -> cpp.cpp_instance:
     """Create a CPP instance for the given epoch."""
     return cpp.cpp_instance(
         set_of_vehicle_paths=instance.trip_routes,
-        arc_position_in_routes_map=instance.arc_position_in_routes_map,
+        arc_position_offsets=instance.arc_position_in_routes_map.offsets,
+        arc_position_trips=instance.arc_position_in_routes_map.trip_ids,
+        arc_position_positions=instance.arc_position_in_routes_map.positions,
         travel_times_arcs=instance.travel_times_arcs,
         capacities_arcs=instance.capacities_arcs,
         list_of_slopes=instance.instance_params.list_of_slopes,
@@ -48,7 +63,8 @@ def get_cpp_instance(instance: Instance, time_limit: int) -> cpp.cpp_instance:
         lb_travel_time=instance.get_lb_travel_time(),
         conflicting_sets=instance.conflicting_sets,
         earliest_departures=instance.earliest_departure_times,
-        latest_departures=instance.latest_departure_times
+        latest_departures=instance.latest_departure_times,
+        conflict_pairs=get_cpp_conflict_pairs(instance)
     )
 
 
@@ -62,11 +78,7 @@ def get_epoch_status_quo(epoch_instance: EpochInstance, solver_params: SolverPar
     epoch_instance.set_release_times(cpp_status_quo.get_start_times())
     delays_on_arcs = cpp_status_quo.get_delays_on_arcs(cpp_epoch_instance)
 
-    binaries = get_conflict_binaries(
-        epoch_instance.conflicting_sets,
-        epoch_instance.trip_routes,
-        cpp_status_quo.get_schedule(),
-    )
+    binaries = get_conflict_binaries(epoch_instance.conflict_pairs, cpp_status_quo.get_schedule())
 
     vehicles_utilizing_arcs = get_vehicles_utilizing_arcs(epoch_instance.trip_routes)
     assert_trips_are_not_duplicated(epoch_instance, vehicles_utilizing_arcs)
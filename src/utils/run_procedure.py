@@ -6,6 +6,7 @@ from simplify.simplify import simplify_system
 from utils.prints import print_insights_algorithm
 from utils.save import save_experiment
 from problem.epoch_instance import get_epoch_instance
+from MIP import dispose_gurobi_env
 
 
 def run_procedure(source: str) -> None:
@@ -56,6 +57,9 @@ def run_procedure(source: str) -> None:
         epoch_instances.append(epoch_instance)
         optimization_measures_list.append(optimization_measures)
 
+    # The models of the epochs are disposed: release the Gurobi license (at the exit if an epoch raised)
+    dispose_gurobi_env()
+
     # Reconstruct the complete solution from all epochs
     from solutions.reconstruct_solution import reconstruct_solution
 
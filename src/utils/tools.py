@@ -1,4 +1,5 @@
 import json
+import os
 import jsonpickle
 import networkx as nx
 from networkx import MultiDiGraph
@@ -13,7 +14,7 @@ V = TypeVar('V')
 class SuppressOutput:
     def __enter__(self):
         self._original_stdout = sys.stdout
-        sys.stdout = open('NUL', 'w')  # Use 'NUL' for Windows
+        sys.stdout = open(os.devnull, 'w')
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         sys.stdout.close()
@@ -0,0 +1,136 @@
+"""
+Shared fixtures of the Python tests: a small synthetic instance on a grid network and its offline epoch, prepared
+as in utils.run_procedure. Run from the repository root with `python -m pytest tests`.
+"""
+import dataclasses
+import random
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Configuration for C++ build (options: release, debug, relwithdebinfo), as in main.py
+build = "relwithdebinfo"
+path_to_repo = Path(__file__).resolve().parent.parent
+sys.path.extend([path_to_repo.as_posix(), (path_to_repo / "src").as_posix(),
+                 (path_to_repo / "cpp_module/cmake-build-{}".format(build)).as_posix()])
+
+import input_data  # noqa: E402
+
+# The tests neither write the catch2 files nor the instance snapshots
+input_data.SAVE_CPP = False
+input_data.USE_INSTANCE_SNAPSHOTS = False
+
+import utils.run_procedure  # noqa: E402,F401 (imports the modules in the same order as main.py)
+from input_data import InstanceParameters, SolverParameters  # noqa: E402
+from problem.instance import Instance, get_max_staggering_applicable  # noqa: E402
+
+NETWORK_NAME = "manhattan_tests"
+
+
+def get_grid_instance(number_of_trips: int, seed: int, grid_size: int = 5, horizon: float = 900.0) -> Instance:
+    """Trips on shortest paths of a directed grid, with random arc lengths and release times."""
+    import networkx as nx
+
+    rng = random.Random(seed)
+    graph = nx.grid_2d_graph(grid_size, grid_size).to_directed()
+    for origin, destination in graph.edges():
+        graph[origin][destination]["length"] = rng.uniform(80, 250)
+    nodes = list(graph.nodes())
+    arc_ids: dict[tuple, int] = {}
+    travel_times_arcs, capacities_arcs = [0.0], [1]
+    trip_routes, release_times, deadlines = [], [], []
+    for _ in range(number_of_trips):
+        path = []
+        while len(path) < 3:
+            origin, destination = rng.sample(nodes, 2)
+            path = nx.shortest_path(graph, origin, destination, weight="length")
+        route = []
+        for arc in zip(path[:-1], path[1:]):
+            if arc not in arc_ids:
+                arc_ids[arc] = len(travel_times_arcs)
+                travel_time = graph[arc[0]][arc[1]]["length"] * 3.6 / input_data.SPEED_KPH
+                travel_times_arcs.append(travel_time)
+                capacities_arcs.append(int(travel_time // 10) + 1)
+            route.append(arc_ids[arc])
+        route.append(0)
+        trip_routes.append(route)
+        release_times.append(rng.uniform(0, horizon))
+        deadlines.append(release_times[-1] + sum(travel_times_arcs[arc] for arc in route) * 1.25 + 60)
+
+    order = sorted(range(number_of_trips), key=lambda trip: release_times[trip])
+    trip_routes = [trip_routes[trip] for trip in order]
+    release_times = [release_times[trip] for trip in order]
+    deadlines = [deadlines[trip] for trip in order]
+    instance_params = InstanceParameters(network_name=NETWORK_NAME, add_shortcuts=False, max_length_shortcut=0,
+                                         day=1, number_of_trips=number_of_trips, seed=seed, max_flow_allowed=10,
+                                         list_of_slopes=[0.5, 1, 1.5], list_of_thresholds=[1, 2, 3],
+                                         staggering_cap=10, deadline_factor=25)
+    max_staggering_applicable = get_max_staggering_applicable(trip_routes, travel_times_arcs, release_times,
+                                                              deadlines, instance_params)
+    return Instance(instance_params=instance_params, capacities_arcs=capacities_arcs, release_times=release_times,
+                    trip_routes=trip_routes, node_based_trip_routes=[[0] for _ in trip_routes],
+                    travel_times_arcs=travel_times_arcs, deadlines=deadlines,
+                    max_staggering_applicable=max_staggering_applicable)
+
+
+def get_solver_params(instance: Instance, **changes) -> SolverParameters:
+    solver_params = SolverParameters(epoch_size=60, epoch_time_limit=60, optimize=True, warm_start=True,
+                                     improve_warm_start=True, local_search_callback=False, simplify=True,
+                                     instance_parameters=instance.instance_params, set_of_experiments=None,
+                                     verbose_model=False)
+    return dataclasses.replace(solver_params, **changes)
+
+
+def get_simplified_epoch(instance: Instance, solver_params: SolverParameters):
+    """Simplified offline epoch instance and status quo, as computed by utils.run_procedure."""
+    from problem.epoch_instance import get_epoch_instance
+    from simplify.simplify import simplify_system
+    from solutions.core import get_offline_solution
+    from solutions.status_quo import get_cpp_instance, get_epoch_status_quo
+
+    get_offline_solution(instance, get_cpp_instance(instance, solver_params.epoch_time_limit))
+    epoch_instance = get_epoch_instance(instance, 0, solver_params)
+    epoch_status_quo, _ = get_epoch_status_quo(epoch_instance, solver_params)
+    return simplify_system(epoch_instance, epoch_status_quo, solver_params)
+
+
+def get_small_simplified_epoch(seed: int):
+    """
+    Simplified offline epoch of 80 trips on a 4x4 grid, whose models fit a size-limited Gurobi license, with its
+    status quo and solver parameters.
+    """
+    instance = get_grid_instance(number_of_trips=80, seed=seed, grid_size=4, horizon=300.0)
+    solver_params = get_solver_params(instance)
+    simplified_instance, simplified_status_quo = get_simplified_epoch(instance, solver_params)
+    return simplified_instance, simplified_status_quo, solver_params
+
+
+def get_optimal_total_delay(model) -> float:
+    """Solves a constructed epoch model to optimality, without the callback of run_model."""
+    import gurobipy as grb
+
+    model.setParam("OutputFlag", 0)
+    model.setParam("MIPGap", 0)
+    model.optimize()
+    assert model.Status == grb.GRB.OPTIMAL
+    return model.ObjVal
+
+
+@pytest.fixture(scope="session", autouse=True)
+def remove_test_network_folder():
+    """InstanceParameters creates the folder of the instance under data/."""
+    yield
+    shutil.rmtree(path_to_repo / "data" / NETWORK_NAME, ignore_errors=True)
+
+
+@pytest.fixture
+def grid_instance() -> Instance:
+    return get_grid_instance(number_of_trips=25, seed=0)
+
+
+@pytest.fixture
+def small_epoch(request):
+    """get_small_simplified_epoch of seed 0, or of the seeds given with indirect parametrization."""
+    return get_small_simplified_epoch(getattr(request, "param", 0))
@@ -0,0 +1,32 @@
+from conftest import get_grid_instance
+from problem.arc_position_index import TripPositionIndex, get_arc_position_index
+
+
+def test_arc_position_index_matches_routes():
+    instance = get_grid_instance(number_of_trips=40, seed=1)
+    number_of_arcs = len(instance.travel_times_arcs)
+    arc_position_index = get_arc_position_index(instance.trip_routes, number_of_arcs)
+
+    for arc in range(1, number_of_arcs):
+        for trip, route in enumerate(instance.trip_routes):
+            expected_position = max((position for position, route_arc in enumerate(route) if route_arc == arc),
+                                    default=-1)
+            assert arc_position_index.get_position(arc, trip) == expected_position
+    assert arc_position_index.get_number_of_entries() == sum(len(set(route) - {0}) for route in
+                                                              instance.trip_routes)
+
+
+def test_trip_position_index_follows_route_edits():
+    trip_routes = [[3, 4, 5, 0], [4, 6, 0]]
+    trip_position_index = TripPositionIndex(trip_routes)
+    assert trip_position_index.get_position(0, 5) == 2
+
+    trip_routes[0] = [4, 5, 0]
+    trip_position_index.update_trip(0, trip_routes[0])
+    assert trip_position_index.get_position(0, 5) == 1
+
+    trip_position_index.replace_arc(1, 6, 7)
+    assert trip_position_index.get_position(1, 7) == 1
+
+    trip_position_index.remove_trip(0)
+    assert trip_position_index.get_position(0, 4) == 0
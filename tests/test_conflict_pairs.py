@@ -0,0 +1,53 @@
+import itertools
+
+import numpy as np
+
+from conftest import get_grid_instance, get_simplified_epoch, get_solver_params
+from conflicting_sets.conflict_pairs import get_conflict_pairs, _get_overlapping_combinations
+from input_data import CONSTR_TOLERANCE
+
+
+def get_overlapping_pairs(earliest_departures: list[float], latest_arrivals: list[float]) -> list[tuple[int, int]]:
+    return [(first, second) for first, second in itertools.combinations(range(len(earliest_departures)), 2)
+            if earliest_departures[second] <= latest_arrivals[first] + CONSTR_TOLERANCE and
+            earliest_departures[first] <= latest_arrivals[second] + CONSTR_TOLERANCE]
+
+
+def test_overlapping_combinations_match_brute_force():
+    rng = np.random.default_rng(0)
+    for size in [0, 1, 2, 5, 40]:
+        # Rounded times, so that some windows start together or touch
+        earliest_departures = np.round(rng.uniform(0, 100, size))
+        latest_arrivals = earliest_departures + np.round(rng.uniform(0, 20, size))
+        first, second = _get_overlapping_combinations(earliest_departures, latest_arrivals)
+        assert list(zip(first.tolist(), second.tolist())) == get_overlapping_pairs(earliest_departures.tolist(),
+                                                                                   latest_arrivals.tolist())
+
+
+def test_conflict_pairs_of_an_epoch():
+    instance = get_grid_instance(number_of_trips=80, seed=0, grid_size=5, horizon=900.0)
+    simplified_instance, _ = get_simplified_epoch(instance, get_solver_params(instance))
+    conflict_pairs = simplified_instance.conflict_pairs
+    assert len(conflict_pairs)
+
+    expected_pairs, all_pairs = [], []
+    for arc, conflicting_set in enumerate(simplified_instance.conflicting_sets):
+        if arc == 0 or not conflicting_set:
+            continue
+        positions = [simplified_instance.get_arc_position_in_trip_route(trip, arc) for trip in conflicting_set]
+        assert conflict_pairs.get_members(arc) == list(zip(conflicting_set, positions))
+        overlapping_pairs = get_overlapping_pairs(
+            [simplified_instance.earliest_departure_times[trip][position]
+             for trip, position in zip(conflicting_set, positions)],
+            [simplified_instance.latest_departure_times[trip][position + 1]
+             for trip, position in zip(conflicting_set, positions)])
+        for pairs, members in [(expected_pairs, overlapping_pairs),
+                               (all_pairs, itertools.combinations(range(len(conflicting_set)), 2))]:
+            pairs.extend((arc, conflicting_set[first], conflicting_set[second], positions[first], positions[second])
+                         for first, second in members)
+    assert list(conflict_pairs.iterate()) == expected_pairs
+    assert len(expected_pairs) < len(all_pairs)
+
+    # Without the time bounds, every pair of the conflicting sets is enumerated
+    assert list(get_conflict_pairs(simplified_instance.conflicting_sets,
+                                   simplified_instance.trip_position_index).iterate()) == all_pairs
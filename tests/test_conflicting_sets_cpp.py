@@ -0,0 +1,52 @@
+import cpp_module as cpp
+import pytest
+
+from conftest import get_grid_instance
+from conflicting_sets.schedule_utilities import add_conflicting_sets_to_instance_python, set_cpp_conflicting_sets
+from input_data import MIN_SET_CAPACITY
+
+
+def compute_conflicting_sets(instance, incremental: bool):
+    return cpp.compute_conflicting_sets(
+        trip_routes=instance.trip_routes,
+        travel_times_arcs=instance.travel_times_arcs,
+        capacities_arcs=instance.capacities_arcs,
+        earliest_departure_times=instance.earliest_departure_times,
+        max_staggering_applicable=instance.max_staggering_applicable,
+        list_of_slopes=instance.instance_params.list_of_slopes,
+        list_of_thresholds=instance.instance_params.list_of_thresholds,
+        min_set_capacity=MIN_SET_CAPACITY,
+        incremental=incremental,
+    )
+
+
+def test_incremental_sweeps_match_full_sweeps():
+    instance = get_grid_instance(number_of_trips=150, seed=4, grid_size=6, horizon=1800.0)
+    full = compute_conflicting_sets(instance, incremental=False)
+    incremental = compute_conflicting_sets(instance, incremental=True)
+
+    for attribute in ["earliest_departure_times", "latest_departure_times", "min_delay_on_arcs",
+                      "max_delay_on_arcs", "trip_routes", "conflicting_sets", "conflicting_sets_processing_arc_map"]:
+        assert getattr(incremental, attribute) == getattr(full, attribute)
+    assert incremental.iterations == full.iterations > 1
+    # The first incremental sweep already skips the bounds which cannot observe a change
+    number_of_bounds = full.touched_bounds[0]
+    assert incremental.touched_bounds[0] == number_of_bounds
+    assert incremental.touched_bounds[1] < number_of_bounds
+
+
+@pytest.mark.parametrize("number_of_trips, seed, grid_size, horizon",
+                         [(25, 0, 4, 300.0), (100, 1, 5, 900.0), (300, 2, 6, 1800.0), (600, 3, 8, 3600.0)])
+def test_cpp_conflicting_sets_match_python(number_of_trips, seed, grid_size, horizon):
+    cpp_instance = get_grid_instance(number_of_trips, seed, grid_size, horizon)
+    python_instance = get_grid_instance(number_of_trips, seed, grid_size, horizon)
+    set_cpp_conflicting_sets(cpp_instance)
+    add_conflicting_sets_to_instance_python(python_instance)
+
+    assert any(cpp_instance.conflicting_sets)
+    for attribute in ["trip_routes", "travel_times_arcs", "capacities_arcs", "conflicting_sets",
+                      "conflicting_sets_processing_arc_map"]:
+        assert list(getattr(cpp_instance, attribute)) == list(getattr(python_instance, attribute))
+    for attribute in ["earliest_departure_times", "latest_departure_times", "min_delay_on_arcs", "max_delay_on_arcs"]:
+        for cpp_values, python_values in zip(getattr(cpp_instance, attribute), getattr(python_instance, attribute)):
+            assert cpp_values == pytest.approx(python_values, abs=1e-6)
@@ -0,0 +1,65 @@
+import datetime
+
+import pytest
+
+import solutions.core
+from conftest import get_grid_instance, get_simplified_epoch, get_solver_params
+from simplify.decompose import get_component_instance, get_trip_components
+
+
+@pytest.fixture(params=[(0, 5, 900.0), (3, 6, 600.0)], ids=["seed0", "seed3"])
+def decomposable_epoch(request):
+    seed, grid_size, horizon = request.param
+    instance = get_grid_instance(number_of_trips=80, seed=seed, grid_size=grid_size, horizon=horizon)
+    solver_params = get_solver_params(instance, improve_warm_start=False)
+    simplified_instance, simplified_status_quo = get_simplified_epoch(instance, solver_params)
+    return simplified_instance, simplified_status_quo, solver_params
+
+
+def test_trip_components_split_the_paired_trips(decomposable_epoch):
+    simplified_instance, _, _ = decomposable_epoch
+    components = get_trip_components(simplified_instance)
+    assert len(components) > 1
+
+    component_of_trip = {trip: component for component, trips in enumerate(components) for trip in trips}
+    assert len(component_of_trip) == sum(len(trips) for trips in components)
+    conflict_pairs = simplified_instance.conflict_pairs
+    paired_trips = set(conflict_pairs.first_trips.tolist()) | set(conflict_pairs.second_trips.tolist())
+    assert set(component_of_trip) == paired_trips
+    for first_trip, second_trip in zip(conflict_pairs.first_trips.tolist(), conflict_pairs.second_trips.tolist()):
+        assert component_of_trip[first_trip] == component_of_trip[second_trip]
+
+
+def test_component_instance_keeps_the_pairs_of_its_trips(decomposable_epoch):
+    simplified_instance, _, _ = decomposable_epoch
+    for trips in get_trip_components(simplified_instance):
+        component_instance = get_component_instance(simplified_instance, trips)
+        component_trip = {trip: position for position, trip in enumerate(trips)}
+        expected_pairs = [
+            (arc, component_trip[first_trip], component_trip[second_trip], first_position, second_position)
+            for arc, first_trip, second_trip, first_position, second_position
+            in simplified_instance.conflict_pairs.iterate() if first_trip in component_trip
+        ]
+        assert list(component_instance.conflict_pairs.iterate()) == expected_pairs
+        assert component_instance.trip_routes == [simplified_instance.trip_routes[trip] for trip in trips]
+
+
+def test_parallel_groups_match_the_single_model(decomposable_epoch, monkeypatch):
+    simplified_instance, simplified_status_quo, solver_params = decomposable_epoch
+    simplified_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+    solution, _ = solutions.core._solve_simplified_instance(simplified_instance, simplified_status_quo,
+                                                            solver_params)
+
+    monkeypatch.setattr(solutions.core, "MIP_PROCESSES", 2)
+    trip_groups = solutions.core._get_trip_groups(simplified_instance, solver_params)
+    assert len(trip_groups) == 2
+    simplified_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+    parallel_solution, optimization_measures = solutions.core._solve_trip_groups_in_parallel(
+        simplified_instance, simplified_status_quo, trip_groups, solver_params)
+
+    assert solution.total_delay < simplified_status_quo.total_delay
+    assert parallel_solution.total_delay == pytest.approx(solution.total_delay, rel=1e-3)
+    # The status quo entry comes first, as in the measures of a single model
+    assert optimization_measures["lower_bounds_list"][0] == 0.0
+    assert optimization_measures["optimality_gaps_list"][0] == 100.0
+    assert all(len(values) == 2 for values in optimization_measures.values())
@@ -0,0 +1,14 @@
+import MIP
+from MIP import dispose_gurobi_env, get_gurobi_env
+
+
+def test_gurobi_env_is_shared_until_disposed():
+    env = get_gurobi_env()
+    assert get_gurobi_env() is env
+    dispose_gurobi_env()
+    assert MIP._gurobi_env is None
+    dispose_gurobi_env()  # Disposing twice is a no-op
+
+    new_env = get_gurobi_env()
+    assert new_env is not env
+    dispose_gurobi_env()
@@ -0,0 +1,23 @@
+import pytest
+
+from conftest import get_grid_instance, get_solver_params
+from input_data import format_worker_pool
+
+
+def test_format_worker_pool():
+    assert format_worker_pool("None") is None
+    assert format_worker_pool(" ") is None
+    assert format_worker_pool("server1:61000") == "server1:61000"
+    assert format_worker_pool("server1:61000, server2") == "server1:61000,server2"
+    assert format_worker_pool("https://manager:61080") == "https://manager:61080"
+    for worker_pool in ["server1:", "server1:port", "server1:70000", ":61000", "server 1", "server1,,server2"]:
+        with pytest.raises(ValueError):
+            format_worker_pool(worker_pool)
+
+
+def test_distributed_mip_needs_a_worker_pool():
+    instance = get_grid_instance(number_of_trips=3, seed=0)
+    with pytest.raises(ValueError):
+        get_solver_params(instance, gurobi_distributed_mip_jobs=2)
+    assert get_solver_params(instance, gurobi_distributed_mip_jobs=2,
+                             gurobi_worker_pool="server1:61000").gurobi_worker_pool == "server1:61000"
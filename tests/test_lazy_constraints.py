@@ -0,0 +1,29 @@
+import datetime
+
+import pytest
+
+import MIP.constraints
+import MIP.support
+from MIP.model import construct_model, run_model
+
+
+@pytest.mark.parametrize("small_epoch", [0, 2], indirect=True)
+def test_lazy_constraints_keep_the_optimum(monkeypatch, small_epoch):
+    monkeypatch.setattr(MIP.support, "GUROBI_OPTIMALITY_GAP", 0)
+    simplified_instance, simplified_status_quo, solver_params = small_epoch
+
+    total_delays, number_of_constraints = [], []
+    for lazy in [False, True]:
+        monkeypatch.setattr(MIP.constraints, "USE_LAZY_CONFLICT_CONSTRAINTS", lazy)
+        simplified_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+        model = construct_model(simplified_instance, simplified_status_quo, simplified_status_quo, solver_params)
+        assert model.has_lazy_constraints() == lazy
+        model.update()
+        number_of_constraints.append(model.NumConstrs)
+        run_model(model, simplified_instance, simplified_status_quo, solver_params, None, None)
+        total_delays.append(model.ObjVal)
+        model.dispose()
+
+    assert number_of_constraints[1] < number_of_constraints[0]
+    assert total_delays[0] > 0
+    assert total_delays[1] == pytest.approx(total_delays[0], abs=1e-4)
@@ -0,0 +1,104 @@
+import contextlib
+import io
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import cpp_module as cpp
+import pytest
+
+from conftest import get_small_simplified_epoch
+from MIP.callback import LocalSearchPolicy
+from solutions.status_quo import get_cpp_instance
+
+
+def test_stopped_local_search_returns_the_start_times(small_epoch):
+    simplified_instance, simplified_status_quo, solver_params = small_epoch
+    cpp_instance = get_cpp_instance(simplified_instance, solver_params.epoch_time_limit)
+    start_times = list(simplified_status_quo.start_times)
+
+    improved_solution = cpp.LocalSearch(cpp_instance, False).run(start_times)
+    assert improved_solution.get_total_delay() < simplified_status_quo.total_delay
+
+    local_search = cpp.LocalSearch(cpp_instance, False)
+    local_search.request_stop()
+    stopped_solution = local_search.run(start_times)
+    assert stopped_solution.get_start_times() == start_times
+    assert stopped_solution.get_total_delay() >= improved_solution.get_total_delay()
+
+
+# Total delay and total staggering of the runs of one LocalSearch on the start times of get_warm_runs, recorded with
+# the build computing all the conflicts at each run (before the conflicts were kept between the runs)
+WARM_RUNS_WITHOUT_KEPT_CONFLICTS = [
+    (4.05854225001169, 17.246039731067235), (4.05854225001169, 17.246039731067235),
+    (7.787053033010682, 9.752002465856577), (4.05854225001169, 15.18082707685935),
+    (4.05854225001169, 11.18652570872482), (17.289662197586676, 4.929624669386774),
+    (8.749493330913072, 7.66501803415729), (4.05854225001169, 19.69758556940652),
+]
+
+
+def get_warm_runs() -> list[tuple[float, float]]:
+    """
+    Runs one LocalSearch on a sequence of staggered start times, as the incumbents found by the MIP, and then on the
+    last start times again.
+    """
+    simplified_instance, simplified_status_quo, solver_params = get_small_simplified_epoch(seed=0)
+    cpp_instance = get_cpp_instance(simplified_instance, solver_params.epoch_time_limit)
+    rng = random.Random(0)
+    sequence_of_start_times = [list(simplified_status_quo.start_times)]
+    for _ in range(6):
+        start_times = sequence_of_start_times[-1][:]
+        for trip in rng.sample(range(len(start_times)), 5):
+            start_times[trip] = simplified_instance.release_times[trip] + rng.uniform(
+                0, simplified_instance.max_staggering_applicable[trip])
+        sequence_of_start_times.append(start_times)
+    sequence_of_start_times.extend([sequence_of_start_times[2], sequence_of_start_times[2]])
+
+    local_search, runs = cpp.LocalSearch(cpp_instance, False), []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for start_times in sequence_of_start_times:
+            solution = local_search.run(start_times[:])
+            runs.append((solution.get_total_delay(),
+                         sum(new - old for new, old in zip(solution.get_start_times(), start_times))))
+    return runs
+
+
+def test_warm_local_search_makes_the_same_moves():
+    # The ties are solved with a random generator shared by the process: the runs start from a new process
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        runs = executor.submit(get_warm_runs).result()
+
+    for run, expected_run in zip(runs[:-1], WARM_RUNS_WITHOUT_KEPT_CONFLICTS, strict=True):
+        assert run == pytest.approx(expected_run, rel=1e-9)
+    # The same start times again give the result of the last run
+    assert runs[-1] == runs[-2]
+
+
+def test_local_search_policy_spaces_failed_runs():
+    policy = LocalSearchPolicy()
+    assert policy.can_start(now=0.0, remaining_time=None)
+
+    policy.finish(now=10.0, duration=2.0, improved=False)
+    assert policy.next_start_clock == 12.0
+    assert not policy.can_start(now=11.9, remaining_time=None)
+    assert policy.can_start(now=12.0, remaining_time=None)
+
+    # The wait doubles plus one run after each failure in a row, and is reset by an improvement
+    policy.finish(now=20.0, duration=2.0, improved=False)
+    assert policy.next_start_clock == 26.0
+    policy.finish(now=30.0, duration=1.0, improved=False)
+    assert policy.next_start_clock == 37.0
+    policy.finish(now=40.0, duration=1.0, improved=True)
+    assert policy.failed_runs == 0 and policy.can_start(now=40.0, remaining_time=None)
+
+    # No run starts with less remaining time than the last run took
+    assert not policy.can_start(now=40.0, remaining_time=1.0)
+    assert policy.can_start(now=40.0, remaining_time=1.5)
+
+
+def test_local_search_policy_caps_the_failed_runs():
+    policy = LocalSearchPolicy()
+    for run in range(15):
+        policy.finish(now=0.0, duration=1.0, improved=False)
+    assert policy.failed_runs == 10
+    assert policy.next_start_clock == 2 ** 10 - 1
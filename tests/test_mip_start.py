@@ -0,0 +1,53 @@
+import datetime
+
+import cpp_module as cpp
+import numpy as np
+import pytest
+
+from MIP.model import construct_model
+from MIP.warm_start import get_route_lengths_and_member_entries, get_solution_values, set_warm_start_model
+from solutions.epoch_warm_start import get_epoch_warm_start
+from solutions.status_quo import get_cpp_instance
+
+
+@pytest.fixture
+def epoch_with_warm_start(small_epoch):
+    simplified_instance, simplified_status_quo, solver_params = small_epoch
+    simplified_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+    cpp_instance = get_cpp_instance(simplified_instance, solver_params.epoch_time_limit)
+    warm_start = get_epoch_warm_start(simplified_instance, simplified_status_quo, solver_params,
+                                      cpp.LocalSearch(cpp_instance, False), cpp_instance)
+    assert warm_start.total_delay < simplified_status_quo.total_delay
+    return simplified_instance, simplified_status_quo, warm_start, solver_params
+
+
+def test_mip_start_sets_every_variable(epoch_with_warm_start):
+    simplified_instance, simplified_status_quo, warm_start, solver_params = epoch_with_warm_start
+    model = construct_model(simplified_instance, simplified_status_quo, warm_start, solver_params)
+    set_warm_start_model(model, [warm_start], simplified_instance)
+    model.update()
+
+    columns, values = get_solution_values(model, simplified_instance, warm_start.congested_schedule,
+                                          warm_start.delays_on_arcs, warm_start.binaries,
+                                          *get_route_lengths_and_member_entries(simplified_instance))
+    is_variable = columns >= 0
+    starts = np.array(model.getAttr("Start", model.getVars()))
+    assert np.allclose(starts[columns[is_variable]], values[is_variable])
+    assert starts[model.get_total_delay_column()] == pytest.approx(warm_start.total_delay)
+    model.dispose()
+
+
+def test_mip_start_is_the_first_incumbent(epoch_with_warm_start):
+    simplified_instance, simplified_status_quo, warm_start, solver_params = epoch_with_warm_start
+    model = construct_model(simplified_instance, simplified_status_quo, warm_start, solver_params)
+    set_warm_start_model(model, [warm_start, simplified_status_quo], simplified_instance)
+    model.setParam("OutputFlag", 0)
+    model.setParam("Presolve", 0)
+    model.setParam("Heuristics", 0)
+    model.setParam("SolutionLimit", 1)
+    model.optimize()
+
+    # The best start is accepted as it is, without completing or repairing it, before any node or heuristic
+    assert model.ObjVal == pytest.approx(warm_start.total_delay, abs=1e-4)
+    assert model.NodeCount == 0
+    model.dispose()
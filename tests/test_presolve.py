@@ -0,0 +1,33 @@
+import copy
+import datetime
+
+import pytest
+
+from conftest import get_optimal_total_delay
+from MIP.model import construct_model
+from MIP.presolve import presolve_bounds
+
+
+def get_optimal_epoch_delay(instance, status_quo, solver_params) -> float:
+    instance.clock_start_epoch = datetime.datetime.now().timestamp()
+    model = construct_model(instance, status_quo, status_quo, solver_params)
+    total_delay = get_optimal_total_delay(model)
+    model.dispose()
+    return total_delay
+
+
+@pytest.mark.parametrize("small_epoch", [0, 1, 2], indirect=True)
+def test_presolve_keeps_the_optimum(small_epoch):
+    simplified_instance, simplified_status_quo, solver_params = small_epoch
+    # The windows of the conflicting sets are already consistent: loosen them after the first arc, so that the
+    # presolve has bounds to tighten
+    for latest_departures in simplified_instance.latest_departure_times:
+        latest_departures[1:] = [latest_departure + 30 for latest_departure in latest_departures[1:]]
+    presolved_instance = copy.deepcopy(simplified_instance)
+    presolve_bounds(presolved_instance)
+    assert presolved_instance.latest_departure_times != simplified_instance.latest_departure_times
+
+    total_delay = get_optimal_epoch_delay(simplified_instance, simplified_status_quo, solver_params)
+    assert total_delay > 0
+    assert get_optimal_epoch_delay(presolved_instance, simplified_status_quo, solver_params) == pytest.approx(
+        total_delay, abs=1e-6)
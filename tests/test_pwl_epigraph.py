@@ -0,0 +1,36 @@
+import datetime
+
+import numpy as np
+
+from conftest import get_optimal_total_delay
+from MIP.constraints import get_pwl_function_cuts, get_x_and_y_points_pwl_function
+from MIP.model import construct_model
+
+
+def test_cuts_of_convex_functions():
+    x_points, y_points = [0, 2, 2, 5, 9], [0, 0, 0, 3, 11]
+    slopes, intercepts = get_pwl_function_cuts(x_points, y_points)
+    loads = np.linspace(0, 12, 49)
+    extended_function = np.where(loads > 9, 11 + 2 * (loads - 9), np.interp(loads, x_points, y_points))
+    assert np.allclose(np.max(slopes * loads[:, None] + intercepts, axis=1), extended_function)
+
+    assert get_pwl_function_cuts([0, 2, 4], [0, 3, 4]) is None
+
+
+def test_epigraph_relaxation_bounds_the_delay_from_below(small_epoch):
+    simplified_instance, simplified_status_quo, solver_params = small_epoch
+    assert any(get_pwl_function_cuts(*get_x_and_y_points_pwl_function(simplified_instance, arc)) is not None
+               for arc in simplified_instance.conflict_pairs.get_conflicting_arcs())
+
+    total_delays = []
+    for pwl_epigraph_relaxation in [False, True]:
+        simplified_instance.clock_start_epoch = datetime.datetime.now().timestamp()
+        model = construct_model(simplified_instance, simplified_status_quo, simplified_status_quo, solver_params,
+                                pwl_epigraph_relaxation=pwl_epigraph_relaxation)
+        assert (model.NumGenConstrs == 0) == pwl_epigraph_relaxation
+        total_delays.append(get_optimal_total_delay(model))
+        model.dispose()
+
+    exact_total_delay, relaxed_total_delay = total_delays
+    assert exact_total_delay > 0
+    assert relaxed_total_delay <= exact_total_delay + 1e-6
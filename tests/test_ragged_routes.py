@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from conftest import get_grid_instance
+from problem.ragged_routes import get_ragged_routes, segmented_cumsum, get_route_travel_times, \
+    get_earliest_departure_times, get_latest_departure_times
+
+TRIP_ROUTES = [[1, 2, 0], [], [3, 1, 2, 0], [2, 0], []]
+TRAVEL_TIMES_ARCS = [0.0, 12.5, 30.25, 7.0]
+RELEASE_TIMES = [100.0, 200.0, 86000.5, 5.0, 60.0]
+DEADLINES = [500.0, 300.0, 86400.0, 100.0, 90.0]
+
+
+def test_segmented_cumsum_restarts_at_every_route():
+    ragged_routes = get_ragged_routes(TRIP_ROUTES)
+    values = np.arange(1.0, len(ragged_routes.arcs) + 1.0)
+    expected = np.concatenate([np.cumsum(values[start:end]) for start, end in
+                               zip(ragged_routes.offsets[:-1], ragged_routes.offsets[1:])])
+    assert np.array_equal(segmented_cumsum(values, ragged_routes), expected)
+    assert len(segmented_cumsum(np.zeros(0), get_ragged_routes([[], []]))) == 0
+
+
+def test_segmented_cumsum_precision_with_large_values():
+    rng = np.random.default_rng(0)
+    trip_routes = [[1] * int(length) for length in rng.integers(0, 40, 5000)]
+    ragged_routes = get_ragged_routes(trip_routes)
+    values = rng.uniform(5, 120, len(ragged_routes.arcs))
+    non_empty = ragged_routes.get_route_lengths() > 0
+    values[ragged_routes.offsets[:-1][non_empty]] = rng.uniform(0, 86400, non_empty.sum())
+
+    expected = np.concatenate([np.cumsum(values[start:end]) for start, end in
+                               zip(ragged_routes.offsets[:-1], ragged_routes.offsets[1:])])
+    assert np.allclose(segmented_cumsum(values, ragged_routes), expected, rtol=0, atol=1e-9)
+
+
+def test_time_windows_match_loops_with_empty_routes():
+    ragged_routes = get_ragged_routes(TRIP_ROUTES)
+    max_staggering = np.array([10.0, 0.0, 20.0, 5.0, 0.0])
+    earliest_departure_times = ragged_routes.split(
+        get_earliest_departure_times(ragged_routes, TRAVEL_TIMES_ARCS, RELEASE_TIMES))
+    latest_departure_times = get_latest_departure_times(ragged_routes, TRAVEL_TIMES_ARCS, DEADLINES,
+                                                        np.asarray(RELEASE_TIMES) + max_staggering).tolist()
+
+    extended_offsets = ragged_routes.get_extended_offsets()
+    for trip, route in enumerate(TRIP_ROUTES):
+        expected_earliest, time = [], RELEASE_TIMES[trip]
+        for arc in route:
+            expected_earliest.append(time)
+            time += TRAVEL_TIMES_ARCS[arc]
+        assert earliest_departure_times[trip] == pytest.approx(expected_earliest)
+
+        expected_latest, time = [DEADLINES[trip]], DEADLINES[trip]
+        for arc in reversed(route[1:]):
+            time -= TRAVEL_TIMES_ARCS[arc]
+            expected_latest.insert(0, time)
+        expected_latest = [RELEASE_TIMES[trip] + max_staggering[trip]] + (expected_latest if route else [])
+        trip_latest = latest_departure_times[extended_offsets[trip]:extended_offsets[trip + 1]]
+        assert trip_latest == pytest.approx(expected_latest)
+
+    assert get_route_travel_times(ragged_routes, TRAVEL_TIMES_ARCS).tolist() == [
+        sum(TRAVEL_TIMES_ARCS[arc] for arc in route) for route in TRIP_ROUTES]
+
+
+def test_lb_travel_time_is_the_sequential_sum():
+    instance = get_grid_instance(number_of_trips=30, seed=2)
+    assert instance.get_lb_travel_time() == sum(
+        instance.travel_times_arcs[arc] for route in instance.trip_routes for arc in route)
@@ -0,0 +1,108 @@
+import dataclasses
+import os
+import shutil
+
+import numpy as np
+
+import problem.epoch_instance
+import problem.instance
+import problem.snapshot
+from conftest import get_grid_instance, get_solver_params
+from conflicting_sets.conflict_pairs import ConflictPairs
+from problem.instance import TripsData
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "snapshot"
+    problem.snapshot.save_snapshot(
+        path,
+        flat_attributes={"release_times": [0.5, 10.0, 20.25], "capacities_arcs": [1, 2, 3]},
+        ragged_attributes={"trip_routes": ([[1, 2, 0], [], [3, 0]], np.int64),
+                           "delays": ([[0.5], [], [1.5, 2.5]], np.float64)},
+    )
+    snapshot = problem.snapshot.load_snapshot(path)
+
+    assert snapshot == {"release_times": [0.5, 10.0, 20.25], "capacities_arcs": [1, 2, 3],
+                        "trip_routes": [[1, 2, 0], [], [3, 0]], "delays": [[0.5], [], [1.5, 2.5]]}
+    assert all(isinstance(arc, int) for route in snapshot["trip_routes"] for arc in route)
+    assert problem.snapshot.load_snapshot(tmp_path / "missing") is None
+
+
+def test_empty_ragged_attribute_keeps_its_type(tmp_path):
+    path = tmp_path / "snapshot"
+    problem.snapshot.save_snapshot(path, flat_attributes={},
+                                   ragged_attributes={"conflicting_sets": ([[], []], np.int64)})
+
+    assert np.load(path / "conflicting_sets.npy").dtype == np.int64
+    assert problem.snapshot.load_snapshot(path) == {"conflicting_sets": [[], []]}
+
+
+def test_snapshot_key_changes_with_the_input_files():
+    instance_params = get_grid_instance(number_of_trips=5, seed=0).instance_params
+    path_to_instance = instance_params.path_to_instance
+    key = problem.snapshot.get_snapshot_key(instance_params, epoch_size=60)
+    assert problem.snapshot.get_snapshot_key(instance_params, epoch_size=60) == key
+    assert problem.snapshot.get_snapshot_key(instance_params, epoch_size=10) != key
+
+    path_to_instance.write_text("{}")
+    key_with_file = problem.snapshot.get_snapshot_key(instance_params, epoch_size=60)
+    assert key_with_file != key
+
+    path_to_instance.write_text('{"trip_0": {}}')
+    os.utime(path_to_instance, ns=(1, 1))
+    assert problem.snapshot.get_snapshot_key(instance_params, epoch_size=60) != key_with_file
+
+
+def get_arc_based_paths_of_the_grid(grid_instance):
+    """Stands in for the paths on the network: the routes and arcs of the grid instance."""
+    def get_arc_based_paths_with_features(node_based_trip_routes, graph):
+        return ([route[:] for route in grid_instance.trip_routes], grid_instance.travel_times_arcs[:],
+                grid_instance.capacities_arcs[:])
+    return get_arc_based_paths_with_features
+
+
+def test_instances_restored_from_snapshots_match_the_computed_ones(monkeypatch):
+    grid_instance = get_grid_instance(number_of_trips=80, seed=0, grid_size=5, horizon=900.0)
+    trips_data = TripsData(routes=grid_instance.node_based_trip_routes, deadline=grid_instance.deadlines,
+                           release_time=grid_instance.release_times)
+    monkeypatch.setattr(problem.instance, "import_trips_data", lambda instance_params: trips_data)
+    monkeypatch.setattr(problem.instance, "import_graph", lambda instance_params: None)
+    monkeypatch.setattr(problem.instance, "set_arcs_nominal_travel_times_and_capacities",
+                        lambda graph, instance_params: None)
+    monkeypatch.setattr(problem.instance, "get_arc_based_paths_with_features",
+                        get_arc_based_paths_of_the_grid(grid_instance))
+    monkeypatch.setattr(problem.instance, "USE_INSTANCE_SNAPSHOTS", True)
+    monkeypatch.setattr(problem.epoch_instance, "USE_INSTANCE_SNAPSHOTS", True)
+    instance_params = grid_instance.instance_params
+    path_to_snapshots = problem.snapshot.get_snapshot_path(instance_params, "any_key").parent
+    shutil.rmtree(path_to_snapshots, ignore_errors=True)
+    solver_params = get_solver_params(grid_instance)
+
+    instances, epoch_instances = [], []
+    for _ in range(2):
+        instance = problem.instance.get_instance(instance_params)
+        instances.append(instance)
+        epoch_instances.append(problem.epoch_instance.get_epoch_instance(instance, 0, solver_params))
+    assert len(os.listdir(path_to_snapshots)) == 2  # The second instances are restored
+
+    for attribute in ["trip_routes", "node_based_trip_routes", "travel_times_arcs", "capacities_arcs",
+                      "release_times", "deadlines", "max_staggering_applicable", "earliest_departure_times",
+                      "latest_departure_times", "min_delay_on_arcs", "max_delay_on_arcs"]:
+        assert getattr(instances[1], attribute) == getattr(instances[0], attribute)
+    for attribute in ["trip_original_ids", "trip_routes", "travel_times_arcs", "capacities_arcs", "release_times",
+                      "deadlines", "earliest_departure_times", "latest_departure_times", "min_delay_on_arcs",
+                      "max_delay_on_arcs", "conflicting_sets", "conflicting_sets_processing_arc_map"]:
+        assert getattr(epoch_instances[1], attribute) == getattr(epoch_instances[0], attribute)
+    for computed, restored in [instances, epoch_instances]:
+        assert restored.arc_position_in_routes_map == computed.arc_position_in_routes_map
+        assert restored.trip_position_index.positions == computed.trip_position_index.positions
+    computed_pairs, restored_pairs = epoch_instances[0].conflict_pairs, epoch_instances[1].conflict_pairs
+    assert len(computed_pairs)
+    for field in dataclasses.fields(ConflictPairs):
+        assert np.array_equal(getattr(restored_pairs, field.name), getattr(computed_pairs, field.name))
+
+    # The epoch snapshots depend on the minimum capacity of the conflicting sets
+    monkeypatch.setattr(problem.epoch_instance, "MIN_SET_CAPACITY", 2.0)
+    problem.epoch_instance.get_epoch_instance(instances[1], 0, solver_params)
+    assert len(os.listdir(path_to_snapshots)) == 3
+    shutil.rmtree(path_to_snapshots)
@@ -0,0 +1,75 @@
+import random
+
+import numpy as np
+
+from conftest import get_grid_instance
+from conflicting_sets.delay_tables import get_arc_delay_tables
+from conflicting_sets.time_bounds import get_arc_based_time_bounds, get_initial_latest_arrival_times
+from conflicting_sets.time_bounds_index import SortedBlockList, ArcArrivalsIndex, ArcDeparturesIndex
+
+
+def test_sorted_block_list_matches_a_sorted_list(monkeypatch):
+    monkeypatch.setattr(SortedBlockList, "BLOCK_SIZE", 4)
+    rng = random.Random(0)
+    initial_values = [rng.randint(0, 50) for _ in range(30)]
+    sorted_block_list, expected = SortedBlockList(initial_values), sorted(initial_values)
+    for _ in range(500):
+        if expected and rng.random() < 0.4:
+            value = rng.choice(expected)
+            sorted_block_list.remove(value)
+            expected.remove(value)
+        else:
+            value = rng.randint(0, 50)
+            sorted_block_list.add(value)
+            expected.append(value)
+            expected.sort()
+        assert list(sorted_block_list) == expected and len(sorted_block_list) == len(expected)
+        assert all(len(block) <= 2 * SortedBlockList.BLOCK_SIZE for block in sorted_block_list.blocks)
+
+        low, high = sorted(rng.randint(-5, 55) for _ in range(2))
+        assert sorted_block_list.count_greater_than(low) == sum(1 for x in expected if x > low)
+        assert sorted_block_list.irange(low, high) == [x for x in expected if low <= x <= high]
+        assert sorted_block_list.irange(low, high, include_minimum=False) == [x for x in expected if low < x <= high]
+        assert sorted_block_list.irange(low) == [x for x in expected if low <= x]
+        assert sorted_block_list.irange(high + 1, low) == []
+
+
+def test_arc_indexes_match_brute_force(monkeypatch):
+    monkeypatch.setattr(SortedBlockList, "BLOCK_SIZE", 2)
+    rng = random.Random(1)
+    keys = [(round(rng.uniform(0, 100), 1), vehicle, vehicle) for vehicle in range(40)]
+    departures_index = ArcDeparturesIndex(keys)
+    for vehicle in rng.sample(range(40), 15):
+        new_departure = keys[vehicle][0] + rng.uniform(0, 20)
+        departures_index.delay(keys[vehicle], new_departure)
+        keys[vehicle] = (new_departure, vehicle, vehicle)
+    assert departures_index.get_departures_in_window(20, 60, excluded_vehicle=3) == sorted(
+        key for key in keys if 20 <= key[0] <= 60 and key[1] != 3)
+
+    arrivals_index, arrivals = ArcArrivalsIndex(), []
+    for _ in range(40):
+        earliest_arrival = rng.uniform(0, 100)
+        arrival = (earliest_arrival, earliest_arrival + rng.uniform(0, 30), rng.uniform(0, 100))
+        arrivals_index.add(*arrival)
+        arrivals.append(arrival)
+    assert arrivals_index.count_latest_arrivals_after(50) == sum(1 for arrival in arrivals if arrival[1] > 50)
+    assert arrivals_index.get_latest_arrivals_between(40, 90) == sorted(
+        arrival[1] for arrival in arrivals if 40 < arrival[1] <= 90)
+    assert sorted(arrivals_index.get_arrivals_with_earliest_arrival_after(50)) == sorted(
+        arrival for arrival in arrivals if arrival[0] > 50)
+
+
+def test_time_bounds_do_not_depend_on_the_block_size(monkeypatch):
+    instance = get_grid_instance(number_of_trips=120, seed=3, grid_size=4, horizon=300.0)
+    ragged_routes = instance.get_ragged_trip_routes()
+    delay_tables = get_arc_delay_tables(instance, ragged_routes)
+    known_latest_arrival_times = get_initial_latest_arrival_times(instance, ragged_routes)
+
+    time_bounds = get_arc_based_time_bounds(instance, ragged_routes, delay_tables, known_latest_arrival_times)
+    monkeypatch.setattr(SortedBlockList, "BLOCK_SIZE", 2)
+    small_blocks_time_bounds = get_arc_based_time_bounds(instance, ragged_routes, delay_tables,
+                                                         known_latest_arrival_times)
+
+    for attribute in ["earliest_departure", "latest_departure", "earliest_arrival", "latest_arrival",
+                      "min_delay_on_arc", "max_delay_on_arc"]:
+        assert np.array_equal(getattr(time_bounds, attribute), getattr(small_blocks_time_bounds, attribute))